@@ -11,7 +11,7 @@ class AreaListCreateView(ListCreateAPIView):
     区域列表和创建视图
     """
     permission_classes = [IsAuthenticated]
-    queryset = Area.objects.all()
+    queryset = Area.objects.select_related('floor__venue')
     serializer_class = AreaSerializer
     
     def get_queryset(self):
@@ -46,7 +46,7 @@ class AreaRetrieveUpdateDestroyView(RetrieveUpdateDestroyAPIView):
     区域详情、更新和删除视图
     """
     permission_classes = [IsAuthenticated]
-    queryset = Area.objects.all()
+    queryset = Area.objects.select_related('floor__venue')
     serializer_class = AreaSerializer
     lookup_field = 'id'
     
@@ -0,0 +1,143 @@
+import json
+import logging
+import threading
+from collections import OrderedDict
+from django.conf import settings
+
+try:
+    import redis
+except ImportError:  # redis为可选依赖，未安装时使用进程内缓存
+    redis = None
+
+
+logger = logging.getLogger(__name__)
+
+PAYLOAD_KEY = 'floor_map:payload:{floor_id}:{etag}'
+
+
+class LocalFloorMapStore:
+    """
+    进程内楼层平面图缓存（LRU）
+    """
+
+    def __init__(self, max_size):
+        self.max_size = max_size
+        self._lock = threading.Lock()
+        self._payloads = OrderedDict()
+
+    def get_payload(self, floor_id, etag):
+        key = (floor_id, etag)
+        with self._lock:
+            payload = self._payloads.get(key)
+            if payload is not None:
+                self._payloads.move_to_end(key)
+            return payload
+
+    def set_payload(self, floor_id, etag, payload):
+        key = (floor_id, etag)
+        with self._lock:
+            self._payloads[key] = payload
+            self._payloads.move_to_end(key)
+            while len(self._payloads) > self.max_size:
+                self._payloads.popitem(last=False)
+
+
+class RedisFloorMapStore:
+    """
+    基于Redis的楼层平面图缓存
+
+    数据在所有进程间共享，旧ETag的数据依靠过期时间清理。
+    Redis操作失败时按未命中处理，不影响接口返回。
+    """
+
+    def __init__(self, client, timeout):
+        self.client = client
+        self.timeout = timeout
+
+    def get_payload(self, floor_id, etag):
+        try:
+            payload = self.client.get(PAYLOAD_KEY.format(floor_id=floor_id, etag=etag))
+        except redis.RedisError as e:
+            logger.warning('读取楼层缓存失败: %s', e)
+            return None
+        return payload.decode('utf-8') if payload is not None else None
+
+    def set_payload(self, floor_id, etag, payload):
+        try:
+            self.client.set(
+                PAYLOAD_KEY.format(floor_id=floor_id, etag=etag),
+                payload,
+                ex=self.timeout
+            )
+        except redis.RedisError as e:
+            logger.warning('写入楼层缓存失败: %s', e)
+
+
+_store = None
+_store_lock = threading.Lock()
+
+
+def get_floor_map_store():
+    """
+    获取楼层平面图缓存存储
+
+    FLOOR_MAP_CACHE_STORE 为 auto 时Redis可连接则使用Redis，否则使用进程内LRU；
+    为 redis 时Redis不可用记录错误日志后退回进程内LRU；为 local 时固定使用进程内LRU。
+    """
+    global _store
+    if _store is None:
+        with _store_lock:
+            if _store is None:
+                _store = _create_store()
+    return _store
+
+
+def _create_store():
+    store_type = settings.FLOOR_MAP_CACHE_STORE
+    if store_type == 'local':
+        return LocalFloorMapStore(settings.FLOOR_MAP_CACHE_SIZE)
+
+    log = logger.error if store_type == 'redis' else logger.warning
+    if redis is None or not settings.REDIS_URL:
+        log('未安装redis或未配置REDIS_URL，楼层缓存使用进程内存储')
+        return LocalFloorMapStore(settings.FLOOR_MAP_CACHE_SIZE)
+    try:
+        client = redis.Redis.from_url(
+            settings.REDIS_URL,
+            socket_connect_timeout=0.5,
+            socket_timeout=0.5
+        )
+        client.ping()
+        return RedisFloorMapStore(client, settings.FLOOR_MAP_CACHE_TIMEOUT)
+    except (redis.RedisError, ValueError) as e:
+        log('Redis不可用，楼层缓存使用进程内存储: %s', e)
+    return LocalFloorMapStore(settings.FLOOR_MAP_CACHE_SIZE)
+
+
+def reset_floor_map_store():
+    """
+    重置缓存存储（下次使用时重新选择存储，主要用于测试）
+    """
+    global _store
+    with _store_lock:
+        _store = None
+
+
+def get_cached_floor_map(floor_id, etag):
+    """
+    读取楼层详情ETag对应的楼层平面图缓存
+    """
+    if etag is None:
+        return None
+    payload = get_floor_map_store().get_payload(floor_id, etag)
+    return json.loads(payload) if payload is not None else None
+
+
+def set_cached_floor_map(floor_id, etag, data):
+    """
+    按楼层详情ETag写入楼层平面图缓存
+    """
+    if etag is None:
+        return
+    payload = json.dumps(data, ensure_ascii=False)
+    get_floor_map_store().set_payload(floor_id, etag, payload)
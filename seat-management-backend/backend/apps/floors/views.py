@@ -11,7 +11,7 @@ class FloorListCreateView(ListCreateAPIView):
     楼层列表和创建视图
     """
     permission_classes = [IsAuthenticated]
-    queryset = Floor.objects.all()
+    queryset = Floor.objects.select_related('venue')
     serializer_class = FloorSerializer
     
     def get_queryset(self):
@@ -46,7 +46,7 @@ class FloorRetrieveUpdateDestroyView(RetrieveUpdateDestroyAPIView):
     楼层详情、更新和删除视图
     """
     permission_classes = [IsAuthenticated]
-    queryset = Floor.objects.all()
+    queryset = Floor.objects.select_related('venue')
     serializer_class = FloorSerializer
     lookup_field = 'id'
     
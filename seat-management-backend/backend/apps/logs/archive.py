@@ -0,0 +1,486 @@
+import gzip
+import heapq
+import json
+import os
+import time
+from datetime import datetime, timedelta
+from itertools import islice
+from django.conf import settings
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
+from django.db.models import Count, Max, Min
+from .models import SeatLog
+
+
+# 归档时每批读取/删除的日志数
+ARCHIVE_BATCH_SIZE = 5000
+
+# 归档文件每个压缩块的日志数（每块为独立的gzip成员，索引记录各块的起始位置）
+ARCHIVE_CHECKPOINT_ROWS = 1000
+
+ARCHIVE_FILE_PREFIX = 'seat_logs_'
+DATA_SUFFIX = '.jsonl.gz'
+INDEX_SUFFIX = '.index.json'
+
+# 归档文件列表缓存：{归档目录: (目录修改时间, 归档文件列表)}
+_archive_cache = {}
+
+# 目录修改时间距今不足该值（纳秒）时不缓存，避免同一时钟刻度内的后续写入未改变修改时间
+ARCHIVE_CACHE_MIN_AGE_NS = 1_000_000_000
+
+
+def get_archive_fields():
+    """
+    归档文件中保存的日志字段
+    """
+    return [field.attname for field in SeatLog._meta.concrete_fields]
+
+
+def add_months(month_start, months):
+    """
+    返回本地时区下指定月份起点之后第 months 个月的起点
+    """
+    local = timezone.localtime(month_start)
+    month_index = local.year * 12 + local.month - 1 + months
+    return timezone.make_aware(datetime(month_index // 12, month_index % 12 + 1, 1))
+
+
+def get_month_start(value):
+    """
+    返回本地时区下指定时间所在月份的起点
+    """
+    local = timezone.localtime(value)
+    return timezone.make_aware(datetime(local.year, local.month, 1))
+
+
+def get_hot_window_start(months=None):
+    """
+    数据库保留日志的起始时间（最近 months 个自然月之前的月初）
+    """
+    months = settings.SEAT_LOG_HOT_MONTHS if months is None else months
+    return add_months(get_month_start(timezone.now()), -months)
+
+
+def archive_seat_logs(months=None, batch_size=None):
+    """
+    将热数据窗口之前的日志按月归档到压缩文件并从数据库删除
+
+    归档前先执行日志汇总，只归档已汇总的日志，保证按日统计不受影响。
+    每个文件按（操作时间, ID）倒序保存，文件名包含月份和ID范围，
+    重复执行同一批日志会覆盖同名文件。返回归档的日志数。
+    """
+    from .services import rollup_seat_logs, get_rollup_log_id
+
+    batch_size = batch_size or ARCHIVE_BATCH_SIZE
+    cutoff = get_hot_window_start(months)
+    rollup_seat_logs()
+    _archive_cache.clear()
+
+    pending = SeatLog.objects.filter(operation_time__lt=cutoff, id__lte=get_rollup_log_id())
+    first_time = pending.order_by('operation_time').values_list('operation_time', flat=True).first()
+    if first_time is None:
+        return 0
+
+    archived_count = 0
+    month_start = get_month_start(first_time)
+    while month_start < cutoff:
+        month_end = add_months(month_start, 1)
+        archived_count += archive_month(
+            pending.filter(operation_time__gte=month_start, operation_time__lt=month_end),
+            month_start,
+            batch_size
+        )
+        month_start = month_end
+    return archived_count
+
+
+def archive_month(queryset, month_start, batch_size):
+    """
+    归档单个月份的日志：写入数据文件和索引文件后删除数据库中的日志
+
+    数据文件每 ARCHIVE_CHECKPOINT_ROWS 条日志写为一个gzip成员，索引的 checkpoints 记录
+    各成员的文件偏移、首条日志的（操作时间, ID）和之前的日志数，读取时可直接定位。
+    """
+    stats = queryset.aggregate(min_id=Min('id'), max_id=Max('id'), count=Count('id'))
+    if not stats['count']:
+        return 0
+
+    archive_dir = settings.SEAT_LOG_ARCHIVE_DIR
+    os.makedirs(archive_dir, exist_ok=True)
+    name = f"{ARCHIVE_FILE_PREFIX}{timezone.localtime(month_start):%Y-%m}_{stats['min_id']}-{stats['max_id']}"
+    data_path = os.path.join(archive_dir, name + DATA_SUFFIX)
+    index_path = os.path.join(archive_dir, name + INDEX_SUFFIX)
+
+    index = {
+        'count': 0,
+        'start_time': None,
+        'end_time': None,
+        'seat_nos': set(),
+        'user_ids': set(),
+        'operator_ids': set(),
+        'operation_types': set(),
+        'checkpoints': [],
+    }
+    archived_ids = []
+    rows = queryset.filter(id__lte=stats['max_id']).order_by('-operation_time', '-id').values(
+        *get_archive_fields()
+    ).iterator(chunk_size=batch_size)
+
+    with open(data_path + '.tmp', 'wb') as raw:
+        block = None
+        for row in rows:
+            operation_time = row['operation_time'].isoformat()
+            row['operation_time'] = operation_time
+            if len(archived_ids) % ARCHIVE_CHECKPOINT_ROWS == 0:
+                if block is not None:
+                    block.close()
+                index['checkpoints'].append({
+                    'offset': raw.tell(),
+                    'time': operation_time,
+                    'id': row['id'],
+                    'row': len(archived_ids),
+                })
+                block = gzip.GzipFile(fileobj=raw, mode='wb')
+            block.write((json.dumps(row, ensure_ascii=False) + '\n').encode('utf-8'))
+
+            archived_ids.append(row['id'])
+            index['end_time'] = index['end_time'] or operation_time
+            index['start_time'] = operation_time
+            index['seat_nos'].add(row['seat_no'])
+            index['user_ids'].update((row['old_user_id'], row['new_user_id']))
+            index['operator_ids'].add(row['operator_id'])
+            index['operation_types'].add(row['operation_type'])
+        if block is not None:
+            block.close()
+    os.replace(data_path + '.tmp', data_path)
+
+    index['count'] = len(archived_ids)
+    for key in ('seat_nos', 'user_ids', 'operator_ids', 'operation_types'):
+        index[key] = sorted(value for value in index[key] if value is not None)
+    with open(index_path + '.tmp', 'w', encoding='utf-8') as f:
+        json.dump(index, f, ensure_ascii=False)
+    os.replace(index_path + '.tmp', index_path)
+    _archive_cache.clear()
+
+    # 文件写入完成后再删除数据库中已归档的日志
+    for i in range(0, len(archived_ids), batch_size):
+        SeatLog.objects.filter(id__in=archived_ids[i:i + batch_size]).delete()
+
+    return len(archived_ids)
+
+
+def list_archives():
+    """
+    列出全部归档文件及其索引
+
+    按归档目录的修改时间缓存（写入或删除归档文件时目录修改时间改变，本进程归档时直接清空），
+    目录未变化时不再读取目录和索引文件。
+    """
+    archive_dir = settings.SEAT_LOG_ARCHIVE_DIR
+    try:
+        mtime = os.stat(archive_dir).st_mtime_ns
+    except FileNotFoundError:
+        return []
+
+    cached = _archive_cache.get(archive_dir)
+    if cached is not None and cached[0] == mtime:
+        return cached[1]
+    archives = read_archive_indexes(archive_dir)
+    if time.time_ns() - mtime >= ARCHIVE_CACHE_MIN_AGE_NS:
+        _archive_cache[archive_dir] = (mtime, archives)
+    return archives
+
+
+def read_archive_indexes(archive_dir):
+    """
+    读取归档目录中全部归档文件的索引（ID范围取自文件名）
+
+    早期归档文件的索引没有 checkpoints，读取时从文件开头开始。
+    """
+    archives = []
+    for filename in sorted(os.listdir(archive_dir)):
+        if not (filename.startswith(ARCHIVE_FILE_PREFIX) and filename.endswith(INDEX_SUFFIX)):
+            continue
+        data_path = os.path.join(archive_dir, filename[:-len(INDEX_SUFFIX)] + DATA_SUFFIX)
+        if not os.path.exists(data_path):
+            continue
+        with open(os.path.join(archive_dir, filename), encoding='utf-8') as f:
+            index = json.load(f)
+        index['start_time'] = parse_datetime(index['start_time'])
+        index['end_time'] = parse_datetime(index['end_time'])
+        index['checkpoints'] = [
+            dict(checkpoint, time=parse_datetime(checkpoint['time']))
+            for checkpoint in index.get('checkpoints', [])
+        ]
+        index['min_id'], index['max_id'] = map(int, filename[:-len(INDEX_SUFFIX)].rsplit('_', 1)[1].split('-'))
+        archives.append((data_path, index))
+    return archives
+
+
+def has_archives():
+    """
+    是否存在归档文件
+    """
+    return bool(list_archives())
+
+
+def archive_may_match(index, query_params):
+    """
+    根据索引判断归档文件中是否可能存在符合条件的日志
+    """
+    start_time = query_params.get('start_time')
+    end_time = query_params.get('end_time')
+    if start_time and index['end_time'] < start_time:
+        return False
+    if end_time and index['start_time'] > end_time:
+        return False
+    if query_params.get('seat_no') and query_params['seat_no'] not in index['seat_nos']:
+        return False
+    if query_params.get('user_id') and query_params['user_id'] not in index['user_ids']:
+        return False
+    if query_params.get('operator_id') and query_params['operator_id'] not in index['operator_ids']:
+        return False
+    if query_params.get('operation_type') and query_params['operation_type'] not in index['operation_types']:
+        return False
+    return True
+
+
+def log_matches(log, query_params):
+    """
+    判断归档日志是否符合查询条件（与 build_seat_log_filters 一致）
+    """
+    if query_params.get('seat_no') and log.seat_no != query_params['seat_no']:
+        return False
+    if query_params.get('operation_type') and log.operation_type != query_params['operation_type']:
+        return False
+    if query_params.get('start_time') and log.operation_time < query_params['start_time']:
+        return False
+    if query_params.get('end_time') and log.operation_time > query_params['end_time']:
+        return False
+    if query_params.get('operator_id') and log.operator_id != query_params['operator_id']:
+        return False
+    user_id = query_params.get('user_id')
+    if user_id and user_id not in (log.old_user_id, log.new_user_id):
+        return False
+    return True
+
+
+def open_archive(data_path, offset=0):
+    """
+    从指定偏移（某个gzip成员的起点）开始以文本方式读取归档数据文件
+    """
+    raw = open(data_path, 'rb')
+    raw.seek(offset)
+    return gzip.open(raw, 'rt', encoding='utf-8')
+
+
+def parse_archived_log(line):
+    """
+    将归档文件中的一行解析为日志对象
+    """
+    data = json.loads(line)
+    data['operation_time'] = parse_datetime(data['operation_time'])
+    return SeatLog(**data)
+
+
+def find_checkpoint(checkpoints, newer_than):
+    """
+    返回最后一个之前的日志全部满足 newer_than 的检查点（无则为None）
+
+    文件按（操作时间, ID）倒序保存，某个块之前的日志都不小于该块首条日志，
+    newer_than 对首条日志成立时可跳过此前的全部块。
+    """
+    found = None
+    for checkpoint in checkpoints:
+        if not newer_than(checkpoint):
+            break
+        found = checkpoint
+    return found
+
+
+def read_archive(data_path, query_params, before=None, skip_ids=(), checkpoints=()):
+    """
+    按（操作时间, ID）倒序读取单个归档文件中符合条件的日志，跳过 skip_ids 中的日志
+
+    有检查点时跳过整块晚于 before 或结束时间的日志，读到早于开始时间的日志即停止。
+    """
+    start_time = query_params.get('start_time')
+    end_time = query_params.get('end_time')
+    checkpoint = find_checkpoint(checkpoints, lambda checkpoint: (
+        (before is not None and (checkpoint['time'], checkpoint['id']) >= before)
+        or (end_time is not None and checkpoint['time'] > end_time)
+    ))
+    with open_archive(data_path, checkpoint['offset'] if checkpoint else 0) as f:
+        for line in f:
+            log = parse_archived_log(line)
+            if start_time and log.operation_time < start_time:
+                break
+            if before and (log.operation_time, log.id) >= before:
+                continue
+            if log.id not in skip_ids and log_matches(log, query_params):
+                yield log
+
+
+def count_archived_after(data_path, index, value):
+    """
+    统计归档文件中操作时间晚于 value 的日志数，有检查点时只读取边界所在的块
+    """
+    checkpoint = find_checkpoint(index['checkpoints'], lambda checkpoint: checkpoint['time'] > value)
+    count = checkpoint['row'] if checkpoint else 0
+    with open_archive(data_path, checkpoint['offset'] if checkpoint else 0) as f:
+        for line in f:
+            if parse_datetime(json.loads(line)['operation_time']) <= value:
+                break
+            count += 1
+    return count
+
+
+def get_unarchived_ids(archives):
+    """
+    归档文件中仍在数据库里的日志（归档写入文件后删除前中断等情况），这些日志以数据库为准
+
+    一次查询覆盖全部归档文件的ID和时间范围，返回 {日志ID: 操作时间}。
+    """
+    if not archives:
+        return {}
+    indexes = [index for _, index in archives]
+    return dict(SeatLog.objects.filter(
+        id__gte=min(index['min_id'] for index in indexes),
+        id__lte=max(index['max_id'] for index in indexes),
+        operation_time__gte=min(index['start_time'] for index in indexes),
+        operation_time__lte=max(index['end_time'] for index in indexes)
+    ).values_list('id', 'operation_time'))
+
+
+def merge_logs(*logs):
+    """
+    合并多个按（操作时间, ID）倒序的日志序列，结果仍按该顺序
+    """
+    return heapq.merge(*logs, key=lambda log: (log.operation_time, log.id), reverse=True)
+
+
+class DescendingKey:
+    """
+    倒序比较的排序键，用于在最小堆中取最大的（操作时间, ID）
+    """
+
+    __slots__ = ('value',)
+
+    def __init__(self, value):
+        self.value = value
+
+    def __lt__(self, other):
+        return self.value > other.value
+
+    def __eq__(self, other):
+        return self.value == other.value
+
+
+def merge_archives(archives, open_reader):
+    """
+    按（操作时间, ID）倒序合并多个归档文件中的日志
+
+    文件按最新日志排序，只有合并结果推进到某个文件的最新日志时才打开该文件，
+    只取前几页时不会读取更早的归档文件。
+    """
+    pending = sorted(
+        archives, key=lambda archive: (archive[1]['end_time'], archive[1]['max_id']), reverse=True
+    )
+    heap = []
+    opened = 0
+    while True:
+        while opened < len(pending):
+            data_path, index = pending[opened]
+            if heap and heap[0][0].value > (index['end_time'], index['max_id']):
+                break
+            reader = open_reader(data_path, index)
+            log = next(reader, None)
+            if log is not None:
+                heapq.heappush(heap, (DescendingKey((log.operation_time, log.id)), opened, log, reader))
+            opened += 1
+        if not heap:
+            return
+        _, order, log, reader = heap[0]
+        yield log
+        log = next(reader, None)
+        if log is None:
+            heapq.heappop(heap)
+        else:
+            heapq.heapreplace(heap, (DescendingKey((log.operation_time, log.id)), order, log, reader))
+
+
+def get_matching_archives(query_params, before=None):
+    """
+    根据索引筛选可能存在符合条件日志的归档文件
+
+    before 为游标（操作时间, ID）时跳过全部日志都不早于游标的文件。
+    """
+    return [
+        (data_path, index)
+        for data_path, index in list_archives()
+        if archive_may_match(index, query_params)
+        and (before is None or (index['start_time'], index['min_id']) < before)
+    ]
+
+
+def iter_archived_logs(query_params, before=None):
+    """
+    按（操作时间, ID）倒序遍历归档中符合条件的日志
+
+    先用索引跳过不可能匹配的文件，再按需打开并合并读取剩余文件，跳过仍在数据库中的日志；
+    before 为（操作时间, ID），只返回位于其之后的日志（游标分页）。
+    仍在数据库中的日志在首次读取时一次查询得到。
+    """
+    archives = get_matching_archives(query_params, before)
+    if not archives:
+        return
+    skip_ids = get_unarchived_ids(archives)
+    yield from merge_archives(archives, lambda data_path, index: read_archive(
+        data_path, query_params, before, skip_ids, index['checkpoints']
+    ))
+
+
+def has_field_filters(query_params):
+    """
+    查询条件中是否包含时间以外的过滤条件
+    """
+    return any(
+        query_params.get(key) for key in ('seat_no', 'user_id', 'operator_id', 'operation_type')
+    )
+
+
+def count_archived_logs(query_params, limit=None):
+    """
+    统计归档中符合条件的日志数，limit 为统计上限
+
+    只按时间过滤时由索引中的日志数和检查点计算，只读取起止时间所在的块；
+    有其他过滤条件时逐条读取。
+    """
+    if has_field_filters(query_params):
+        logs = iter_archived_logs(query_params)
+        if limit is not None:
+            logs = islice(logs, limit)
+        return sum(1 for _ in logs)
+
+    start_time = query_params.get('start_time')
+    end_time = query_params.get('end_time')
+    archives = get_matching_archives(query_params)
+    unarchived = get_unarchived_ids(archives)
+    count = 0
+    for data_path, index in archives:
+        count += index['count']
+        if end_time and index['end_time'] > end_time:
+            count -= count_archived_after(data_path, index, end_time)
+        if start_time and index['start_time'] < start_time:
+            count -= index['count'] - count_archived_after(
+                data_path, index, start_time - timedelta(microseconds=1)
+            )
+        # 仍在数据库中的日志由数据库统计
+        count -= sum(
+            1 for log_id, operation_time in unarchived.items()
+            if index['min_id'] <= log_id <= index['max_id']
+            and index['start_time'] <= operation_time <= index['end_time']
+            and not (start_time and operation_time < start_time)
+            and not (end_time and operation_time > end_time)
+        )
+    return count
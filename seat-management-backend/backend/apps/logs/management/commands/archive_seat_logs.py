@@ -0,0 +1,21 @@
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from backend.apps.logs.archive import archive_seat_logs
+
+
+class Command(BaseCommand):
+    """
+    归档历史工位变更日志
+    """
+    help = '将最近 N 个自然月之前的工位变更日志按月归档到压缩文件并从数据库删除'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--months', type=int, default=None,
+            help=f'数据库保留的自然月数（默认 SEAT_LOG_HOT_MONTHS={settings.SEAT_LOG_HOT_MONTHS}）'
+        )
+        parser.add_argument('--batch-size', type=int, default=None, help='每批读取/删除的日志数')
+
+    def handle(self, *args, **options):
+        archived_count = archive_seat_logs(months=options['months'], batch_size=options['batch_size'])
+        self.stdout.write(self.style.SUCCESS(f'共归档 {archived_count} 条日志'))
@@ -0,0 +1,16 @@
+from django.core.management.base import BaseCommand
+from backend.apps.logs.writer import replay_seat_log_spool
+
+
+class Command(BaseCommand):
+    """
+    回放本地转存的工位变更日志
+    """
+    help = '将本地文件中转存的工位变更日志写入数据库'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=None, help='每批写入的日志数')
+
+    def handle(self, *args, **options):
+        replayed_count = replay_seat_log_spool(batch_size=options['batch_size'])
+        self.stdout.write(self.style.SUCCESS(f'共回放 {replayed_count} 条日志'))
@@ -0,0 +1,16 @@
+from django.core.management.base import BaseCommand
+from backend.apps.logs.services import rollup_seat_logs
+
+
+class Command(BaseCommand):
+    """
+    汇总工位变更日志
+    """
+    help = '将上次汇总之后的工位变更日志累加到按日汇总表（建议每天零点后定时执行）'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=None, help='每批汇总的日志数')
+
+    def handle(self, *args, **options):
+        rolled_count = rollup_seat_logs(batch_size=options['batch_size'])
+        self.stdout.write(self.style.SUCCESS(f'共汇总 {rolled_count} 条日志'))
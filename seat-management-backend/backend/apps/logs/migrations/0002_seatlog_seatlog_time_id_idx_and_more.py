@@ -0,0 +1,37 @@
+# Generated by Django 5.0 on 2026-10-18 16:53
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('logs', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='seatlog',
+            index=models.Index(fields=['operation_time', 'id'], name='seatlog_time_id_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='seatlog',
+            index=models.Index(fields=['seat_no', 'operation_time'], name='seatlog_seat_time_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='seatlog',
+            index=models.Index(fields=['operation_type', 'operation_time'], name='seatlog_type_time_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='seatlog',
+            index=models.Index(fields=['operator_id', 'operation_time'], name='seatlog_operator_time_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='seatlog',
+            index=models.Index(fields=['old_user_id', 'operation_time'], name='seatlog_old_user_time_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='seatlog',
+            index=models.Index(fields=['new_user_id', 'operation_time'], name='seatlog_new_user_time_idx'),
+        ),
+    ]
@@ -0,0 +1,40 @@
+# Generated by Django 5.0 on 2026-10-18 16:55
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('logs', '0002_seatlog_seatlog_time_id_idx_and_more'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='SeatLogRollupState',
+            fields=[
+                ('id', models.AutoField(primary_key=True, serialize=False, verbose_name='ID')),
+                ('last_log_id', models.IntegerField(default=0, verbose_name='已汇总的最大日志ID')),
+                ('updated_at', models.DateTimeField(auto_now=True, verbose_name='更新时间')),
+            ],
+            options={
+                'verbose_name': '日志汇总进度',
+                'verbose_name_plural': '日志汇总进度',
+            },
+        ),
+        migrations.CreateModel(
+            name='SeatLogDailyRollup',
+            fields=[
+                ('id', models.AutoField(primary_key=True, serialize=False, verbose_name='汇总ID')),
+                ('date', models.DateField(verbose_name='日期')),
+                ('operation_type', models.SmallIntegerField(choices=[(1, '创建工位'), (2, '绑定人员'), (3, '解绑人员'), (4, '更换工位'), (5, '额外绑定'), (6, '批量生成工位'), (7, '修改工位信息'), (8, '删除工位'), (9, 'OA系统同步')], verbose_name='操作类型')),
+                ('operator_id', models.CharField(blank=True, default='', help_text='无操作人时为空字符串', max_length=50, verbose_name='操作人ID')),
+                ('count', models.IntegerField(default=0, verbose_name='日志数量')),
+            ],
+            options={
+                'verbose_name': '工位变更日志日汇总',
+                'verbose_name_plural': '工位变更日志日汇总',
+                'unique_together': {('date', 'operation_type', 'operator_id')},
+            },
+        ),
+    ]
@@ -0,0 +1,19 @@
+# Generated by Django 5.0 on 2026-10-18 16:57
+
+import django.utils.timezone
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('logs', '0003_seatlogrollupstate_seatlogdailyrollup'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='seatlog',
+            name='operation_time',
+            field=models.DateTimeField(default=django.utils.timezone.now, verbose_name='操作时间'),
+        ),
+    ]
@@ -0,0 +1,17 @@
+# Generated by Django 5.0 on 2026-10-18 17:00
+
+from django.db import migrations
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('logs', '0004_alter_seatlog_operation_time'),
+    ]
+
+    operations = [
+        migrations.AlterModelOptions(
+            name='seatlog',
+            options={'verbose_name': '工位变更日志', 'verbose_name_plural': '工位变更日志'},
+        ),
+    ]
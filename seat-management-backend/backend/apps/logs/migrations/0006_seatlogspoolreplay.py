@@ -0,0 +1,26 @@
+# Generated by Django 5.0 on 2026-10-18 18:12
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('logs', '0005_alter_seatlog_options'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='SeatLogSpoolReplay',
+            fields=[
+                ('id', models.AutoField(primary_key=True, serialize=False, verbose_name='ID')),
+                ('file_name', models.CharField(max_length=255, unique=True, verbose_name='回放文件名')),
+                ('log_count', models.IntegerField(default=0, verbose_name='日志数量')),
+                ('replayed_at', models.DateTimeField(auto_now_add=True, verbose_name='回放时间')),
+            ],
+            options={
+                'verbose_name': '日志转存回放记录',
+                'verbose_name_plural': '日志转存回放记录',
+            },
+        ),
+    ]
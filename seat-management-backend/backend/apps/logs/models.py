@@ -1,4 +1,5 @@
 from django.db import models
+from django.utils import timezone
 
 
 class SeatLog(models.Model):
@@ -74,7 +75,7 @@ class SeatLog(models.Model):
         verbose_name="操作人姓名"
     )
     operation_time = models.DateTimeField(
-        auto_now_add=True,
+        default=timezone.now,
         verbose_name="操作时间"
     )
     operation_ip = models.CharField(
@@ -98,7 +99,106 @@ class SeatLog(models.Model):
     class Meta:
         verbose_name = "工位变更日志"
         verbose_name_plural = "工位变更日志"
-        ordering = ['-operation_time']
+        indexes = [
+            # 日志列表默认排序及游标分页
+            models.Index(fields=['operation_time', 'id'], name='seatlog_time_id_idx'),
+            # 日志列表过滤条件，均按操作时间排序
+            models.Index(fields=['seat_no', 'operation_time'], name='seatlog_seat_time_idx'),
+            models.Index(fields=['operation_type', 'operation_time'], name='seatlog_type_time_idx'),
+            models.Index(fields=['operator_id', 'operation_time'], name='seatlog_operator_time_idx'),
+            models.Index(fields=['old_user_id', 'operation_time'], name='seatlog_old_user_time_idx'),
+            models.Index(fields=['new_user_id', 'operation_time'], name='seatlog_new_user_time_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.get_operation_type_display()} - {self.seat_no} - {self.operation_time}"
+
+class SeatLogDailyRollup(models.Model):
+    """
+    工位变更日志按日汇总
+    """
+    id = models.AutoField(
+        primary_key=True,
+        verbose_name="汇总ID"
+    )
+    date = models.DateField(
+        verbose_name="日期"
+    )
+    operation_type = models.SmallIntegerField(
+        choices=SeatLog.OPERATION_TYPE_CHOICES,
+        verbose_name="操作类型"
+    )
+    operator_id = models.CharField(
+        max_length=50,
+        blank=True,
+        default='',
+        verbose_name="操作人ID",
+        help_text="无操作人时为空字符串"
+    )
+    count = models.IntegerField(
+        default=0,
+        verbose_name="日志数量"
+    )
+
+    class Meta:
+        verbose_name = "工位变更日志日汇总"
+        verbose_name_plural = "工位变更日志日汇总"
+        unique_together = ('date', 'operation_type', 'operator_id')
+
+    def __str__(self):
+        return f"{self.date} - {self.get_operation_type_display()} - {self.count}"
+
+
+class SeatLogRollupState(models.Model):
+    """
+    日志汇总进度（单行）
+    """
+    id = models.AutoField(
+        primary_key=True,
+        verbose_name="ID"
+    )
+    last_log_id = models.IntegerField(
+        default=0,
+        verbose_name="已汇总的最大日志ID"
+    )
+    updated_at = models.DateTimeField(
+        auto_now=True,
+        verbose_name="更新时间"
+    )
+
+    class Meta:
+        verbose_name = "日志汇总进度"
+        verbose_name_plural = "日志汇总进度"
+
+    def __str__(self):
+        return f"已汇总至日志 {self.last_log_id}"
+
+
+class SeatLogSpoolReplay(models.Model):
+    """
+    已回放的日志转存文件（与日志在同一事务中写入，防止重复回放）
+    """
+    id = models.AutoField(
+        primary_key=True,
+        verbose_name="ID"
+    )
+    file_name = models.CharField(
+        max_length=255,
+        unique=True,
+        verbose_name="回放文件名"
+    )
+    log_count = models.IntegerField(
+        default=0,
+        verbose_name="日志数量"
+    )
+    replayed_at = models.DateTimeField(
+        auto_now_add=True,
+        verbose_name="回放时间"
+    )
+
+    class Meta:
+        verbose_name = "日志转存回放记录"
+        verbose_name_plural = "日志转存回放记录"
 
     def __str__(self):
-        return f"{self.get_operation_type_display()} - {self.seat_no} - {self.operation_time}"
\ No newline at end of file
+        return f"{self.file_name} - {self.log_count}"
@@ -57,6 +57,17 @@ class SeatLogQuerySerializer(serializers.Serializer):
         min_value=1,
         label="页码"
     )
+    cursor = serializers.CharField(
+        required=False,
+        allow_blank=True,
+        label="分页游标",
+        help_text="传入时使用游标分页，首页传空字符串，后续传上一页返回的next_cursor"
+    )
+    exact_total = serializers.BooleanField(
+        default=False,
+        label="是否精确统计总数",
+        help_text="默认总数最多统计10000条"
+    )
     page_size = serializers.IntegerField(
         default=10,
         min_value=1,
@@ -1,5 +1,31 @@
-from django.db.models import Q
-from .models import SeatLog
+import base64
+import json
+from datetime import datetime, time, timedelta
+from itertools import islice
+from django.db import transaction
+from django.db.models import Count, Q, Sum
+from django.db.models.functions import TruncDate
+from django.utils import timezone
+from django.utils.dateparse import parse_date, parse_datetime
+from backend.exports import EXPORT_CHUNK_SIZE, format_export_time
+from .models import SeatLog, SeatLogDailyRollup, SeatLogRollupState
+from .writer import write_seat_log
+from .archive import (
+    get_hot_window_start, has_archives, iter_archived_logs, count_archived_logs, merge_logs
+)
+
+
+# 日志总数统计上限（超出时不再精确统计）
+LOG_COUNT_LIMIT = 10000
+
+# 日志汇总每批处理的日志数
+ROLLUP_BATCH_SIZE = 5000
+
+# 日志汇总的安全延迟，避免汇总尚未提交的日志
+ROLLUP_SAFETY_LAG = timedelta(minutes=10)
+
+# 每次汇总后按原始日志重新计算的最近时间范围（补上晚提交的日志）
+ROLLUP_RESCAN_WINDOW = timedelta(days=2)
 
 
 def create_seat_log(
@@ -17,9 +43,9 @@ def create_seat_log(
     extra_info=None
 ):
     """
-    创建工位变更日志
+    创建工位变更日志（事务提交后批量写入，见 writer.write_seat_log）
     """
-    log = SeatLog.objects.create(
+    log = write_seat_log(
         seat_id=seat_id,
         seat_no=seat_no,
         operation_type=operation_type,
@@ -36,11 +62,10 @@ def create_seat_log(
     return log
 
 
-def get_seat_logs(query_params):
+def build_seat_log_filters(query_params):
     """
-    查询工位变更日志
+    根据查询参数构建日志过滤条件
     """
-    # 构建查询条件
     filters = Q()
     
     # 工位编号
@@ -67,51 +92,338 @@ def get_seat_logs(query_params):
         user_id = query_params.get('user_id')
         filters &= (Q(old_user_id=user_id) | Q(new_user_id=user_id))
     
-    # 分页参数
-    page = query_params.get('page', 1)
+    return filters
+
+
+def encode_log_cursor(log):
+    """
+    根据日志的（操作时间, ID）生成游标
+    """
+    value = f'{log.operation_time.isoformat()}|{log.id}'
+    return base64.urlsafe_b64encode(value.encode('utf-8')).decode('ascii')
+
+
+def decode_log_cursor(cursor):
+    """
+    解析游标为（操作时间, ID）
+    """
+    try:
+        value = base64.urlsafe_b64decode(cursor.encode('ascii')).decode('utf-8')
+        operation_time, log_id = value.rsplit('|', 1)
+        return datetime.fromisoformat(operation_time), int(log_id)
+    except (ValueError, UnicodeError):
+        raise ValueError('无效的分页游标')
+
+
+def should_read_archives(query_params):
+    """
+    查询是否需要读取归档：开始时间早于数据库保留窗口且存在归档文件
+
+    未指定开始时间时只查询数据库（默认列表不读取归档），需要查询归档日志时显式指定开始时间。
+    """
+    start_time = query_params.get('start_time')
+    return bool(start_time) and start_time < get_hot_window_start() and has_archives()
+
+
+def count_seat_logs(filters, exact=False):
+    """
+    统计日志数量
+
+    默认最多统计 LOG_COUNT_LIMIT 条，超出时返回上限值并标记为已截断；
+    exact 为 True 时返回精确数量。返回（数量, 是否截断）。
+    """
+    queryset = SeatLog.objects.filter(filters).order_by()
+    if exact:
+        return queryset.count(), False
+    
+    count = queryset[:LOG_COUNT_LIMIT + 1].count()
+    return min(count, LOG_COUNT_LIMIT), count > LOG_COUNT_LIMIT
+
+
+def format_seat_log(log):
+    """
+    格式化日志
+    """
+    return {
+        "id": log.id,
+        "seat_id": log.seat_id,
+        "seat_no": log.seat_no,
+        "operation_type": log.operation_type,
+        "operation_type_display": log.get_operation_type_display(),
+        "old_user_id": log.old_user_id,
+        "old_user_name": log.old_user_name,
+        "new_user_id": log.new_user_id,
+        "new_user_name": log.new_user_name,
+        "operator_id": log.operator_id,
+        "operator_name": log.operator_name,
+        "operation_time": log.operation_time,
+        "operation_ip": log.operation_ip,
+        "operation_remark": log.operation_remark,
+        "extra_info": log.extra_info
+    }
+
+
+def get_seat_logs(query_params):
+    """
+    查询工位变更日志
+
+    传入 cursor 参数（首页传空字符串）时使用游标分页，按（操作时间, ID）定位，
+    查询耗时与翻页深度无关；否则使用页码分页。
+    总数默认最多统计 LOG_COUNT_LIMIT 条，exact_total 为 True 时返回精确总数。
+    开始时间早于数据库保留窗口时，数据库和归档中的日志按（操作时间, ID）合并返回
+    （未汇总而未归档的旧日志可能与归档日志时间交错），见 should_read_archives。
+    """
+    # 构建查询条件
+    filters = build_seat_log_filters(query_params)
     page_size = query_params.get('page_size', 10)
-    offset = (page - 1) * page_size
+    exact_total = query_params.get('exact_total', False)
+    use_archive = should_read_archives(query_params)
     
     # 执行查询
-    total = SeatLog.objects.filter(filters).count()
-    logs = SeatLog.objects.filter(filters).order_by('-operation_time')[offset:offset+page_size]
+    total, total_capped = count_seat_logs(filters, exact_total)
+    if use_archive and not total_capped:
+        archived_total = count_archived_logs(
+            query_params, None if exact_total else LOG_COUNT_LIMIT - total + 1
+        )
+        total_capped = total + archived_total > LOG_COUNT_LIMIT and not exact_total
+        total = total + archived_total if not total_capped else LOG_COUNT_LIMIT
+    queryset = SeatLog.objects.filter(filters).order_by('-operation_time', '-id')
     
-    # 构建结果
-    result = {
+    if 'cursor' in query_params:
+        # 游标分页
+        cursor = query_params.get('cursor')
+        before = None
+        if cursor:
+            operation_time, log_id = decode_log_cursor(cursor)
+            before = (operation_time, log_id)
+            queryset = queryset.filter(
+                Q(operation_time__lt=operation_time) |
+                Q(operation_time=operation_time, id__lt=log_id)
+            )
+        logs = list(queryset[:page_size + 1])
+        if use_archive:
+            logs = list(islice(merge_logs(logs, iter_archived_logs(query_params, before)), page_size + 1))
+        has_more = len(logs) > page_size
+        logs = logs[:page_size]
+        
+        return {
+            "total": total,
+            "total_capped": total_capped,
+            "page_size": page_size,
+            "next_cursor": encode_log_cursor(logs[-1]) if has_more else None,
+            "logs": [format_seat_log(log) for log in logs]
+        }
+    
+    # 页码分页
+    page = query_params.get('page', 1)
+    offset = (page - 1) * page_size
+    if use_archive:
+        # 合并后的前 offset + page_size 条中，数据库日志只可能来自数据库的前 offset + page_size 条
+        hot_logs = queryset[:offset + page_size].iterator(chunk_size=EXPORT_CHUNK_SIZE)
+        logs = list(islice(merge_logs(hot_logs, iter_archived_logs(query_params)), offset, offset + page_size))
+    else:
+        logs = list(queryset[offset:offset + page_size])
+    
+    return {
         "total": total,
+        "total_capped": total_capped,
         "page": page,
         "page_size": page_size,
-        "logs": []
+        "logs": [format_seat_log(log) for log in logs]
     }
+
+
+# 日志导出列
+SEAT_LOG_EXPORT_HEADER = [
+    '日志ID', '工位ID', '工位编号', '操作类型', '原人员ID', '原人员姓名',
+    '新人员ID', '新人员姓名', '操作人ID', '操作人姓名', '操作时间', '操作IP',
+    '操作备注', '额外信息'
+]
+
+
+def iter_seat_log_export_rows(query_params):
+    """
+    按查询条件逐行生成日志导出数据
+
+    与 get_seat_logs 使用相同的过滤条件和排序，数据库中的日志分块读取，
+    开始时间早于数据库保留窗口时与归档日志合并输出。
+    """
+    filters = build_seat_log_filters(query_params)
+    logs = SeatLog.objects.filter(filters).order_by('-operation_time', '-id').iterator(
+        chunk_size=EXPORT_CHUNK_SIZE
+    )
+    if should_read_archives(query_params):
+        logs = merge_logs(logs, iter_archived_logs(query_params))
     
-    # 格式化日志
     for log in logs:
-        log_info = {
-            "id": log.id,
-            "seat_id": log.seat_id,
-            "seat_no": log.seat_no,
-            "operation_type": log.operation_type,
-            "operation_type_display": log.get_operation_type_display(),
-            "old_user_id": log.old_user_id,
-            "old_user_name": log.old_user_name,
-            "new_user_id": log.new_user_id,
-            "new_user_name": log.new_user_name,
-            "operator_id": log.operator_id,
-            "operator_name": log.operator_name,
-            "operation_time": log.operation_time,
-            "operation_ip": log.operation_ip,
-            "operation_remark": log.operation_remark,
-            "extra_info": log.extra_info
-        }
-        result["logs"].append(log_info)
+        yield [
+            log.id,
+            log.seat_id,
+            log.seat_no,
+            log.get_operation_type_display(),
+            log.old_user_id,
+            log.old_user_name,
+            log.new_user_id,
+            log.new_user_name,
+            log.operator_id,
+            log.operator_name,
+            format_export_time(log.operation_time),
+            log.operation_ip,
+            log.operation_remark,
+            json.dumps(log.extra_info, ensure_ascii=False) if log.extra_info is not None else ''
+        ]
+
+
+def parse_statistics_time(value):
+    """
+    解析统计时间参数，支持日期时间和日期格式，返回带时区的时间
+    """
+    if not value:
+        return None
+    if isinstance(value, datetime):
+        parsed = value
+    else:
+        parsed = parse_datetime(value)
+        if parsed is None:
+            parsed_date = parse_date(value)
+            if parsed_date is None:
+                raise ValueError(f'无效的时间格式: {value}')
+            parsed = datetime.combine(parsed_date, time.min)
+    if timezone.is_naive(parsed):
+        parsed = timezone.make_aware(parsed)
+    return parsed
+
+
+def local_midnight(value):
+    """
+    返回本地时区下指定时间当天的零点
+    """
+    local_date = timezone.localtime(value).date()
+    return timezone.make_aware(datetime.combine(local_date, time.min))
+
+
+def get_rollup_log_id():
+    """
+    获取已汇总的最大日志ID
+    """
+    return SeatLogRollupState.objects.values_list('last_log_id', flat=True).first() or 0
+
+
+def rollup_seat_logs(until=None, batch_size=None):
+    """
+    将新增日志累加到按日汇总表
+
+    从上次汇总的日志ID继续，只汇总操作时间早于 until 的日志（默认今天零点，
+    且不晚于当前时间减去安全延迟），当天的日志由统计时从原始表补充。
+    每批在单独事务中更新汇总和进度，中断后可从上次进度继续，
+    最后重新计算截止时间前最近几天的汇总（见 rescan_rollup_window）。
+    返回本次汇总的日志数。
+    """
+    batch_size = batch_size or ROLLUP_BATCH_SIZE
+    now = timezone.now()
+    if until is None:
+        until = min(local_midnight(now), now - ROLLUP_SAFETY_LAG)
+    
+    SeatLogRollupState.objects.get_or_create(id=1)
+    last_log_id = get_rollup_log_id()
     
-    return result
+    # 日志ID与操作时间同序递增，第一条不早于截止时间的日志之前的日志均可汇总
+    boundary_id = SeatLog.objects.filter(
+        id__gt=last_log_id, operation_time__gte=until
+    ).order_by('id').values_list('id', flat=True).first()
+    
+    rolled_count = 0
+    while True:
+        with transaction.atomic():
+            state = SeatLogRollupState.objects.select_for_update().get(id=1)
+            pending = SeatLog.objects.filter(id__gt=state.last_log_id)
+            if boundary_id is not None:
+                pending = pending.filter(id__lt=boundary_id)
+            chunk_ids = list(pending.order_by('id').values_list('id', flat=True)[:batch_size])
+            if not chunk_ids:
+                break
+            
+            stats = SeatLog.objects.filter(
+                id__gt=state.last_log_id, id__lte=chunk_ids[-1]
+            ).annotate(
+                date=TruncDate('operation_time')
+            ).values('date', 'operation_type', 'operator_id').annotate(count=Count('id')).order_by()
+            merge_rollup_counts(stats)
+            
+            state.last_log_id = chunk_ids[-1]
+            state.save(update_fields=['last_log_id', 'updated_at'])
+            rolled_count += len(chunk_ids)
+    
+    rescan_rollup_window(until)
+    return rolled_count
+
+
+def rescan_rollup_window(until):
+    """
+    按原始日志重新计算截止时间前最近几天的汇总
+
+    日志ID在插入时分配、事务提交后才可见。较小ID的日志晚于较大ID提交时，汇总进度已越过它，
+    这条日志既不在汇总表中，统计时也不会从原始表补充。这里重新统计最近 ROLLUP_RESCAN_WINDOW 内
+    各日期ID不超过进度的日志数并覆盖汇总，补上这类日志；提交比操作时间晚于该窗口的日志仍会遗漏。
+    早于数据库保留窗口的日期可能已归档，不重新计算。
+    """
+    start = max(local_midnight(until - ROLLUP_RESCAN_WINDOW), get_hot_window_start())
+    with transaction.atomic():
+        state = SeatLogRollupState.objects.select_for_update().get(id=1)
+        stats = SeatLog.objects.filter(
+            id__lte=state.last_log_id, operation_time__gte=start
+        ).annotate(
+            date=TruncDate('operation_time')
+        ).values('date', 'operation_type', 'operator_id').annotate(count=Count('id')).order_by()
+        SeatLogDailyRollup.objects.filter(date__gte=timezone.localtime(start).date()).delete()
+        merge_rollup_counts(stats)
+
+
+def merge_rollup_counts(stats):
+    """
+    将分组统计结果累加到汇总表
+    """
+    increments = {}
+    for stat in stats:
+        key = (stat['date'], stat['operation_type'], stat['operator_id'] or '')
+        increments[key] = increments.get(key, 0) + stat['count']
+    if not increments:
+        return
+    
+    dates = {key[0] for key in increments}
+    existing = {
+        (rollup.date, rollup.operation_type, rollup.operator_id): rollup
+        for rollup in SeatLogDailyRollup.objects.filter(date__in=dates)
+    }
+    to_update = []
+    to_create = []
+    for key, count in increments.items():
+        rollup = existing.get(key)
+        if rollup is not None:
+            rollup.count += count
+            to_update.append(rollup)
+        else:
+            to_create.append(SeatLogDailyRollup(
+                date=key[0], operation_type=key[1], operator_id=key[2], count=count
+            ))
+    
+    if to_update:
+        SeatLogDailyRollup.objects.bulk_update(to_update, ['count'])
+    if to_create:
+        SeatLogDailyRollup.objects.bulk_create(to_create)
 
 
 def get_seat_log_statistics(start_time=None, end_time=None):
     """
     获取工位变更统计
+
+    时间范围内的完整自然日从日汇总表读取，起止时间所在的不完整日期
+    以及尚未汇总的日志从原始日志表补充；不完整日期早于数据库保留窗口时，
+    其中已归档的日志从归档补充。
     """
+    start_time = parse_statistics_time(start_time)
+    end_time = parse_statistics_time(end_time)
+    
     # 构建查询条件
     filters = Q()
     
@@ -121,28 +433,69 @@ def get_seat_log_statistics(start_time=None, end_time=None):
     if end_time:
         filters &= Q(operation_time__lte=end_time)
     
-    # 按操作类型统计
-    statistics = SeatLog.objects.filter(filters).values('operation_type').annotate(count=Count('id'))
+    # 计算范围内的完整自然日 [first_day, last_day)
+    first_day = None
+    if start_time:
+        first_day = local_midnight(start_time)
+        if first_day < start_time:
+            first_day = local_midnight(first_day + timedelta(days=1))
+    last_day = local_midnight(end_time) if end_time else None
+    
+    counts = {}
+    raw_filters = filters
+    # 从原始日志统计的时间段（结束时间含边界），用于补充其中已归档的日志
+    partial_ranges = [(start_time, end_time)]
+    last_log_id = get_rollup_log_id()
+    if last_log_id and (first_day is None or last_day is None or first_day < last_day):
+        rollup_filters = Q()
+        outside_full_days = Q(id__gt=last_log_id)
+        if first_day:
+            rollup_filters &= Q(date__gte=timezone.localtime(first_day).date())
+            outside_full_days |= Q(operation_time__lt=first_day)
+        if last_day:
+            rollup_filters &= Q(date__lt=timezone.localtime(last_day).date())
+            outside_full_days |= Q(operation_time__gte=last_day)
+        partial_ranges = []
+        if first_day and start_time < first_day:
+            partial_ranges.append((start_time, first_day - timedelta(microseconds=1)))
+        if last_day and last_day <= end_time:
+            partial_ranges.append((last_day, end_time))
+        
+        rollups = SeatLogDailyRollup.objects.filter(rollup_filters).values(
+            'operation_type'
+        ).annotate(count=Sum('count')).order_by()
+        for stat in rollups:
+            counts[stat['operation_type']] = stat['count']
+        raw_filters &= outside_full_days
+    
+    # 按操作类型统计未汇总部分
+    statistics = SeatLog.objects.filter(raw_filters).values('operation_type').annotate(
+        count=Count('id')
+    ).order_by()
+    for stat in statistics:
+        counts[stat['operation_type']] = counts.get(stat['operation_type'], 0) + stat['count']
+    
+    # 补充不完整日期中已归档的日志（完整日期的归档日志已包含在日汇总中）
+    for range_start, range_end in partial_ranges:
+        query_params = {'start_time': range_start, 'end_time': range_end}
+        if should_read_archives(query_params):
+            for log in iter_archived_logs(query_params):
+                counts[log.operation_type] = counts.get(log.operation_type, 0) + 1
     
     # 构建结果
     result = {
-        "total_logs": SeatLog.objects.filter(filters).count(),
+        "total_logs": sum(counts.values()),
         "by_operation_type": []
     }
     
-    for stat in statistics:
-        operation_type = stat['operation_type']
+    for operation_type in sorted(counts):
         # 获取操作类型显示名称
         operation_display = dict(SeatLog.OPERATION_TYPE_CHOICES).get(operation_type, "未知")
         
         result["by_operation_type"].append({
             "operation_type": operation_type,
             "operation_display": operation_display,
-            "count": stat['count']
+            "count": counts[operation_type]
         })
     
-    return result
-
-
-# 导入Count
-from django.db.models import Count
\ No newline at end of file
+    return result
\ No newline at end of file
@@ -1,3 +1,690 @@
-from django.test import TestCase
+import os
+import shutil
+import tempfile
+import threading
+import unittest
+from io import StringIO
+from datetime import datetime, timedelta, timezone as dt_timezone
+from unittest import mock
+from django.db import connection
+from django.core.management import call_command
+from django.db import DatabaseError, transaction
+from django.db.models import Count, Q
+from django.test import TestCase, TransactionTestCase, override_settings
+from django.utils import timezone
+from django.urls import reverse
+from rest_framework.test import APIClient
+from rest_framework import status
+from backend.apps.logs import archive, services, writer
+from backend.apps.logs.models import SeatLog, SeatLogDailyRollup
+from backend.apps.logs.services import (
+    get_seat_logs, decode_log_cursor, build_seat_log_filters, rollup_seat_logs, get_seat_log_statistics,
+    parse_statistics_time, get_rollup_log_id, local_midnight
+)
+from backend.apps.logs.writer import write_seat_log, write_seat_logs, replay_seat_log_spool
+from backend.apps.seats.tests import QueryPlanMixin
+from backend.apps.authentication.models import User as AuthUser
 
-# Create your tests here.
+
+class SeatLogPaginationTest(TestCase):
+    """
+    日志分页测试
+    """
+
+    def setUp(self):
+        SeatLog.objects.bulk_create([
+            SeatLog(seat_id=i, seat_no=f'1-{i}', operation_type=2 if i % 2 else 3)
+            for i in range(25)
+        ])
+        # 部分日志使用相同的操作时间，验证游标在时间相同时按ID定位
+        base = datetime(2024, 1, 1, 9, 0, tzinfo=dt_timezone.utc)
+        for log in SeatLog.objects.all():
+            SeatLog.objects.filter(id=log.id).update(
+                operation_time=base + timedelta(minutes=log.id // 3)
+            )
+        self.expected_ids = list(
+            SeatLog.objects.order_by('-operation_time', '-id').values_list('id', flat=True)
+        )
+
+    def test_cursor_pages_cover_all_logs_in_order(self):
+        """
+        游标分页按顺序返回全部日志且不重复
+        """
+        ids = []
+        cursor = ''
+        while cursor is not None:
+            result = get_seat_logs({'cursor': cursor, 'page_size': 7})
+            ids.extend(log['id'] for log in result['logs'])
+            cursor = result['next_cursor']
+
+        self.assertEqual(ids, self.expected_ids)
+
+    def test_cursor_page_with_filters(self):
+        """
+        游标分页支持过滤条件
+        """
+        result = get_seat_logs({'cursor': '', 'page_size': 100, 'operation_type': 3})
+
+        self.assertEqual(len(result['logs']), 13)
+        self.assertIsNone(result['next_cursor'])
+        self.assertEqual(result['total'], 13)
+
+    def test_invalid_cursor(self):
+        """
+        无效游标报错
+        """
+        with self.assertRaises(ValueError):
+            decode_log_cursor('not-a-cursor')
+
+    def test_page_mode_uses_stable_order(self):
+        """
+        页码分页按（操作时间, ID）倒序
+        """
+        result = get_seat_logs({'page': 2, 'page_size': 10})
+
+        self.assertEqual([log['id'] for log in result['logs']], self.expected_ids[10:20])
+        self.assertEqual(result['total'], 25)
+        self.assertFalse(result['total_capped'])
+
+    def test_total_capped(self):
+        """
+        超出统计上限时返回上限值，精确统计时返回实际数量
+        """
+        with mock.patch.object(services, 'LOG_COUNT_LIMIT', 10):
+            capped = get_seat_logs({'page': 1, 'page_size': 10})
+            exact = get_seat_logs({'page': 1, 'page_size': 10, 'exact_total': True})
+
+        self.assertEqual(capped['total'], 10)
+        self.assertTrue(capped['total_capped'])
+        self.assertEqual(exact['total'], 25)
+        self.assertFalse(exact['total_capped'])
+
+
+class SeatLogListViewTest(TestCase):
+    """
+    日志列表接口测试
+    """
+
+    def setUp(self):
+        self.client = APIClient()
+        self.user = AuthUser.objects.create_user(username='admin', password='admin123', is_staff=True)
+        self.client.force_authenticate(user=self.user)
+        SeatLog.objects.bulk_create([
+            SeatLog(seat_id=i, seat_no=f'1-{i}', operation_type=2) for i in range(5)
+        ])
+
+    def test_cursor_request(self):
+        """
+        接口支持游标分页
+        """
+        url = reverse('seat_log_list')
+        response = self.client.get(url, {'cursor': '', 'page_size': 3})
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(len(response.data['logs']), 3)
+
+        response = self.client.get(url, {'cursor': response.data['next_cursor'], 'page_size': 3})
+        self.assertEqual(len(response.data['logs']), 2)
+        self.assertIsNone(response.data['next_cursor'])
+
+    def test_invalid_cursor_request(self):
+        """
+        无效游标返回400
+        """
+        response = self.client.get(reverse('seat_log_list'), {'cursor': 'invalid'})
+
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+
+@unittest.skipUnless(connection.vendor == 'sqlite', '查询计划检查仅支持SQLite')
+class SeatLogQueryPlanTest(QueryPlanMixin, TestCase):
+    """
+    日志查询索引测试
+    """
+
+    def get_queryset(self, **query_params):
+        filters = build_seat_log_filters(query_params)
+        return SeatLog.objects.filter(filters).order_by('-operation_time', '-id')[:10]
+
+    def test_log_filters_use_index(self):
+        """
+        日志列表的各过滤条件均使用索引
+        """
+        start = datetime(2024, 1, 1, tzinfo=dt_timezone.utc)
+        end = datetime(2024, 2, 1, tzinfo=dt_timezone.utc)
+        cases = [
+            {},
+            {'seat_no': '1-1'},
+            {'operation_type': 2},
+            {'operator_id': 'admin'},
+            {'user_id': 'user001'},
+            {'start_time': start, 'end_time': end},
+            {'seat_no': '1-1', 'start_time': start},
+            {'user_id': 'user001', 'operation_type': 3},
+        ]
+        for query_params in cases:
+            with self.subTest(query_params=query_params):
+                self.assertNoFullScan(self.get_queryset(**query_params))
+
+    def test_cursor_query_uses_index(self):
+        """
+        游标分页查询使用索引
+        """
+        operation_time = datetime(2024, 1, 1, tzinfo=dt_timezone.utc)
+        queryset = SeatLog.objects.filter(
+            Q(operation_time__lt=operation_time) | Q(operation_time=operation_time, id__lt=100)
+        ).order_by('-operation_time', '-id')[:10]
+
+        self.assertNoFullScan(queryset)
+
+    def test_statistics_query_uses_index(self):
+        """
+        日志统计查询使用索引
+        """
+        queryset = SeatLog.objects.filter(
+            operation_time__gte=datetime(2024, 1, 1, tzinfo=dt_timezone.utc)
+        ).values('operation_type').annotate(count=Count('id'))
+
+        self.assertNoFullScan(queryset)
+
+
+class SeatLogRollupTest(TestCase):
+    """
+    日志日汇总测试
+    """
+
+    def setUp(self):
+        # 2024-01-01 至 2024-01-05 每天 00:00 起每 5 小时一条日志（北京时间）
+        self.base = datetime(2024, 1, 1, tzinfo=dt_timezone(timedelta(hours=8)))
+        self.add_logs(24)
+
+    def add_logs(self, count, offset=0):
+        SeatLog.objects.bulk_create([
+            SeatLog(seat_no=f'1-{i}', operation_type=(i % 3) + 1, operator_id='admin' if i % 2 else None)
+            for i in range(offset, offset + count)
+        ])
+        new_logs = SeatLog.objects.order_by('id')[offset:offset + count]
+        for index, log_id in enumerate(new_logs.values_list('id', flat=True)):
+            SeatLog.objects.filter(id=log_id).update(
+                operation_time=self.base + timedelta(hours=5 * (offset + index))
+            )
+
+    def raw_statistics(self, start_time=None, end_time=None):
+        queryset = SeatLog.objects.all()
+        start_time = parse_statistics_time(start_time)
+        end_time = parse_statistics_time(end_time)
+        if start_time:
+            queryset = queryset.filter(operation_time__gte=start_time)
+        if end_time:
+            queryset = queryset.filter(operation_time__lte=end_time)
+        return dict(queryset.values_list('operation_type').annotate(count=Count('id')).order_by())
+
+    def assertStatisticsMatch(self, start_time=None, end_time=None):
+        result = get_seat_log_statistics(start_time, end_time)
+        expected = self.raw_statistics(start_time, end_time)
+        self.assertEqual(
+            {stat['operation_type']: stat['count'] for stat in result['by_operation_type']}, expected
+        )
+        self.assertEqual(result['total_logs'], sum(expected.values()))
+
+    def test_rollup_until_cutoff(self):
+        """
+        只汇总截止时间之前的日志，重复执行从上次进度继续
+        """
+        until = self.base + timedelta(days=3)
+
+        self.assertEqual(rollup_seat_logs(until=until, batch_size=4), 15)
+        self.assertEqual(rollup_seat_logs(until=until, batch_size=4), 0)
+        self.assertEqual(
+            sum(SeatLogDailyRollup.objects.values_list('count', flat=True)), 15
+        )
+        self.assertEqual(SeatLogDailyRollup.objects.filter(operator_id='').count(), 8)
+
+    def test_statistics_match_raw_counts(self):
+        """
+        汇总后各种时间范围的统计结果与原始日志一致
+        """
+        rollup_seat_logs(until=self.base + timedelta(days=3), batch_size=4)
+        self.add_logs(3, offset=24)
+        ranges = [
+            (None, None),
+            (self.base, None),
+            (None, self.base + timedelta(days=2)),
+            (self.base + timedelta(hours=3), self.base + timedelta(days=3, hours=7)),
+            (self.base + timedelta(days=1), self.base + timedelta(days=4)),
+            (self.base + timedelta(hours=1), self.base + timedelta(hours=20)),
+            ('2024-01-02', '2024-01-04'),
+            ('2024-01-02 06:00:00', None),
+        ]
+        for start_time, end_time in ranges:
+            with self.subTest(start_time=start_time, end_time=end_time):
+                self.assertStatisticsMatch(start_time, end_time)
+
+    def test_statistics_query_count(self):
+        """
+        统计查询次数固定
+        """
+        rollup_seat_logs(until=self.base + timedelta(days=3))
+
+        with self.assertNumQueries(3):
+            get_seat_log_statistics('2024-01-01', '2024-01-05')
+
+    def test_late_committed_log_is_rolled_up(self):
+        """
+        较小ID的日志晚于已汇总的较大ID提交时，下次汇总重新计算最近几天补上
+        """
+        until = local_midnight(timezone.now())
+        operation_time = until - timedelta(hours=12)
+        late, committed = SeatLog.objects.bulk_create([
+            SeatLog(seat_no='9-1', operation_type=1, operation_time=operation_time),
+            SeatLog(seat_no='9-2', operation_type=1, operation_time=operation_time),
+        ])
+        # 汇总时较小ID的日志尚未提交
+        SeatLog.objects.filter(id=late.id).delete()
+        rollup_seat_logs(until=until)
+        self.assertEqual(get_rollup_log_id(), committed.id)
+
+        SeatLog.objects.bulk_create([late])
+        self.assertEqual(rollup_seat_logs(until=until), 0)
+
+        self.assertEqual(SeatLogDailyRollup.objects.get(date=timezone.localtime(operation_time).date()).count, 2)
+        self.assertStatisticsMatch()
+        self.assertStatisticsMatch(operation_time - timedelta(days=1), until)
+
+    def test_invalid_time(self):
+        """
+        无效时间报错
+        """
+        with self.assertRaises(ValueError):
+            get_seat_log_statistics('not-a-date')
+
+    def test_command(self):
+        """
+        汇总命令汇总截止时间前的全部日志
+        """
+        call_command('rollup_seat_logs', stdout=StringIO())
+
+        self.assertEqual(sum(SeatLogDailyRollup.objects.values_list('count', flat=True)), 24)
+        self.assertStatisticsMatch()
+
+
+class SeatLogWriterTest(TestCase):
+    """
+    日志缓冲写入测试
+    """
+
+    def setUp(self):
+        self.spool_dir = tempfile.TemporaryDirectory()
+        self.addCleanup(self.spool_dir.cleanup)
+        self.spool_path = os.path.join(self.spool_dir.name, 'seat_log_spool.jsonl')
+        settings_override = override_settings(SEAT_LOG_SPOOL_PATH=self.spool_path)
+        settings_override.enable()
+        self.addCleanup(settings_override.disable)
+
+    def test_logs_flushed_once_on_commit(self):
+        """
+        同一事务内的日志在提交后一次写入
+        """
+        with self.captureOnCommitCallbacks() as callbacks:
+            with transaction.atomic():
+                write_seat_log(seat_no='1-1', operation_type=2)
+                write_seat_logs([SeatLog(seat_no=f'1-{i}', operation_type=3) for i in range(2, 5)])
+                self.assertEqual(SeatLog.objects.count(), 0)
+
+        self.assertEqual(len(callbacks), 1)
+        with self.assertNumQueries(1):
+            callbacks[0]()
+        self.assertEqual(SeatLog.objects.count(), 4)
+
+    def test_rolled_back_savepoint_discards_logs(self):
+        """
+        保存点回滚时丢弃其中的日志
+        """
+        with self.captureOnCommitCallbacks(execute=True):
+            with transaction.atomic():
+                write_seat_log(seat_no='1-1', operation_type=2)
+                try:
+                    with transaction.atomic():
+                        write_seat_log(seat_no='1-2', operation_type=2)
+                        raise ValueError
+                except ValueError:
+                    pass
+                write_seat_log(seat_no='1-3', operation_type=2)
+
+        self.assertEqual(sorted(SeatLog.objects.values_list('seat_no', flat=True)), ['1-1', '1-3'])
+
+    def test_spool_mode_and_replay(self):
+        """
+        转存模式写入本地文件，回放后写入数据库
+        """
+        with override_settings(SEAT_LOG_WRITE_MODE='spool'):
+            with self.captureOnCommitCallbacks(execute=True):
+                write_seat_log(seat_no='1-1', operation_type=7, extra_info={'old_seat_status': 0})
+                write_seat_log(seat_no='1-2', operation_type=2, new_user_name='张三')
+
+        self.assertEqual(SeatLog.objects.count(), 0)
+        self.assertTrue(os.path.exists(self.spool_path))
+
+        self.assertEqual(replay_seat_log_spool(), 2)
+        self.assertFalse(os.path.exists(self.spool_path))
+        log = SeatLog.objects.get(seat_no='1-1')
+        self.assertEqual(log.extra_info, {'old_seat_status': 0})
+        self.assertEqual(SeatLog.objects.get(seat_no='1-2').new_user_name, '张三')
+        self.assertEqual(replay_seat_log_spool(), 0)
+
+    def test_replay_interrupted_before_remove_is_not_duplicated(self):
+        """
+        日志已写入数据库但文件未删除（回放中断）时，再次回放不会重复写入
+        """
+        writer.spool_seat_logs([SeatLog(seat_no=f'1-{i}', operation_type=2) for i in range(3)])
+
+        with mock.patch.object(writer.os, 'remove', side_effect=OSError('interrupted')):
+            with self.assertRaises(OSError):
+                replay_seat_log_spool()
+        self.assertEqual(SeatLog.objects.count(), 3)
+
+        writer.spool_seat_logs([SeatLog(seat_no='1-9', operation_type=2)])
+        self.assertEqual(replay_seat_log_spool(), 1)
+        self.assertEqual(SeatLog.objects.count(), 4)
+        self.assertEqual(writer.get_replay_paths(self.spool_path), [])
+
+    def test_database_error_spools_logs(self):
+        """
+        数据库写入失败时转存到本地文件
+        """
+        with mock.patch.object(SeatLog.objects, 'bulk_create', side_effect=DatabaseError('busy')):
+            writer.flush_seat_logs([SeatLog(seat_no='1-1', operation_type=2)])
+
+        self.assertEqual(SeatLog.objects.count(), 0)
+        self.assertEqual(replay_seat_log_spool(), 1)
+        self.assertEqual(SeatLog.objects.count(), 1)
+
+
+    @unittest.skipIf(writer.fcntl is None, '当前系统不支持文件锁')
+    def test_spool_waits_for_file_lock(self):
+        """
+        其他进程持有转存文件锁时，追加写入等待锁释放
+        """
+        os.makedirs(os.path.dirname(self.spool_path), exist_ok=True)
+        with open(self.spool_path + '.lock', 'a') as lock_file:
+            writer.fcntl.flock(lock_file, writer.fcntl.LOCK_EX)
+            thread = threading.Thread(
+                target=writer.spool_seat_logs, args=([SeatLog(seat_no='1-1', operation_type=2)],)
+            )
+            thread.start()
+            thread.join(0.2)
+            self.assertTrue(thread.is_alive())
+            self.assertFalse(os.path.exists(self.spool_path))
+            writer.fcntl.flock(lock_file, writer.fcntl.LOCK_UN)
+        thread.join()
+
+        self.assertEqual(replay_seat_log_spool(), 1)
+
+
+class SeatLogWriterTransactionTest(TransactionTestCase):
+    """
+    日志缓冲写入测试（真实事务提交和回滚）
+    """
+
+    def test_rolled_back_transaction_does_not_swallow_later_logs(self):
+        """
+        事务回滚后，下一个事务中先注册了其他提交回调再写入的日志仍会写入
+        """
+        with self.assertRaises(ValueError):
+            with transaction.atomic():
+                write_seat_log(seat_no='1-1', operation_type=2)
+                raise ValueError
+
+        with transaction.atomic():
+            transaction.on_commit(lambda: None)
+            write_seat_log(seat_no='1-2', operation_type=2)
+
+        self.assertEqual(list(SeatLog.objects.values_list('seat_no', flat=True)), ['1-2'])
+
+
+class SeatLogArchiveTest(TestCase):
+    """
+    日志归档测试
+    """
+
+    def setUp(self):
+        archive_dir = tempfile.TemporaryDirectory()
+        self.addCleanup(archive_dir.cleanup)
+        self.archive_dir = archive_dir.name
+        settings_override = override_settings(SEAT_LOG_ARCHIVE_DIR=self.archive_dir, SEAT_LOG_HOT_MONTHS=2)
+        settings_override.enable()
+        self.addCleanup(settings_override.disable)
+
+        now = timezone.now()
+        self.times = [now - timedelta(days=days) for days in (400, 399, 200, 150, 5, 1)]
+        SeatLog.objects.bulk_create([
+            SeatLog(
+                seat_no=f'1-{i}', operation_type=2, new_user_id=f'user{i % 2}',
+                operator_id='admin', operation_time=operation_time
+            )
+            for i, operation_time in enumerate(self.times)
+        ])
+        self.expected_ids = list(
+            SeatLog.objects.order_by('-operation_time', '-id').values_list('id', flat=True)
+        )
+        self.since = self.times[0] - timedelta(days=1)
+
+    def test_archive_moves_old_logs(self):
+        """
+        热数据窗口之前的日志按月写入归档文件并从数据库删除
+        """
+        self.assertEqual(archive.archive_seat_logs(), 4)
+
+        self.assertEqual(SeatLog.objects.count(), 2)
+        archives = archive.list_archives()
+        self.assertEqual(sum(index['count'] for _, index in archives), 4)
+        self.assertEqual(len(os.listdir(self.archive_dir)), len(archives) * 2)
+        self.assertEqual(archive.archive_seat_logs(), 0)
+
+    def test_query_falls_back_to_archive(self):
+        """
+        开始时间早于热数据窗口时依次返回数据库和归档中的日志
+        """
+        archive.archive_seat_logs()
+
+        result = get_seat_logs({'page': 1, 'page_size': 10, 'start_time': self.since})
+        self.assertEqual(result['total'], 6)
+        self.assertEqual([log['id'] for log in result['logs']], self.expected_ids)
+        self.assertEqual(result['logs'][-1]['operation_type_display'], '绑定人员')
+
+        result = get_seat_logs({'page': 2, 'page_size': 4, 'start_time': self.since})
+        self.assertEqual([log['id'] for log in result['logs']], self.expected_ids[4:])
+
+        result = get_seat_logs({'page': 1, 'page_size': 10, 'user_id': 'user0', 'start_time': self.since})
+        self.assertEqual([log['id'] for log in result['logs']], self.expected_ids[1::2])
+
+    def test_cursor_continues_into_archive(self):
+        """
+        游标分页从数据库延续到归档
+        """
+        archive.archive_seat_logs()
+
+        ids = []
+        cursor = ''
+        while cursor is not None:
+            result = get_seat_logs({'cursor': cursor, 'page_size': 4, 'start_time': self.since})
+            ids.extend(log['id'] for log in result['logs'])
+            cursor = result['next_cursor']
+
+        self.assertEqual(ids, self.expected_ids)
+
+    def test_logs_still_in_database_are_not_duplicated(self):
+        """
+        归档后未删除的日志（归档中断）只返回一次，且与归档日志按时间合并排序
+        """
+        archive.archive_seat_logs()
+        SeatLog.objects.bulk_create([next(archive.read_archive(archive.list_archives()[0][0], {}))])
+        late = SeatLog.objects.create(
+            seat_no='1-9', operation_type=2, operator_id='admin', operation_time=self.times[0] + timedelta(hours=1)
+        )
+        times = dict(zip(self.expected_ids, reversed(self.times)))
+        times[late.id] = late.operation_time
+        expected_ids = sorted(times, key=times.get, reverse=True)
+
+        result = get_seat_logs({'page': 1, 'page_size': 10, 'start_time': self.since})
+        self.assertEqual(result['total'], 7)
+        self.assertEqual([log['id'] for log in result['logs']], expected_ids)
+
+        result = get_seat_logs({'page': 2, 'page_size': 3, 'start_time': self.since})
+        self.assertEqual([log['id'] for log in result['logs']], expected_ids[3:6])
+
+        ids = []
+        cursor = ''
+        while cursor is not None:
+            result = get_seat_logs({'cursor': cursor, 'page_size': 2, 'start_time': self.since})
+            ids.extend(log['id'] for log in result['logs'])
+            cursor = result['next_cursor']
+        self.assertEqual(ids, expected_ids)
+
+    def test_archive_listing_is_cached(self):
+        """
+        归档目录未变化时不再读取索引文件，归档新日志后重新读取
+        """
+        archive.archive_seat_logs()
+        # 目录修改时间在1秒内的不缓存，先将其调早
+        modified = os.stat(self.archive_dir).st_mtime - 10
+        os.utime(self.archive_dir, (modified, modified))
+        with mock.patch.object(archive, 'read_archive_indexes', wraps=archive.read_archive_indexes) as read:
+            archives = archive.list_archives()
+            self.assertEqual(archive.list_archives(), archives)
+            self.assertEqual(read.call_count, 1)
+
+            # 其他进程写入新的归档文件
+            data_path, index = archives[0]
+            name = f"{archive.ARCHIVE_FILE_PREFIX}2000-01_{index['max_id'] + 100}-{index['max_id'] + 100}"
+            shutil.copy(data_path, os.path.join(self.archive_dir, name + archive.DATA_SUFFIX))
+            shutil.copy(
+                data_path[:-len(archive.DATA_SUFFIX)] + archive.INDEX_SUFFIX,
+                os.path.join(self.archive_dir, name + archive.INDEX_SUFFIX)
+            )
+            self.assertEqual(len(archive.list_archives()), len(archives) + 1)
+            self.assertEqual(read.call_count, 2)
+
+    def test_recent_range_skips_archive(self):
+        """
+        时间范围在热数据窗口内时不读取归档
+        """
+        archive.archive_seat_logs()
+
+        with mock.patch.object(services, 'iter_archived_logs') as iter_archived_logs:
+            result = get_seat_logs({'page': 1, 'page_size': 10, 'start_time': self.times[4] - timedelta(hours=1)})
+
+        iter_archived_logs.assert_not_called()
+        self.assertEqual(result['total'], 2)
+
+    def test_default_list_skips_archive(self):
+        """
+        未指定开始时间时只查询数据库，不读取归档
+        """
+        archive.archive_seat_logs()
+
+        with mock.patch.object(archive, 'read_archive_indexes') as read_indexes:
+            result = get_seat_logs({'page': 1, 'page_size': 10})
+
+        read_indexes.assert_not_called()
+        self.assertEqual(result['total'], 2)
+        self.assertEqual([log['id'] for log in result['logs']], self.expected_ids[:2])
+
+    def test_archive_opened_only_when_reached(self):
+        """
+        合并读取时较早的归档文件在需要时才打开
+        """
+        archive.archive_seat_logs()
+
+        with mock.patch.object(archive, 'open_archive', wraps=archive.open_archive) as open_archive:
+            logs = archive.iter_archived_logs({'start_time': self.since})
+            self.assertEqual(next(logs).id, self.expected_ids[2])
+            self.assertEqual(open_archive.call_count, 1)
+            self.assertEqual([log.id for log in logs], self.expected_ids[3:])
+
+    def test_checkpoints_seek_and_count(self):
+        """
+        按检查点定位读取和统计的结果与逐条读取一致
+        """
+        month_start = archive.add_months(archive.get_hot_window_start(), -8)
+        SeatLog.objects.bulk_create([
+            SeatLog(seat_no='2-1', operation_type=2, operator_id='admin',
+                    operation_time=month_start + timedelta(hours=hours))
+            for hours in range(10)
+        ])
+        with mock.patch.object(archive, 'ARCHIVE_CHECKPOINT_ROWS', 3):
+            archive.archive_seat_logs()
+        data_path, index = next(
+            (data_path, index) for data_path, index in archive.list_archives() if index['count'] == 10
+        )
+        self.assertEqual([checkpoint['row'] for checkpoint in index['checkpoints']], [0, 3, 6, 9])
+
+        all_logs = list(archive.read_archive(data_path, {}))
+        for hours in range(11):
+            value = month_start + timedelta(hours=hours, minutes=30)
+            with self.subTest(hours=hours):
+                self.assertEqual(
+                    archive.count_archived_after(data_path, index, value),
+                    sum(1 for log in all_logs if log.operation_time > value)
+                )
+                before = (value, 0)
+                self.assertEqual(
+                    list(archive.read_archive(data_path, {}, before, checkpoints=index['checkpoints'])),
+                    [log for log in all_logs if (log.operation_time, log.id) < before]
+                )
+
+        query_params = {
+            'start_time': month_start + timedelta(hours=2),
+            'end_time': month_start + timedelta(hours=7)
+        }
+        with mock.patch.object(archive, 'iter_archived_logs') as iter_archived_logs:
+            self.assertEqual(archive.count_archived_logs(query_params), 6)
+        iter_archived_logs.assert_not_called()
+
+    def test_statistics_include_archived_logs(self):
+        """
+        归档后按日汇总的统计结果不变
+        """
+        before = get_seat_log_statistics()
+        archive.archive_seat_logs()
+
+        self.assertEqual(get_seat_log_statistics(), before)
+
+    def test_statistics_partial_days_include_archived_logs(self):
+        """
+        起止时间在已归档月份的某天中间时，该天已归档的日志仍计入统计
+        """
+        day = local_midnight(self.times[2])
+        SeatLog.objects.bulk_create([
+            SeatLog(seat_no='2-1', operation_type=3, operator_id='admin', operation_time=day + timedelta(hours=hours))
+            for hours in (1, 5, 9, 13, 17, 21)
+        ])
+        ranges = [
+            (day + timedelta(hours=4), day + timedelta(hours=18)),
+            (day + timedelta(hours=4), None),
+            (self.since, day + timedelta(hours=10)),
+        ]
+        before = [get_seat_log_statistics(start_time, end_time) for start_time, end_time in ranges]
+        archive.archive_seat_logs()
+
+        self.assertFalse(SeatLog.objects.filter(operation_time__lt=archive.get_hot_window_start()).exists())
+        for (start_time, end_time), expected in zip(ranges, before):
+            with self.subTest(start_time=start_time, end_time=end_time):
+                self.assertEqual(get_seat_log_statistics(start_time, end_time), expected)
+
+    def test_export_includes_archived_logs(self):
+        """
+        导出按相同条件输出数据库和归档中的日志
+        """
+        archive.archive_seat_logs()
+        client = APIClient()
+        client.force_authenticate(user=AuthUser.objects.create_user(username='admin', password='admin123'))
+
+        response = client.get(
+            reverse('seat_log_export'), {'user_id': 'user0', 'start_time': self.since.isoformat()}
+        )
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        lines = b''.join(response.streaming_content).decode('utf-8').strip().splitlines()
+        self.assertEqual(lines[0], '\ufeff' + ','.join(services.SEAT_LOG_EXPORT_HEADER))
+        self.assertEqual([int(line.split(',')[0]) for line in lines[1:]], self.expected_ids[1::2])
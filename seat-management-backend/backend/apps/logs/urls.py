@@ -1,12 +1,14 @@
 from django.urls import path
 from .views import (
-    SeatLogListView, SeatLogStatisticsView, SeatLogDetailView
+    SeatLogListView, SeatLogStatisticsView, SeatLogDetailView, SeatLogExportView
 )
 
 
 urlpatterns = [
     # 日志列表查询
     path('logs', SeatLogListView.as_view(), name='seat_log_list'),
+    # 日志导出
+    path('logs/export', SeatLogExportView.as_view(), name='seat_log_export'),
     # 日志详情
     path('logs/<int:log_id>', SeatLogDetailView.as_view(), name='seat_log_detail'),
     # 日志统计
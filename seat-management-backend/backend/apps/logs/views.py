@@ -3,7 +3,10 @@ from rest_framework.response import Response
 from rest_framework.views import APIView
 from rest_framework.permissions import IsAuthenticated
 from .serializers import SeatLogSerializer, SeatLogQuerySerializer
-from .services import get_seat_logs, get_seat_log_statistics
+from .services import (
+    get_seat_logs, get_seat_log_statistics, iter_seat_log_export_rows, SEAT_LOG_EXPORT_HEADER
+)
+from backend.exports import stream_csv_response
 
 
 class SeatLogListView(APIView):
@@ -38,6 +41,29 @@ class SeatLogListView(APIView):
         )
 
 
+class SeatLogExportView(APIView):
+    """
+    工位变更日志导出
+    """
+    permission_classes = [IsAuthenticated]
+    
+    def get(self, request):
+        """
+        按查询条件流式导出日志CSV（过滤条件与日志列表一致，忽略分页参数）
+        """
+        serializer = SeatLogQuerySerializer(data=request.query_params)
+        if serializer.is_valid():
+            return stream_csv_response(
+                'seat_logs.csv',
+                SEAT_LOG_EXPORT_HEADER,
+                iter_seat_log_export_rows(serializer.validated_data)
+            )
+        return Response(
+            serializer.errors,
+            status=status.HTTP_400_BAD_REQUEST
+        )
+
+
 class SeatLogStatisticsView(APIView):
     """
     工位变更统计
@@ -0,0 +1,227 @@
+import json
+import logging
+import os
+import threading
+import uuid
+from contextlib import contextmanager
+from datetime import datetime
+from django.conf import settings
+from django.db import DatabaseError, transaction
+from django.utils.dateparse import parse_datetime
+from .models import SeatLog, SeatLogSpoolReplay
+
+try:
+    import fcntl
+except ImportError:  # 非POSIX系统没有文件锁，仅靠进程内锁保护转存文件
+    fcntl = None
+
+
+logger = logging.getLogger(__name__)
+
+# 回放时每批写入的日志数
+REPLAY_BATCH_SIZE = 1000
+
+_local = threading.local()
+_spool_lock = threading.Lock()
+
+
+def get_log_fields():
+    """
+    需要持久化的日志字段（不含主键）
+    """
+    return [field for field in SeatLog._meta.concrete_fields if not field.primary_key]
+
+
+def write_seat_log(**fields):
+    """
+    写入一条工位变更日志
+
+    在事务中调用时日志先进入当前事务的缓冲区，事务提交后批量写入；
+    不在事务中时立即写入。返回未保存的日志对象（写入后才有ID）。
+    """
+    log = SeatLog(**fields)
+    write_seat_logs([log])
+    return log
+
+
+def write_seat_logs(logs):
+    """
+    批量写入工位变更日志
+
+    同一事务（保存点）内的日志共用一个缓冲区，事务提交后通过一次
+    bulk_create 写入；事务或保存点回滚时对应的日志随回调一起丢弃。
+    缓冲区只在其提交回调仍待执行时复用，已回滚事务留下的缓冲区会被清除。
+    """
+    logs = list(logs)
+    if not logs:
+        return
+
+    connection = transaction.get_connection()
+    if not connection.in_atomic_block:
+        flush_seat_logs(logs)
+        return
+
+    buffers = getattr(_local, 'buffers', None)
+    if buffers is None:
+        buffers = _local.buffers = {}
+    # 提交回调已不在待执行列表中的缓冲区属于已回滚的事务或保存点
+    pending = {id(callback) for _, callback, *_ in connection.run_on_commit}
+    for stale_key in [key for key, (_, flush) in buffers.items() if id(flush) not in pending]:
+        del buffers[stale_key]
+
+    key = (connection.alias, tuple(connection.savepoint_ids))
+    entry = buffers.get(key)
+    if entry is None:
+        buffer = []
+
+        def flush():
+            if buffers.get(key, (None,))[0] is buffer:
+                del buffers[key]
+            flush_seat_logs(buffer)
+
+        entry = buffers[key] = (buffer, flush)
+        transaction.on_commit(flush)
+    entry[0].extend(logs)
+
+
+def flush_seat_logs(logs):
+    """
+    持久化日志：按配置写入数据库或追加到本地文件，数据库写入失败时转存到本地文件
+    """
+    if not logs:
+        return
+
+    if settings.SEAT_LOG_WRITE_MODE == 'spool':
+        spool_seat_logs(logs)
+        return
+
+    try:
+        SeatLog.objects.bulk_create(logs)
+    except DatabaseError as e:
+        logger.warning('写入工位变更日志失败，转存到本地文件: %s', e)
+        spool_seat_logs(logs)
+
+
+def serialize_seat_log(log):
+    """
+    将日志序列化为JSON字符串
+    """
+    data = {}
+    for field in get_log_fields():
+        value = field.value_from_object(log)
+        if isinstance(value, datetime):
+            value = value.isoformat()
+        data[field.attname] = value
+    return json.dumps(data, ensure_ascii=False)
+
+
+def deserialize_seat_log(line):
+    """
+    将JSON字符串还原为日志对象
+    """
+    data = json.loads(line)
+    if data.get('operation_time'):
+        data['operation_time'] = parse_datetime(data['operation_time'])
+    return SeatLog(**data)
+
+
+@contextmanager
+def spool_lock(path):
+    """
+    转存文件锁：进程内互斥，并通过锁文件在多个进程间互斥
+
+    追加写入和回放前的重命名都在锁内进行，重命名后的写入总是进入新文件。
+    """
+    with _spool_lock:
+        os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+        if fcntl is None:
+            yield
+            return
+        with open(path + '.lock', 'a') as lock_file:
+            fcntl.flock(lock_file, fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                fcntl.flock(lock_file, fcntl.LOCK_UN)
+
+
+def spool_seat_logs(logs):
+    """
+    将日志追加到本地文件（每行一条JSON）
+    """
+    path = settings.SEAT_LOG_SPOOL_PATH
+    content = ''.join(serialize_seat_log(log) + '\n' for log in logs)
+    with spool_lock(path):
+        with open(path, 'a', encoding='utf-8') as f:
+            f.write(content)
+            f.flush()
+            os.fsync(f.fileno())
+
+
+def get_replay_paths(path):
+    """
+    列出上次回放中断留下的待回放文件（按文件名排序）
+    """
+    directory = os.path.dirname(path) or '.'
+    prefix = os.path.basename(path) + '.replay'
+    return sorted(
+        os.path.join(directory, filename)
+        for filename in os.listdir(directory)
+        if filename.startswith(prefix)
+    )
+
+
+def replay_seat_log_spool(batch_size=None):
+    """
+    将本地文件中的日志回放到数据库
+
+    先将文件重命名为唯一的待回放文件名，新日志继续写入新文件；每个文件在一个事务中回放，
+    成功后删除。上次回放中断留下的文件会先被回放。返回回放的日志数。
+    """
+    batch_size = batch_size or REPLAY_BATCH_SIZE
+    path = settings.SEAT_LOG_SPOOL_PATH
+
+    replayed_count = 0
+    while True:
+        with spool_lock(path):
+            replay_paths = get_replay_paths(path)
+            if not replay_paths:
+                if not os.path.exists(path):
+                    return replayed_count
+                replay_path = f'{path}.replay.{uuid.uuid4().hex}'
+                os.replace(path, replay_path)
+                replay_paths = [replay_path]
+        for replay_path in replay_paths:
+            replayed_count += replay_spool_file(replay_path, batch_size)
+
+
+def replay_spool_file(replay_path, batch_size):
+    """
+    回放单个日志文件，成功后删除文件
+
+    文件名与日志在同一事务中记录到 SeatLogSpoolReplay，日志已提交而文件未删除时
+    （回放进程中断）再次回放只删除文件，不会重复写入。返回写入的日志数。
+    """
+    logs = []
+    with open(replay_path, encoding='utf-8') as f:
+        for line_no, line in enumerate(f, 1):
+            line = line.strip()
+            if not line:
+                continue
+            try:
+                logs.append(deserialize_seat_log(line))
+            except (ValueError, TypeError) as e:
+                logger.warning('跳过无法解析的日志（第%s行）: %s', line_no, e)
+
+    with transaction.atomic():
+        _, created = SeatLogSpoolReplay.objects.get_or_create(
+            file_name=os.path.basename(replay_path),
+            defaults={'log_count': len(logs)}
+        )
+        if created:
+            SeatLog.objects.bulk_create(logs, batch_size=batch_size)
+        else:
+            logger.warning('日志文件已回放，删除文件: %s', replay_path)
+    os.remove(replay_path)
+
+    return len(logs) if created else 0
@@ -0,0 +1,24 @@
+from django.core.management.base import BaseCommand
+from backend.apps.oa.services import run_webhook_worker
+
+
+class Command(BaseCommand):
+    """
+    后台处理OA Webhook事件
+    """
+    help = '领取并处理待处理的OA Webhook事件'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=100, help='每次领取的事件数')
+        parser.add_argument('--workers', type=int, default=4, help='并发处理线程数（SQLite固定为1）')
+        parser.add_argument('--poll-interval', type=float, default=2.0, help='无事件时的轮询间隔（秒）')
+        parser.add_argument('--once', action='store_true', help='处理完当前待处理事件后退出')
+
+    def handle(self, *args, **options):
+        processed_count = run_webhook_worker(
+            batch_size=options['batch_size'],
+            workers=options['workers'],
+            poll_interval=options['poll_interval'],
+            once=options['once']
+        )
+        self.stdout.write(self.style.SUCCESS(f'共处理 {processed_count} 个Webhook事件'))
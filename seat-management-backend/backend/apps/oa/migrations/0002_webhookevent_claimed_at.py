@@ -0,0 +1,18 @@
+# Generated by Django 5.0 on 2026-10-18 17:42
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('oa', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='webhookevent',
+            name='claimed_at',
+            field=models.DateTimeField(blank=True, help_text='处理中的事件超过领取时限未完成时可被重新领取', null=True, verbose_name='领取时间'),
+        ),
+    ]
@@ -188,6 +188,12 @@ class WebhookEvent(models.Model):
         null=True,
         verbose_name="处理时间"
     )
+    claimed_at = models.DateTimeField(
+        blank=True,
+        null=True,
+        verbose_name="领取时间",
+        help_text="处理中的事件超过领取时限未完成时可被重新领取"
+    )
 
     class Meta:
         verbose_name = "Webhook事件"
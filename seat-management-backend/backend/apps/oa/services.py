@@ -1,9 +1,22 @@
 import requests
 import json
-from datetime import datetime
-from django.db import transaction
+import logging
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+from django.conf import settings
+from django.db import connection, connections, transaction
+from django.db.models import F, Q
+from django.utils import timezone
 from .models import OASyncConfig, OASyncTask, WebhookEvent
-from backend.apps.users.services import sync_users, process_user_change
+from backend.apps.users.services import (
+    bulk_sync_users, new_sync_report, process_user_change, unbind_user_seats
+)
+
+
+logger = logging.getLogger(__name__)
 
 
 def get_oa_sync_config(sync_type):
@@ -63,36 +76,83 @@ def execute_sync_task(task):
     return task
 
 
+def create_oa_session(config):
+    """
+    创建OA接口会话（复用连接，网关错误自动重试）
+    """
+    session = requests.Session()
+    retry = Retry(
+        total=3,
+        backoff_factor=0.5,
+        status_forcelist=[502, 503, 504],
+        allowed_methods=['GET']
+    )
+    adapter = HTTPAdapter(pool_connections=1, pool_maxsize=4, max_retries=retry)
+    session.mount('http://', adapter)
+    session.mount('https://', adapter)
+    
+    session.headers.update({
+        'Content-Type': 'application/json'
+    })
+    if config.api_key:
+        session.headers['Authorization'] = f'Bearer {config.api_key}'
+    
+    return session
+
+
+def iter_oa_pages(session, url, page_size=None):
+    """
+    分页拉取OA数据，逐页返回数据列表
+
+    响应包含 next_cursor 时按游标翻页；包含 has_more 或 total 时按页码翻页；
+    都不包含时视为一次返回全部数据。
+    """
+    page_size = page_size or settings.OA_PAGE_SIZE
+    page = 1
+    params = {'page': page, 'page_size': page_size}
+    
+    while True:
+        response = session.get(url, params=params, timeout=settings.OA_REQUEST_TIMEOUT)
+        if response.status_code != 200:
+            raise Exception(f'OA API调用失败: {response.status_code} - {response.text}')
+        
+        data = response.json()
+        items = data.get('data', [])
+        yield items
+        
+        if not items:
+            break
+        
+        next_cursor = data.get('next_cursor')
+        if next_cursor:
+            params = {'cursor': next_cursor, 'page_size': page_size}
+        elif data.get('has_more') or page * page_size < data.get('total', 0):
+            page += 1
+            params = {'page': page, 'page_size': page_size}
+        else:
+            break
+
+
 def sync_users_from_oa():
     """
     从OA系统同步用户
+
+    逐页拉取并同步，内存占用只与分页大小有关。
     """
     config = get_oa_sync_config('user_sync')
     if not config:
         raise Exception('用户同步配置不存在或未启用')
     
-    # 调用OA API获取用户数据
-    headers = {
-        'Content-Type': 'application/json'
-    }
-    
-    if config.api_key:
-        headers['Authorization'] = f'Bearer {config.api_key}'
-    
-    response = requests.get(
-        config.api_url,
-        headers=headers,
-        timeout=30
-    )
-    
-    if response.status_code != 200:
-        raise Exception(f'OA API调用失败: {response.status_code} - {response.text}')
-    
-    data = response.json()
-    users_data = data.get('data', [])
+    report = new_sync_report()
+    total_users = 0
+    page_count = 0
     
-    # 同步用户数据
-    synced_count = sync_users(users_data)
+    # 调用OA API分页获取用户数据并同步
+    with create_oa_session(config) as session:
+        for users_data in iter_oa_pages(session, config.api_url):
+            page_count += 1
+            total_users += len(users_data)
+            bulk_sync_users(users_data, report=report)
     
     # 更新配置
     config.last_sync_time = datetime.now()
@@ -100,8 +160,14 @@ def sync_users_from_oa():
     config.save()
     
     return {
-        'synced_count': synced_count,
-        'total_users': len(users_data),
+        'synced_count': report['synced_count'],
+        'total_users': total_users,
+        'page_count': page_count,
+        'created_count': report['created_count'],
+        'updated_count': report['updated_count'],
+        'unchanged_count': report['unchanged_count'],
+        'departed_count': report['departed_count'],
+        'chunks': report['chunks'],
         'sync_time': datetime.now().isoformat()
     }
 
@@ -114,25 +180,11 @@ def sync_departments_from_oa():
     if not config:
         raise Exception('部门同步配置不存在或未启用')
     
-    # 调用OA API获取部门数据
-    headers = {
-        'Content-Type': 'application/json'
-    }
-    
-    if config.api_key:
-        headers['Authorization'] = f'Bearer {config.api_key}'
-    
-    response = requests.get(
-        config.api_url,
-        headers=headers,
-        timeout=30
-    )
-    
-    if response.status_code != 200:
-        raise Exception(f'OA API调用失败: {response.status_code} - {response.text}')
-    
-    data = response.json()
-    departments_data = data.get('data', [])
+    # 调用OA API分页获取部门数据
+    total_departments = 0
+    with create_oa_session(config) as session:
+        for departments_data in iter_oa_pages(session, config.api_url):
+            total_departments += len(departments_data)
     
     # 这里可以添加部门同步逻辑
     # 由于我们的系统中部门信息是从用户表中提取的，这里主要是记录同步状态
@@ -143,40 +195,48 @@ def sync_departments_from_oa():
     config.save()
     
     return {
-        'total_departments': len(departments_data),
+        'total_departments': total_departments,
         'sync_time': datetime.now().isoformat()
     }
 
 
+# 用户相关事件类型（1:用户创建, 2:用户更新, 3:用户删除）
+USER_EVENT_TYPES = (1, 2, 3)
+
+
+def build_user_change_data(event):
+    """
+    根据Webhook事件构建用户变更数据
+    """
+    event_data = event.event_data
+    return {
+        'user_id': event_data.get('user_id'),
+        'name': event_data.get('name'),
+        'dept_id': event_data.get('dept_id'),
+        'dept_name': event_data.get('dept_name'),
+        'position': event_data.get('position'),
+        'phone': event_data.get('phone'),
+        'email': event_data.get('email'),
+        'status': event_data.get('status', '在职'),
+        'change_type': '入职' if event.event_type == 1 else '离职' if event.event_type == 3 else '调岗'
+    }
+
+
 def process_webhook_event(event):
     """
     处理Webhook事件
     """
     event.status = 1
+    event.claimed_at = timezone.now()
     event.save()
     
     error_message = None
     
     try:
-        event_data = event.event_data
-        
         # 根据事件类型处理
-        if event.event_type in [1, 2, 3]:  # 用户相关事件
-            # 构建用户变更数据
-            user_change_data = {
-                'user_id': event_data.get('user_id'),
-                'name': event_data.get('name'),
-                'dept_id': event_data.get('dept_id'),
-                'dept_name': event_data.get('dept_name'),
-                'position': event_data.get('position'),
-                'phone': event_data.get('phone'),
-                'email': event_data.get('email'),
-                'status': event_data.get('status', '在职'),
-                'change_type': '入职' if event.event_type == 1 else '离职' if event.event_type == 3 else '调岗'
-            }
-            
+        if event.event_type in USER_EVENT_TYPES:  # 用户相关事件
             # 处理用户变更
-            process_user_change(user_change_data)
+            process_user_change(build_user_change_data(event))
         
         event.status = 2
     except Exception as e:
@@ -191,6 +251,245 @@ def process_webhook_event(event):
     return event
 
 
+def get_event_user_id(event):
+    """
+    返回用户相关事件的人员ID（event_data.user_id），其他事件返回None
+    """
+    user_id = event.event_data.get('user_id') if isinstance(event.event_data, dict) else None
+    return user_id if event.event_type in USER_EVENT_TYPES and user_id else None
+
+
+def claim_webhook_events(batch_size):
+    """
+    领取一批待处理的Webhook事件（状态改为处理中并记录领取时间）
+
+    除待处理事件外，领取超过 WEBHOOK_CLAIM_TIMEOUT 仍处于处理中的事件（处理进程崩溃或被终止）
+    也会被重新领取，因此领取时限应大于一批事件的处理时间。
+    用户相关事件按人员整体领取：一次领取该人员全部待处理事件（批次可能超过 batch_size），
+    其他进程领取中的人员本次跳过，保证同一人员的事件不会被拆到不同批次并发或乱序处理。
+    支持 SKIP LOCKED 的数据库（PostgreSQL、MySQL 8）直接跳过其他进程已锁定的事件，
+    人员有事件被其他进程锁定时本次跳过该人员；
+    SQLite 等不支持的数据库逐条按状态和领取时间条件更新，同一人员的事件全部更新成功才算领取。
+    """
+    now = timezone.now()
+    expired = now - timedelta(seconds=settings.WEBHOOK_CLAIM_TIMEOUT)
+    claimable = WebhookEvent.objects.filter(
+        Q(status=0) | Q(status=1, claimed_at__lt=expired) | Q(status=1, claimed_at__isnull=True)
+    ).order_by('received_at', 'id')
+    skip_locked = connection.features.has_select_for_update_skip_locked
+    pending = claimable.select_for_update(skip_locked=True) if skip_locked else claimable
+    
+    with transaction.atomic():
+        events = list(pending[:batch_size])
+        user_ids = {get_event_user_id(event) for event in events} - {None}
+        groups = [[event] for event in events if get_event_user_id(event) is None]
+        if user_ids:
+            groups += get_claimable_user_groups(user_ids, claimable, pending, expired, skip_locked)
+        
+        if skip_locked:
+            claimed = [event for group in groups for event in group]
+            WebhookEvent.objects.filter(id__in=[event.id for event in claimed]).update(status=1, claimed_at=now)
+        else:
+            claimed = [event for group in groups if claim_event_group(group, now) for event in group]
+    
+    for event in claimed:
+        event.status = 1
+        event.claimed_at = now
+    return sorted(claimed, key=lambda event: (event.received_at, event.id))
+
+
+def get_claimable_user_groups(user_ids, claimable, pending, expired, skip_locked):
+    """
+    按人员读取可领取的全部事件，返回各人员的事件列表
+
+    跳过有未过期领取（其他进程处理中）的人员；SKIP LOCKED 时还跳过有事件被其他进程锁定的人员。
+    """
+    user_events = claimable.filter(event_type__in=USER_EVENT_TYPES, event_data__user_id__in=user_ids)
+    busy_user_ids = set(WebhookEvent.objects.filter(
+        event_type__in=USER_EVENT_TYPES, event_data__user_id__in=user_ids,
+        status=1, claimed_at__gte=expired
+    ).values_list('event_data__user_id', flat=True))
+    
+    groups = {}
+    for event in (user_events.select_for_update(skip_locked=True) if skip_locked else user_events):
+        user_id = get_event_user_id(event)
+        if user_id in user_ids and user_id not in busy_user_ids:
+            groups.setdefault(user_id, []).append(event)
+    
+    if skip_locked:
+        # 未锁定的事件正被其他进程领取，整个人员留待下次领取
+        locked_ids = {event.id for group in groups.values() for event in group}
+        for event_id, user_id in user_events.values_list('id', 'event_data__user_id'):
+            if event_id not in locked_ids:
+                groups.pop(user_id, None)
+    return list(groups.values())
+
+
+def claim_event_group(events, now):
+    """
+    按状态和领取时间条件逐条领取一组事件，任一事件已被其他进程领取时整组放弃
+    """
+    with transaction.atomic():
+        for event in events:
+            if not WebhookEvent.objects.filter(
+                id=event.id, status=event.status, claimed_at=event.claimed_at
+            ).update(status=1, claimed_at=now):
+                transaction.set_rollback(True)
+                return False
+    return True
+
+
+def partition_webhook_events(events):
+    """
+    按人员拆分Webhook事件
+
+    用户相关事件按 event_data.user_id 分组，组内保持到达顺序；
+    其他事件（及缺少user_id的事件）逐个单独处理。
+    """
+    user_groups = {}
+    other_events = []
+    for event in events:
+        user_id = get_event_user_id(event)
+        if user_id:
+            user_groups.setdefault(user_id, []).append(event)
+        else:
+            other_events.append(event)
+    return list(user_groups.values()), other_events
+
+
+def coalesce_user_events(events):
+    """
+    合并同一人员的连续事件为最终状态
+
+    后到事件中的非空字段覆盖先到事件；中途出现过离职时返回 departed=True，
+    以保证与逐条处理一致（工位已被解绑）。
+    """
+    change_data = {}
+    departed = False
+    for event in events:
+        data = build_user_change_data(event)
+        change_data.update({key: value for key, value in data.items() if value is not None})
+        if data['status'] != '在职':
+            departed = True
+    return change_data, departed
+
+
+def process_user_event_group(events):
+    """
+    处理同一人员的一组Webhook事件（合并后只更新一次人员和工位）
+
+    处理前锁定这组事件并确认仍归本次领取所有（领取时间未变），领取已过期并被其他进程
+    重新领取时放弃处理，由新的领取者处理；处理结果与事件状态在同一事务中提交。
+    """
+    event_ids = [event.id for event in events]
+    owned = WebhookEvent.objects.filter(id__in=event_ids, status=1, claimed_at=events[0].claimed_at)
+    
+    try:
+        change_data, departed = coalesce_user_events(events)
+        with transaction.atomic():
+            if len(owned.select_for_update().values_list('id', flat=True)) != len(event_ids):
+                logger.warning('Webhook事件领取已过期并被重新领取，放弃处理: %s', event_ids)
+                return 0
+            process_user_change(change_data)
+            # 最终为在职但中途离职过，同样需要解绑工位
+            if departed and change_data['status'] == '在职':
+                unbind_user_seats(change_data['user_id'])
+            
+            owned.update(
+                status=2,
+                processed_at=timezone.now()
+            )
+    except Exception as e:
+        owned.update(
+            status=3,
+            error_message=str(e),
+            retry_count=F('retry_count') + 1,
+            processed_at=timezone.now()
+        )
+    
+    return len(events)
+
+
+def process_webhook_batch(events, executor=None):
+    """
+    处理一批已领取的Webhook事件
+
+    不同人员的事件组可以并发处理，同一人员的事件合并后顺序处理。
+    """
+    user_groups, other_events = partition_webhook_events(events)
+    tasks = [(process_user_event_group, group) for group in user_groups]
+    tasks += [(process_webhook_event, event) for event in other_events]
+    
+    if executor:
+        list(executor.map(run_in_worker_thread, tasks))
+    else:
+        for func, arg in tasks:
+            func(arg)
+
+
+def run_in_worker_thread(task):
+    """
+    在工作线程中执行处理任务
+    """
+    func, arg = task
+    try:
+        return func(arg)
+    except Exception:
+        logger.exception('Webhook事件处理异常')
+    finally:
+        connection.close_if_unusable_or_obsolete()
+
+
+def close_worker_connections(worker_connections):
+    """
+    关闭线程池各工作线程的数据库连接（线程池关闭后在当前线程执行）
+    """
+    for worker_connection in worker_connections:
+        worker_connection.inc_thread_sharing()
+        try:
+            worker_connection.close()
+        finally:
+            worker_connection.dec_thread_sharing()
+
+
+def run_webhook_worker(batch_size=100, workers=4, poll_interval=2.0, once=False):
+    """
+    后台处理Webhook事件
+
+    循环领取待处理事件，按人员合并后用线程池并发处理，没有待处理事件时按间隔轮询。
+    once 为 True 时处理完当前所有待处理事件后退出。SQLite 不支持并发写入，固定在当前线程处理。
+    返回处理的事件数。
+    """
+    if connection.vendor == 'sqlite':
+        workers = 1
+    
+    processed_count = 0
+    executor = None
+    worker_connections = []
+    if workers > 1:
+        # 记录每个工作线程的数据库连接，线程池关闭时统一关闭
+        executor = ThreadPoolExecutor(
+            max_workers=workers,
+            initializer=lambda: worker_connections.extend(connections[alias] for alias in connections)
+        )
+    try:
+        while True:
+            events = claim_webhook_events(batch_size)
+            if events:
+                process_webhook_batch(events, executor)
+                processed_count += len(events)
+                continue
+            if once:
+                break
+            time.sleep(poll_interval)
+    finally:
+        if executor:
+            executor.shutdown()
+            close_worker_connections(worker_connections)
+    
+    return processed_count
+
+
 def trigger_oa_sync(sync_type, force=False):
     """
     触发OA同步
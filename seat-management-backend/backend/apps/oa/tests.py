@@ -1,3 +1,318 @@
-from django.test import TestCase
+import json
+from datetime import timedelta
+from io import StringIO
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import urlparse, parse_qs
+from django.core.management import call_command
+from django.test import TestCase, override_settings
+from django.urls import reverse
+from django.utils import timezone
+from rest_framework.test import APIClient
+from rest_framework import status
+from backend.apps.users.models import User
+from .models import OASyncConfig, WebhookEvent
+from unittest import mock
+from backend.apps.venues.models import Venue
+from backend.apps.floors.models import Floor
+from backend.apps.areas.models import Area
+from backend.apps.seats.models import Seat
+from backend.apps.seats.services import bind_user_to_seat
+from . import services
+from .services import sync_users_from_oa, claim_webhook_events, run_webhook_worker
 
-# Create your tests here.
+
+class FakeOAHandler(BaseHTTPRequestHandler):
+    """
+    模拟OA人员接口
+    """
+    
+    def do_GET(self):
+        server = self.server
+        query = parse_qs(urlparse(self.path).query)
+        server.requests.append(query)
+        page_size = int(query.get('page_size', ['1000'])[0])
+        
+        if server.mode == 'cursor':
+            start = int(query.get('cursor', ['0'])[0])
+            end = start + page_size
+            body = {'data': server.users[start:end]}
+            if end < len(server.users):
+                body['next_cursor'] = str(end)
+        elif server.mode == 'page':
+            page = int(query.get('page', ['1'])[0])
+            start = (page - 1) * page_size
+            body = {'data': server.users[start:start + page_size], 'total': len(server.users)}
+        else:
+            body = {'data': server.users}
+        
+        payload = json.dumps(body).encode('utf-8')
+        self.send_response(200)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(payload)))
+        self.end_headers()
+        self.wfile.write(payload)
+    
+    def log_message(self, format, *args):
+        pass
+
+
+class OAUserSyncTest(TestCase):
+    """
+    OA人员分页同步测试
+    """
+    
+    def setUp(self):
+        """
+        启动本地模拟OA服务
+        """
+        self.server = ThreadingHTTPServer(('127.0.0.1', 0), FakeOAHandler)
+        self.server.requests = []
+        self.server.users = [
+            {
+                'user_id': f'user{i:03d}',
+                'name': f'用户{i}',
+                'dept_id': 'dept001',
+                'dept_name': '测试部门',
+                'position': '工程师',
+                'status': '在职'
+            }
+            for i in range(25)
+        ]
+        thread = threading.Thread(target=self.server.serve_forever, daemon=True)
+        thread.start()
+        
+        OASyncConfig.objects.create(
+            sync_type='user_sync',
+            api_url=f'http://127.0.0.1:{self.server.server_address[1]}/users',
+            api_key='test-key'
+        )
+    
+    def tearDown(self):
+        self.server.shutdown()
+        self.server.server_close()
+    
+    @override_settings(OA_PAGE_SIZE=10)
+    def test_cursor_pagination(self):
+        self.server.mode = 'cursor'
+        
+        result = sync_users_from_oa()
+        
+        self.assertEqual(result['page_count'], 3)
+        self.assertEqual(result['total_users'], 25)
+        self.assertEqual(result['created_count'], 25)
+        self.assertEqual(User.objects.count(), 25)
+        self.assertEqual([query.get('cursor') for query in self.server.requests], [None, ['10'], ['20']])
+    
+    @override_settings(OA_PAGE_SIZE=10)
+    def test_page_pagination(self):
+        self.server.mode = 'page'
+        
+        result = sync_users_from_oa()
+        
+        self.assertEqual(result['page_count'], 3)
+        self.assertEqual(User.objects.count(), 25)
+        self.assertEqual([query['page'] for query in self.server.requests], [['1'], ['2'], ['3']])
+    
+    def test_unpaginated_response(self):
+        self.server.mode = 'plain'
+        
+        result = sync_users_from_oa()
+        
+        self.assertEqual(result['page_count'], 1)
+        self.assertEqual(result['synced_count'], 25)
+        self.assertEqual(len(self.server.requests), 1)
+
+
+
+class WebhookWorkerTest(TestCase):
+    """
+    Webhook事件后台处理测试
+    """
+    
+    def post_event(self, event_type, user_id, **data):
+        event_data = {
+            'user_id': user_id,
+            'name': f'用户{user_id}',
+            'dept_id': 'dept001',
+            'dept_name': '测试部门',
+            'position': '工程师',
+            'status': '在职'
+        }
+        event_data.update(data)
+        return APIClient().post(
+            reverse('webhook_event_create'),
+            {'event_type': event_type, 'event_data': event_data},
+            format='json'
+        )
+    
+    def test_webhook_only_persists_event(self):
+        """
+        接收事件时只保存，不同步处理
+        """
+        response = self.post_event(1, 'user001')
+        
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(WebhookEvent.objects.get().status, 0)
+        self.assertFalse(User.objects.exists())
+    
+    def test_claimed_events_are_not_claimed_again(self):
+        """
+        已领取的事件不会被再次领取
+        """
+        for i in range(3):
+            self.post_event(1, f'user{i:03d}')
+        
+        first = claim_webhook_events(2)
+        second = claim_webhook_events(2)
+        
+        self.assertEqual(len(first), 2)
+        self.assertEqual(len(second), 1)
+        self.assertFalse({event.id for event in first} & {event.id for event in second})
+        self.assertEqual(WebhookEvent.objects.filter(status=1).count(), 3)
+    
+    @override_settings(WEBHOOK_CLAIM_TIMEOUT=300)
+    def test_stranded_claim_is_reclaimed(self):
+        """
+        领取后超过领取时限仍未完成的事件（处理进程崩溃）被重新领取并处理
+        """
+        self.post_event(1, 'user001')
+        self.post_event(1, 'user002')
+        stranded, fresh = claim_webhook_events(2)
+        WebhookEvent.objects.filter(id=stranded.id).update(
+            claimed_at=timezone.now() - timedelta(seconds=301)
+        )
+        
+        reclaimed = claim_webhook_events(10)
+        
+        self.assertEqual([event.id for event in reclaimed], [stranded.id])
+        self.assertEqual(claim_webhook_events(10), [])
+        
+        WebhookEvent.objects.filter(id=stranded.id).update(
+            claimed_at=timezone.now() - timedelta(seconds=301)
+        )
+        run_webhook_worker(once=True)
+        
+        self.assertEqual(WebhookEvent.objects.get(id=stranded.id).status, 2)
+        self.assertEqual(WebhookEvent.objects.get(id=fresh.id).status, 1)
+        self.assertTrue(User.objects.filter(id='user001').exists())
+    
+    def test_user_events_claimed_together(self):
+        """
+        批次边界落在同一人员的事件之间时，该人员的全部待处理事件一起领取
+        """
+        for user_id in ('user001', 'user001', 'user002', 'user001'):
+            self.post_event(1, user_id)
+        ids = list(WebhookEvent.objects.order_by('id').values_list('id', flat=True))
+        
+        first = claim_webhook_events(2)
+        second = claim_webhook_events(2)
+        
+        self.assertEqual([event.id for event in first], [ids[0], ids[1], ids[3]])
+        self.assertEqual([event.id for event in second], [ids[2]])
+    
+    def test_user_with_active_claim_is_skipped(self):
+        """
+        人员有处理中的事件时，新到的事件等其处理完成后再领取
+        """
+        self.post_event(1, 'user001')
+        first = claim_webhook_events(10)
+        self.post_event(2, 'user001', position='经理')
+        self.post_event(1, 'user002')
+        late, other = WebhookEvent.objects.filter(status=0).order_by('id')
+        
+        self.assertEqual([event.id for event in claim_webhook_events(10)], [other.id])
+        
+        services.process_user_event_group(first)
+        self.assertEqual([event.id for event in claim_webhook_events(10)], [late.id])
+    
+    @override_settings(WEBHOOK_CLAIM_TIMEOUT=300)
+    def test_expired_claim_is_not_applied(self):
+        """
+        领取过期并被重新领取后，原领取者不再处理这组事件
+        """
+        self.post_event(1, 'user001')
+        stale = claim_webhook_events(10)
+        WebhookEvent.objects.update(claimed_at=timezone.now() - timedelta(seconds=301))
+        reclaimed = claim_webhook_events(10)
+        
+        services.process_user_event_group(stale)
+        self.assertFalse(User.objects.exists())
+        self.assertEqual(WebhookEvent.objects.get().status, 1)
+        
+        services.process_user_event_group(reclaimed)
+        self.assertTrue(User.objects.filter(id='user001').exists())
+        self.assertEqual(WebhookEvent.objects.get().status, 2)
+    
+    def test_worker_connections_closed_on_shutdown(self):
+        """
+        线程池关闭后关闭各工作线程的数据库连接
+        """
+        worker_connection = mock.Mock()
+        
+        services.close_worker_connections([worker_connection])
+        
+        worker_connection.close.assert_called_once_with()
+        worker_connection.inc_thread_sharing.assert_called_once_with()
+        worker_connection.dec_thread_sharing.assert_called_once_with()
+    
+    def test_worker_command_processes_pending_events(self):
+        """
+        后台命令处理所有待处理事件
+        """
+        for i in range(5):
+            self.post_event(1, f'user{i:03d}')
+        
+        call_command('process_webhook_events', '--once', '--batch-size', '2', stdout=StringIO())
+        
+        self.assertEqual(WebhookEvent.objects.filter(status=2).count(), 5)
+        self.assertEqual(User.objects.count(), 5)
+    
+    def test_events_coalesced_per_user(self):
+        """
+        同一人员的多条事件合并为一次处理，按到达顺序取最终状态
+        """
+        self.post_event(1, 'user001', position='工程师')
+        self.post_event(2, 'user001', position='高级工程师', phone=None)
+        self.post_event(2, 'user001', position='经理')
+        self.post_event(1, 'user002')
+        
+        with mock.patch.object(services, 'process_user_change', wraps=services.process_user_change) as change:
+            run_webhook_worker(once=True)
+        
+        self.assertEqual(change.call_count, 2)
+        self.assertEqual(User.objects.get(id='user001').position, '经理')
+        self.assertEqual(WebhookEvent.objects.filter(status=2).count(), 4)
+    
+    def test_intermediate_departure_releases_seats(self):
+        """
+        中途离职后又在职，工位仍被解绑（与逐条处理一致）
+        """
+        User.objects.create(
+            id='user001', name='用户1', dept_id='dept001', dept_name='测试部门', position='工程师'
+        )
+        venue = Venue.objects.create(name='测试场地', code='V001', city='上海', address='测试地址')
+        floor = Floor.objects.create(venue=venue, floor_no='1F', floor_name='测试楼层')
+        area = Area.objects.create(floor=floor, area_no='1', area_name='区域1')
+        seat = Seat.objects.create(area=area, seat_no='1-1')
+        bind_user_to_seat(seat.id, 'user001')
+        
+        self.post_event(3, 'user001', status='离职')
+        self.post_event(1, 'user001', status='在职')
+        run_webhook_worker(once=True)
+        
+        seat.refresh_from_db()
+        self.assertIsNone(seat.current_user_id)
+        self.assertEqual(User.objects.get(id='user001').status, 1)
+    
+    def test_failed_group_marks_all_events(self):
+        """
+        合并处理失败时该人员的所有事件标记为失败
+        """
+        self.post_event(1, 'user001')
+        self.post_event(2, 'user001')
+        
+        with mock.patch.object(services, 'process_user_change', side_effect=ValueError('处理失败')):
+            run_webhook_worker(once=True)
+        
+        self.assertEqual(WebhookEvent.objects.filter(status=3, retry_count=1).count(), 2)
\ No newline at end of file
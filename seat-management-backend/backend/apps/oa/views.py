@@ -242,17 +242,14 @@ class WebhookEventCreateView(APIView):
             event_type = serializer.validated_data['event_type']
             event_data = serializer.validated_data['event_data']
             
-            # 创建事件
-            event = WebhookEvent.objects.create(
+            # 创建事件，由后台任务（process_webhook_events命令）异步处理
+            WebhookEvent.objects.create(
                 event_type=event_type,
                 event_data=event_data
             )
             
-            # 异步处理事件
-            process_webhook_event(event)
-            
             return Response(
-                {'detail': '事件已接收并开始处理'},
+                {'detail': '事件已接收，等待处理'},
                 status=status.HTTP_201_CREATED
             )
         return Response(
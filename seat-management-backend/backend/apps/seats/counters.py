@@ -0,0 +1,98 @@
+from collections import Counter
+from django.db import transaction
+from django.db.models import Case, Count, F, IntegerField, Q, Value, When
+from .models import Seat, SeatStatusCounter
+
+
+def new_counter_changes():
+    """
+    创建计数变化累加器：{(区域ID, 工位状态, 部门ID): 变化量}
+    """
+    return Counter()
+
+
+def add_seat_count(changes, area_id, seat_status, dept_id, count=1):
+    """
+    累加指定区域、状态、部门的工位数变化（count 可为负数）
+    """
+    changes[(area_id, seat_status, dept_id or '')] += count
+
+
+def move_seat_count(changes, area_id, old_status, old_dept_id, new_status, new_dept_id, new_area_id=None):
+    """
+    记录一个工位从原状态/部门变为新状态/部门
+    """
+    add_seat_count(changes, area_id, old_status, old_dept_id, -1)
+    add_seat_count(changes, new_area_id or area_id, new_status, new_dept_id, 1)
+
+
+def apply_seat_counter_changes(changes):
+    """
+    将计数变化写入计数表（需在修改工位的同一事务中调用）
+
+    先补齐缺失的计数行，再用一条 UPDATE 按键累加各自的变化量，
+    固定两次查询，与工位数和涉及的（区域, 状态, 部门）组合数无关。
+    """
+    keys = sorted(key for key, count in changes.items() if count)
+    if not keys:
+        return
+
+    SeatStatusCounter.objects.bulk_create(
+        [
+            SeatStatusCounter(area_id=area_id, seat_status=seat_status, dept_id=dept_id, count=0)
+            for area_id, seat_status, dept_id in keys
+        ],
+        ignore_conflicts=True
+    )
+    conditions = [
+        (Q(area_id=area_id, seat_status=seat_status, dept_id=dept_id), changes[(area_id, seat_status, dept_id)])
+        for area_id, seat_status, dept_id in keys
+    ]
+    matches_any = Q()
+    for condition, _ in conditions:
+        matches_any |= condition
+    SeatStatusCounter.objects.filter(matches_any).update(
+        count=F('count') + Case(
+            *[When(condition, then=Value(delta)) for condition, delta in conditions],
+            default=Value(0),
+            output_field=IntegerField()
+        )
+    )
+
+
+def rebuild_seat_counters():
+    """
+    按工位表重新统计并校正计数表，返回被修正的计数行数
+
+    统计期间的并发修改可能导致结果偏差，建议在业务低峰期执行。
+    """
+    with transaction.atomic():
+        # 部门ID为NULL和空字符串的工位计入同一行
+        merged = Counter()
+        for row in Seat.objects.order_by().values('area_id', 'seat_status', 'current_dept_id').annotate(
+            count=Count('id')
+        ):
+            merged[(row['area_id'], row['seat_status'], row['current_dept_id'] or '')] += row['count']
+        existing = {
+            (counter.area_id, counter.seat_status, counter.dept_id): counter
+            for counter in SeatStatusCounter.objects.select_for_update()
+        }
+
+        to_update = []
+        for key, counter in existing.items():
+            count = merged.get(key, 0)
+            if counter.count != count:
+                counter.count = count
+                to_update.append(counter)
+        to_create = [
+            SeatStatusCounter(area_id=key[0], seat_status=key[1], dept_id=key[2], count=count)
+            for key, count in merged.items()
+            if key not in existing
+        ]
+
+        if to_update:
+            SeatStatusCounter.objects.bulk_update(to_update, ['count'])
+        if to_create:
+            SeatStatusCounter.objects.bulk_create(to_create)
+
+    return len(to_update) + len(to_create)
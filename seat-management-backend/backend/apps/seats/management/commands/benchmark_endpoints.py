@@ -0,0 +1,133 @@
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.test import Client
+from django.urls import reverse
+from django.utils import timezone
+from rest_framework_simplejwt.tokens import AccessToken
+from backend.apps.authentication.models import User as AuthUser
+from backend.apps.floors.models import Floor
+from backend.apps.seats.models import Seat
+from backend.apps.users.models import User
+from backend.apps.users.search_index import get_search_index
+from backend.apps.logs.models import SeatLog
+from backend.benchmarks import (
+    benchmark_request, compare_results, load_results, save_results, DEFAULT_THRESHOLDS
+)
+
+
+class Command(BaseCommand):
+    """
+    接口性能基准测试
+    """
+    help = (
+        '通过测试客户端请求楼层详情、搜索、工位列表和日志列表接口，记录延迟分位数、查询数和峰值内存，'
+        '指定基线时任一指标超出阈值即失败'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--iterations', type=int, default=100, help='每个接口的测量次数')
+        parser.add_argument('--warmup', type=int, default=3, help='测量前的预热次数')
+        parser.add_argument('--only', nargs='+', help='只测试指定接口')
+        parser.add_argument('--output', default='benchmark_results.json', help='结果文件路径')
+        parser.add_argument('--baseline', help='基线结果文件路径')
+        parser.add_argument('--update-baseline', action='store_true', help='将本次结果写入基线文件')
+        parser.add_argument(
+            '--latency-threshold', type=float, default=DEFAULT_THRESHOLDS['latency'],
+            help='延迟允许的增幅（相对基线，如0.2表示20%%）'
+        )
+        parser.add_argument(
+            '--memory-threshold', type=float, default=DEFAULT_THRESHOLDS['memory'],
+            help='峰值内存允许的增幅（相对基线）'
+        )
+        parser.add_argument(
+            '--query-threshold', type=int, default=DEFAULT_THRESHOLDS['queries'],
+            help='查询数允许增加的条数'
+        )
+        parser.add_argument('--search-keyword', help='搜索关键词（默认取第一个在职人员的姓）')
+        parser.add_argument('--username', default='benchmark', help='请求使用的管理员账号（不存在时创建）')
+
+    def handle(self, *args, **options):
+        scenarios = self.get_scenarios(options['search_keyword'])
+        if options['only']:
+            unknown = set(options['only']) - set(scenarios)
+            if unknown:
+                raise CommandError(f"未知接口: {', '.join(sorted(unknown))}，可选: {', '.join(scenarios)}")
+            scenarios = {name: scenarios[name] for name in options['only']}
+
+        headers = {'HTTP_AUTHORIZATION': f"Bearer {self.get_access_token(options['username'])}"}
+        client = Client()
+        if settings.SEARCH_INDEX_ENABLED:
+            # 预先建立搜索索引，测量的是索引建立后的检索
+            get_search_index().build()
+        results = {}
+        for name, (path, params) in scenarios.items():
+            result = benchmark_request(
+                client, path, params,
+                iterations=options['iterations'], warmup=options['warmup'], headers=headers
+            )
+            if result['status_code'] != 200:
+                raise CommandError(f"{name} 返回状态码 {result['status_code']}")
+            results[name] = result
+            self.stdout.write(
+                f"{name:<20} p50 {result['p50_ms']:>9.2f}ms  p95 {result['p95_ms']:>9.2f}ms  "
+                f"p99 {result['p99_ms']:>9.2f}ms  查询 {result['queries']:>4}  "
+                f"内存 {result['peak_memory_kb']:>9.1f}KB"
+            )
+
+        report = {
+            'generated_at': timezone.now().isoformat(),
+            'database': connection.vendor,
+            'dataset': {
+                'seats': Seat.objects.count(),
+                'users': User.objects.count(),
+                'seat_logs': SeatLog.objects.count(),
+            },
+            'results': results,
+        }
+        save_results(options['output'], report)
+        self.stdout.write(f"结果已写入 {options['output']}")
+
+        if not options['baseline']:
+            return
+        if options['update_baseline']:
+            save_results(options['baseline'], report)
+            self.stdout.write(f"基线已更新 {options['baseline']}")
+            return
+
+        regressions = compare_results(results, load_results(options['baseline']), {
+            'latency': options['latency_threshold'],
+            'memory': options['memory_threshold'],
+            'queries': options['query_threshold'],
+        })
+        if regressions:
+            for regression in regressions:
+                self.stderr.write(regression)
+            raise CommandError(f'{len(regressions)} 项指标超出基线阈值')
+        self.stdout.write(self.style.SUCCESS('所有指标均在基线阈值内'))
+
+    def get_scenarios(self, search_keyword=None):
+        """
+        测试的接口及参数：{名称: (路径, 查询参数)}
+        """
+        floor = Floor.objects.filter(status=1).order_by('id').first()
+        user = User.objects.filter(status=1).order_by('id').first()
+        if floor is None or user is None:
+            raise CommandError('数据库中没有楼层或人员，请先执行 seed_scale 生成数据')
+
+        return {
+            'user_floor_detail': (reverse('user_floor_detail', kwargs={'floor_id': floor.id}), {}),
+            'user_search': (reverse('user_search'), {'q': search_keyword or user.name[:1]}),
+            'admin_seats': (reverse('seat_list_create'), {'floor_id': floor.id, 'page': 1, 'page_size': 100}),
+            'admin_logs': (reverse('seat_log_list'), {}),
+        }
+
+    def get_access_token(self, username):
+        """
+        生成请求使用的访问令牌
+        """
+        user, created = AuthUser.objects.get_or_create(username=username, defaults={'is_admin': True})
+        if created:
+            user.set_unusable_password()
+            user.save(update_fields=['password'])
+        return AccessToken.for_user(user)
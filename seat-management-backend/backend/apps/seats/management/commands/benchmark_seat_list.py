@@ -0,0 +1,82 @@
+import time
+from django.core.management.base import BaseCommand
+from django.db import connection
+from backend.apps.venues.models import Venue
+from backend.apps.floors.models import Floor
+from backend.apps.areas.models import Area
+from backend.apps.seats.models import Seat
+from backend.apps.seats.serializers import SeatSerializer, serialize_seat_rows
+from backend.apps.seats.services import filter_seats_by_location
+from backend.benchmarks import QueryCounter
+
+
+# 每个区域的工位数
+SEATS_PER_AREA = 100
+
+
+class Command(BaseCommand):
+    """
+    工位列表序列化性能对比
+    """
+    help = '在临时测试数据库中对比 SeatSerializer 与只读快速路径在不同工位数量下的耗时和查询数'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--sizes', type=int, nargs='+', default=[1000, 10000, 50000],
+            help='测试的工位数量'
+        )
+
+    def handle(self, *args, **options):
+        old_name = connection.settings_dict['NAME']
+        connection.creation.create_test_db(verbosity=0, autoclobber=True, serialize=False)
+        try:
+            self.stdout.write(f"{'工位数':>8} {'实现':<10} {'耗时(秒)':>10} {'查询数':>8}")
+            for size in options['sizes']:
+                queryset = filter_seats_by_location(
+                    Seat.objects.all(), {'venue_id': self.create_venue(size).id}
+                ).order_by('area_id', 'seat_no')
+                legacy_data, legacy_time, legacy_queries = self.measure(
+                    lambda: SeatSerializer(queryset, many=True).data
+                )
+                lean_data, lean_time, lean_queries = self.measure(lambda: serialize_seat_rows(queryset))
+                if [dict(row) for row in legacy_data] != lean_data:
+                    self.stderr.write(self.style.ERROR(f'{size} 个工位时两种实现的输出不一致'))
+                self.stdout.write(f'{size:>8} {"serializer":<10} {legacy_time:>10.3f} {legacy_queries:>8}')
+                self.stdout.write(f'{size:>8} {"values":<10} {lean_time:>10.3f} {lean_queries:>8}')
+        finally:
+            connection.creation.destroy_test_db(old_name, verbosity=0)
+
+    def measure(self, func):
+        """
+        执行并返回（结果, 耗时, 查询数）
+        """
+        counter = QueryCounter()
+        with connection.execute_wrapper(counter):
+            start = time.perf_counter()
+            data = func()
+            elapsed = time.perf_counter() - start
+        return data, elapsed, counter.count
+
+    def create_venue(self, size):
+        """
+        创建包含指定数量工位的场地（半数工位已占用）
+        """
+        venue = Venue.objects.create(name=f'性能测试场地{size}', code=f'BENCH{size}', city='上海', address='测试地址')
+        floor = Floor.objects.create(venue=venue, floor_no='1F', floor_name='测试楼层')
+        area_count = (size + SEATS_PER_AREA - 1) // SEATS_PER_AREA
+        Area.objects.bulk_create([
+            Area(floor=floor, area_no=str(i + 1), area_name=f'区域{i + 1}') for i in range(area_count)
+        ])
+        areas = list(Area.objects.filter(floor=floor).order_by('id'))
+        Seat.objects.bulk_create([
+            Seat(
+                area=areas[i // SEATS_PER_AREA],
+                seat_no=f'{i // SEATS_PER_AREA + 1}-{i % SEATS_PER_AREA + 1}',
+                seat_status=i % 2,
+                current_user_id=f'user{i:05d}' if i % 2 else None,
+                current_user_name=f'用户{i}' if i % 2 else None,
+                bind_type=i % 2
+            )
+            for i in range(size)
+        ], batch_size=1000)
+        return venue
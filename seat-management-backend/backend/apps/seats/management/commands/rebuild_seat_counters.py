@@ -0,0 +1,13 @@
+from django.core.management.base import BaseCommand
+from backend.apps.seats.counters import rebuild_seat_counters
+
+
+class Command(BaseCommand):
+    """
+    校正工位状态计数
+    """
+    help = '按工位表重新统计并校正工位状态计数（建议在业务低峰期执行）'
+
+    def handle(self, *args, **options):
+        corrected_count = rebuild_seat_counters()
+        self.stdout.write(self.style.SUCCESS(f'共修正 {corrected_count} 条计数'))
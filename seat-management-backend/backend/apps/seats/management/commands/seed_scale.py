@@ -0,0 +1,325 @@
+import math
+import random
+import time
+from datetime import datetime, timedelta
+from itertools import islice
+from django.core.management.base import BaseCommand, CommandError
+from django.core.management.color import no_style
+from django.db import connection, transaction
+from django.db.models import DateTimeField
+from django.utils import timezone
+from backend.apps.venues.models import Venue
+from backend.apps.floors.models import Floor
+from backend.apps.areas.models import Area
+from backend.apps.seats.models import Seat, SeatStatusCounter
+from backend.apps.seats.counters import rebuild_seat_counters
+from backend.apps.users.models import User
+from backend.apps.users.pinyin import get_pinyin_keys
+from backend.apps.logs.models import SeatLog, SeatLogDailyRollup, SeatLogRollupState
+from backend.apps.logs.services import rollup_seat_logs
+
+
+# 部门树每级的子部门数（事业部 → 中心 → 部门）
+DEPT_BRANCHING = 10
+
+SURNAMES = '王李张刘陈杨黄赵吴周徐孙马朱胡郭何高林罗郑梁谢宋唐许韩冯邓曹彭曾肖田董袁潘于蒋蔡余杜叶程苏魏吕丁任沈'
+GIVEN_NAMES = '伟芳娜敏静丽强磊军洋勇艳杰娟涛明超秀霞平刚桂英华玉萍红鹏飞斌宇浩凯晨欣怡婷雪琳子轩梓涵一诺'
+POSITIONS = ['工程师', '高级工程师', '产品经理', '设计师', '测试工程师', '运营专员', '销售经理', '人事专员', '财务专员', '部门经理']
+
+# 日志操作类型及权重
+LOG_TYPE_WEIGHTS = {2: 40, 3: 30, 4: 10, 5: 5, 7: 10, 9: 5}
+
+# 清空数据的顺序（先子表后父表）
+SEED_MODELS = [SeatLog, SeatLogDailyRollup, SeatLogRollupState, SeatStatusCounter, Seat, Area, Floor, Venue, User]
+
+
+class Command(BaseCommand):
+    """
+    生成大规模压测数据
+    """
+    help = (
+        '按指定规模确定性地生成场地、楼层、区域、工位、人员和工位变更日志（executemany批量写入，主键固定）。'
+        '相同参数和 --end-date 生成完全相同的数据'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--venues', type=int, default=20, help='场地数')
+        parser.add_argument('--floors', type=int, default=30, help='每个场地的楼层数')
+        parser.add_argument('--areas', type=int, default=40, help='每个楼层的区域数')
+        parser.add_argument('--seats', type=int, default=120, help='每个区域的工位数')
+        parser.add_argument('--users', type=int, default=100000, help='人员数')
+        parser.add_argument('--depts', type=int, default=500, help='部门数（三级部门树的末级部门）')
+        parser.add_argument('--logs', type=int, default=1000000, help='工位变更日志数')
+        parser.add_argument('--log-days', type=int, default=365, help='日志覆盖的天数')
+        parser.add_argument('--end-date', help='日志截止日期（YYYY-MM-DD，默认今天）')
+        parser.add_argument('--occupancy', type=float, default=0.6, help='工位占用比例')
+        parser.add_argument('--seed', type=int, default=42, help='随机种子')
+        parser.add_argument('--batch-size', type=int, default=5000, help='每次批量写入的行数')
+        parser.add_argument('--clear', action='store_true', help='生成前清空工位、人员和日志相关数据')
+        parser.add_argument('--no-rollup', action='store_true', help='生成后不执行日志按日汇总')
+
+    def handle(self, *args, **options):
+        if options['depts'] < 1 or options['depts'] > DEPT_BRANCHING ** 3:
+            raise CommandError(f'部门数需在 1 到 {DEPT_BRANCHING ** 3} 之间')
+        if not 0 <= options['occupancy'] <= 1:
+            raise CommandError('工位占用比例需在 0 到 1 之间')
+
+        self.options = options
+        self.batch_size = options['batch_size']
+        self.end_time = self.get_end_time(options['end_date'])
+
+        if options['clear']:
+            self.clear()
+        elif any(model.objects.exists() for model in (Venue, Seat, User, SeatLog)):
+            raise CommandError('数据库中已有数据，请使用 --clear 清空后再生成')
+
+        with transaction.atomic():
+            self.run_step('场地', self.create_venues)
+            self.run_step('楼层', self.create_floors)
+            self.run_step('区域', self.create_areas)
+            self.run_step('人员', self.create_users)
+            self.run_step('工位', self.create_seats)
+            self.run_step('工位变更日志', self.create_logs)
+            self.reset_sequences()
+            self.run_step('工位状态计数', rebuild_seat_counters)
+
+        if not options['no_rollup'] and options['logs']:
+            self.run_step('日志按日汇总', rollup_seat_logs)
+
+    def get_end_time(self, end_date):
+        """
+        日志截止时间（截止日期次日零点，未指定时为当前时间）
+        """
+        if not end_date:
+            return timezone.now().replace(microsecond=0)
+        try:
+            date = datetime.strptime(end_date, '%Y-%m-%d')
+        except ValueError:
+            raise CommandError('截止日期格式应为 YYYY-MM-DD')
+        return timezone.make_aware(date + timedelta(days=1))
+
+    def run_step(self, label, func):
+        """
+        执行一个生成步骤并输出行数和耗时
+        """
+        start = time.perf_counter()
+        count = func()
+        self.stdout.write(f'{label}: {count} 行，耗时 {time.perf_counter() - start:.1f} 秒')
+
+    def rng(self, name):
+        """
+        每类数据使用独立的随机数生成器，修改某类数据的规模不影响其他数据
+        """
+        return random.Random(f"{self.options['seed']}:{name}")
+
+    def clear(self):
+        """
+        清空压测涉及的数据表
+        """
+        with transaction.atomic(), connection.cursor() as cursor:
+            for model in SEED_MODELS:
+                cursor.execute(f'DELETE FROM {connection.ops.quote_name(model._meta.db_table)}')
+        self.stdout.write('已清空工位、人员和日志相关数据')
+
+    def bulk_insert(self, model, fields, rows):
+        """
+        用 executemany 分批写入，返回写入行数
+
+        rows 为与 fields 对应的元组。bulk_create 逐字段处理的开销远大于写入本身，
+        这里只转换时间字段，其余未指定的字段统一使用默认值（auto_now 字段为当前时间）。
+        """
+        opts = model._meta
+        quote_name = connection.ops.quote_name
+        now = timezone.now()
+        columns = [opts.get_field(name).column for name in fields]
+        defaults = []
+        for field in opts.concrete_fields:
+            if field.attname in fields or field.primary_key:
+                continue
+            if getattr(field, 'auto_now', False) or getattr(field, 'auto_now_add', False):
+                value = now
+            else:
+                value = field.get_default()
+            columns.append(field.column)
+            defaults.append(field.get_db_prep_save(value, connection))
+        defaults = tuple(defaults)
+        datetime_indexes = [
+            i for i, name in enumerate(fields) if isinstance(opts.get_field(name), DateTimeField)
+        ]
+        sql = 'INSERT INTO {} ({}) VALUES ({})'.format(
+            quote_name(opts.db_table),
+            ', '.join(quote_name(column) for column in columns),
+            ', '.join(['%s'] * len(columns))
+        )
+
+        rows = iter(rows)
+        count = 0
+        with connection.cursor() as cursor:
+            while True:
+                batch = list(islice(rows, self.batch_size))
+                if not batch:
+                    return count
+                if datetime_indexes:
+                    batch = [list(row) for row in batch]
+                    for row in batch:
+                        for i in datetime_indexes:
+                            row[i] = connection.ops.adapt_datetimefield_value(row[i])
+                cursor.executemany(sql, [tuple(row) + defaults for row in batch])
+                count += len(batch)
+
+    def reset_sequences(self):
+        """
+        显式指定主键后重置自增序列（SQLite无需处理）
+        """
+        statements = connection.ops.sequence_reset_sql(no_style(), [Venue, Floor, Area, Seat, SeatLog])
+        if statements:
+            with connection.cursor() as cursor:
+                for sql in statements:
+                    cursor.execute(sql)
+
+    @property
+    def floor_total(self):
+        return self.options['venues'] * self.options['floors']
+
+    @property
+    def area_total(self):
+        return self.floor_total * self.options['areas']
+
+    @property
+    def seat_total(self):
+        return self.area_total * self.options['seats']
+
+    def create_venues(self):
+        cities = ['北京', '上海', '广州', '深圳', '杭州', '成都', '武汉', '南京']
+        return self.bulk_insert(Venue, ['id', 'name', 'code', 'city', 'address', 'floorCount'], (
+            (v + 1, f'压测场地{v + 1:03d}', f'SCALE{v + 1:03d}', cities[v % len(cities)], f'压测地址{v + 1}号', self.options['floors'])
+            for v in range(self.options['venues'])
+        ))
+
+    def create_floors(self):
+        floors = self.options['floors']
+        return self.bulk_insert(Floor, ['id', 'venue_id', 'floor_no', 'floor_name', 'sort_order'], (
+            (i + 1, i // floors + 1, f'{i % floors + 1}F', f'{i % floors + 1}楼', i % floors + 1)
+            for i in range(self.floor_total)
+        ))
+
+    def create_areas(self):
+        areas = self.options['areas']
+        return self.bulk_insert(Area, ['id', 'floor_id', 'area_no', 'area_name', 'area_type', 'seat_count'], (
+            (i + 1, i // areas + 1, str(i % areas + 1), f'区域{i % areas + 1}', 1 if i % 4 else 2, self.options['seats'])
+            for i in range(self.area_total)
+        ))
+
+    def create_users(self):
+        """
+        生成人员，在职人员（ID, 姓名, 部门ID）按顺序保存，用于分配工位；全部人员的姓名按序保存，用于生成日志
+        """
+        rng = self.rng('users')
+        self.active_users = []
+        self.user_names = []
+
+        def generate():
+            for i in range(self.options['users']):
+                user_id = f'U{i + 1:07d}'
+                name = rng.choice(SURNAMES) + ''.join(rng.choices(GIVEN_NAMES, k=rng.randint(1, 2)))
+                dept_id, dept_name = self.get_dept(i % self.options['depts'])
+                user_status = 0 if rng.random() < 0.05 else 1
+                self.user_names.append(name)
+                if user_status == 1:
+                    self.active_users.append((user_id, name, dept_id))
+                yield (
+                    user_id, name, *get_pinyin_keys(name), dept_id, dept_name, rng.choice(POSITIONS),
+                    f'138{i:08d}', f'u{i + 1:07d}@example.com', user_status
+                )
+
+        return self.bulk_insert(
+            User, [
+                'id', 'name', 'name_pinyin', 'name_initials', 'dept_id', 'dept_name', 'position',
+                'phone', 'email', 'status'
+            ],
+            generate()
+        )
+
+    def get_dept(self, index):
+        """
+        末级部门的ID和名称（ID按事业部/中心/部门三级编码）
+        """
+        group, center, team = index // DEPT_BRANCHING ** 2, index // DEPT_BRANCHING % DEPT_BRANCHING, index % DEPT_BRANCHING
+        return (
+            f'D{group + 1:02d}{center + 1:02d}{team + 1:02d}',
+            f'事业部{group + 1}-中心{center + 1}-部门{team + 1}'
+        )
+
+    def get_seat_no(self, seat_index):
+        seats = self.options['seats']
+        return f'{seat_index // seats % self.options["areas"] + 1}-{seat_index % seats + 1}'
+
+    def create_seats(self):
+        """
+        生成工位，按占用比例依次分配在职人员，其余工位少量设为维修中或停用
+        """
+        rng = self.rng('seats')
+        seats = self.options['seats']
+        cols = math.ceil(math.sqrt(seats * 1.5))
+        rows = math.ceil(seats / cols)
+        users = iter(self.active_users)
+
+        def generate():
+            for i in range(self.seat_total):
+                position = i % seats
+                roll = rng.random()
+                user = next(users, None) if roll < self.options['occupancy'] else None
+                if user:
+                    seat_status, bind_type = 1, 1
+                else:
+                    seat_status, bind_type, user = 3 if roll > 0.99 else 2 if roll > 0.97 else 0, 0, (None, None, None)
+                yield (
+                    i + 1, i // seats + 1, self.get_seat_no(i), seat_status, bind_type, *user,
+                    position // cols + 1, position % cols + 1,
+                    (position % cols + 0.5) / cols, (position // cols + 0.5) / rows
+                )
+
+        return self.bulk_insert(Seat, [
+            'id', 'area_id', 'seat_no', 'seat_status', 'bind_type',
+            'current_user_id', 'current_user_name', 'current_dept_id',
+            'grid_row', 'grid_col', 'position_x', 'position_y'
+        ], generate())
+
+    def create_logs(self):
+        """
+        生成工位变更日志，操作时间随ID递增，均匀分布在 --log-days 天内
+        """
+        rng = self.rng('logs')
+        log_count = self.options['logs']
+        if not log_count or not self.seat_total or not self.options['users']:
+            return 0
+
+        start_time = self.end_time - timedelta(days=self.options['log_days'])
+        step = (self.end_time - start_time) / log_count
+        operation_types = list(LOG_TYPE_WEIGHTS)
+        weights = list(LOG_TYPE_WEIGHTS.values())
+        type_names = dict(SeatLog.OPERATION_TYPE_CHOICES)
+
+        def random_user():
+            index = rng.randrange(self.options['users'])
+            return f'U{index + 1:07d}', self.user_names[index]
+
+        def generate():
+            for i in range(log_count):
+                seat_index = rng.randrange(self.seat_total)
+                operation_type = rng.choices(operation_types, weights)[0]
+                old_user_id, old_user_name = random_user() if operation_type in (3, 4, 9) else (None, None)
+                new_user_id, new_user_name = random_user() if operation_type in (2, 4, 5) else (None, None)
+                operator_id = 'system' if operation_type == 9 else f'admin{rng.randrange(20) + 1:02d}'
+                yield (
+                    i + 1, seat_index + 1, self.get_seat_no(seat_index), operation_type,
+                    old_user_id, old_user_name, new_user_id, new_user_name,
+                    operator_id, '系统' if operator_id == 'system' else f'管理员{operator_id[5:]}',
+                    start_time + step * i, f'压测数据：{type_names[operation_type]}'
+                )
+
+        return self.bulk_insert(SeatLog, [
+            'id', 'seat_id', 'seat_no', 'operation_type', 'old_user_id', 'old_user_name',
+            'new_user_id', 'new_user_name', 'operator_id', 'operator_name',
+            'operation_time', 'operation_remark'
+        ], generate())
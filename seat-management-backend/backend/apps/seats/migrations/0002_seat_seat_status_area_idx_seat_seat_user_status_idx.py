@@ -0,0 +1,22 @@
+# Generated by Django 5.0 on 2026-10-18 16:53
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('areas', '0001_initial'),
+        ('seats', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='seat',
+            index=models.Index(fields=['seat_status', 'area'], name='seat_status_area_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='seat',
+            index=models.Index(fields=['current_user_id', 'seat_status'], name='seat_user_status_idx'),
+        ),
+    ]
@@ -0,0 +1,48 @@
+# Generated by Django 5.0 on 2026-10-18 17:05
+
+import django.db.models.deletion
+from django.db import migrations, models
+from django.db.models import Count
+
+
+def populate_counters(apps, schema_editor):
+    """
+    按现有工位初始化状态计数
+    """
+    Seat = apps.get_model('seats', 'Seat')
+    SeatStatusCounter = apps.get_model('seats', 'SeatStatusCounter')
+    counts = {}
+    for row in Seat.objects.order_by().values('area_id', 'seat_status', 'current_dept_id').annotate(count=Count('id')):
+        key = (row['area_id'], row['seat_status'], row['current_dept_id'] or '')
+        counts[key] = counts.get(key, 0) + row['count']
+    SeatStatusCounter.objects.bulk_create([
+        SeatStatusCounter(area_id=area_id, seat_status=seat_status, dept_id=dept_id, count=count)
+        for (area_id, seat_status, dept_id), count in counts.items()
+    ])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('areas', '0001_initial'),
+        ('seats', '0002_seat_seat_status_area_idx_seat_seat_user_status_idx'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='SeatStatusCounter',
+            fields=[
+                ('id', models.AutoField(primary_key=True, serialize=False, verbose_name='计数ID')),
+                ('seat_status', models.SmallIntegerField(help_text='0:闲置, 1:占用, 2:维修中, 3:停用', verbose_name='工位状态')),
+                ('dept_id', models.CharField(blank=True, default='', help_text='工位当前绑定人员的部门，未绑定时为空字符串', max_length=50, verbose_name='部门ID')),
+                ('count', models.IntegerField(default=0, verbose_name='工位数')),
+                ('area', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='seat_counter_set', to='areas.area', verbose_name='所属区域')),
+            ],
+            options={
+                'verbose_name': '工位状态计数',
+                'verbose_name_plural': '工位状态计数',
+                'unique_together': {('area', 'seat_status', 'dept_id')},
+            },
+        ),
+        migrations.RunPython(populate_counters, migrations.RunPython.noop),
+    ]
@@ -76,6 +76,52 @@ class Seat(models.Model):
         verbose_name = "工位"
         verbose_name_plural = "工位"
         unique_together = ('area', 'seat_no')  # 区域内工位编号唯一
+        indexes = [
+            # 按状态查询区域内工位（可用工位、状态统计）
+            models.Index(fields=['seat_status', 'area'], name='seat_status_area_idx'),
+            # 按人员查询绑定工位
+            models.Index(fields=['current_user_id', 'seat_status'], name='seat_user_status_idx'),
+        ]
 
     def __str__(self):
-        return f"{self.area.floor.venue.name} - {self.area.floor.floor_no} - {self.area.area_no} - {self.seat_no}"
\ No newline at end of file
+        return f"{self.area.floor.venue.name} - {self.area.floor.floor_no} - {self.area.area_no} - {self.seat_no}"
+
+class SeatStatusCounter(models.Model):
+    """
+    工位状态计数（按区域、状态、部门）
+
+    与工位变更在同一事务中维护，用于占用统计；可通过 rebuild_seat_counters 命令校正。
+    """
+    id = models.AutoField(
+        primary_key=True,
+        verbose_name="计数ID"
+    )
+    area = models.ForeignKey(
+        Area,
+        on_delete=models.CASCADE,
+        related_name='seat_counter_set',
+        verbose_name="所属区域"
+    )
+    seat_status = models.SmallIntegerField(
+        verbose_name="工位状态",
+        help_text="0:闲置, 1:占用, 2:维修中, 3:停用"
+    )
+    dept_id = models.CharField(
+        max_length=50,
+        blank=True,
+        default='',
+        verbose_name="部门ID",
+        help_text="工位当前绑定人员的部门，未绑定时为空字符串"
+    )
+    count = models.IntegerField(
+        default=0,
+        verbose_name="工位数"
+    )
+
+    class Meta:
+        verbose_name = "工位状态计数"
+        verbose_name_plural = "工位状态计数"
+        unique_together = ('area', 'seat_status', 'dept_id')
+
+    def __str__(self):
+        return f"{self.area_id} - {self.seat_status} - {self.dept_id} - {self.count}"
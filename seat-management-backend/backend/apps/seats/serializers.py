@@ -78,6 +78,90 @@ class SeatSerializer(serializers.ModelSerializer):
         return instance
 
 
+# 工位列表只读查询的字段，顺序与 SeatSerializer 输出字段一致
+SEAT_LIST_VALUES = (
+    'id', 'area__area_name', 'area__area_no',
+    'area__floor__floor_name', 'area__floor__floor_no', 'area__floor__venue__name',
+    'seat_no', 'seat_status', 'grid_row', 'grid_col',
+    'position_x', 'position_y', 'current_user_id',
+    'current_user_name', 'current_dept_id', 'bind_type',
+    'created_at', 'updated_at'
+)
+
+
+def serialize_seat_rows(queryset):
+    """
+    工位列表只读序列化
+
+    通过一次关联 values_list 查询取出区域、楼层、场地信息并手工映射为字典，
+    输出与 SeatSerializer(many=True).data 一致。
+    """
+    datetime_to_representation = serializers.DateTimeField().to_representation
+    data = []
+    for (
+        seat_id, area_name, area_no, floor_name, floor_no, venue_name,
+        seat_no, seat_status, grid_row, grid_col, position_x, position_y,
+        current_user_id, current_user_name, current_dept_id, bind_type,
+        created_at, updated_at
+    ) in queryset.values_list(*SEAT_LIST_VALUES):
+        data.append({
+            'id': seat_id,
+            'area_name': area_name,
+            'area_no': area_no,
+            'floor_name': floor_name,
+            'floor_no': floor_no,
+            'venue_name': venue_name,
+            'seat_no': seat_no,
+            'seat_status': seat_status,
+            'grid_row': grid_row,
+            'grid_col': grid_col,
+            'position_x': position_x,
+            'position_y': position_y,
+            'current_user_id': current_user_id,
+            'current_user_name': current_user_name,
+            'current_dept_id': current_dept_id,
+            'bind_type': bind_type,
+            'created_at': datetime_to_representation(created_at) if created_at is not None else None,
+            'updated_at': datetime_to_representation(updated_at) if updated_at is not None else None,
+        })
+    return data
+
+
+class SeatListQuerySerializer(serializers.Serializer):
+    """
+    工位列表查询序列化器（不传页码时返回全部工位）
+    """
+    page = serializers.IntegerField(
+        required=False,
+        min_value=1,
+        label="页码"
+    )
+    page_size = serializers.IntegerField(
+        default=100,
+        min_value=1,
+        max_value=1000,
+        label="每页条数"
+    )
+
+
+class SeatStatisticsQuerySerializer(serializers.Serializer):
+    """
+    工位统计查询序列化器（范围优先级：区域 > 楼层 > 场地）
+    """
+    venue_id = serializers.IntegerField(
+        required=False,
+        label="场地ID"
+    )
+    floor_id = serializers.IntegerField(
+        required=False,
+        label="楼层ID"
+    )
+    area_id = serializers.IntegerField(
+        required=False,
+        label="区域ID"
+    )
+
+
 class SeatGenerateSerializer(serializers.Serializer):
     """
     工位生成序列化器
@@ -112,6 +196,23 @@ class SeatBindSerializer(serializers.Serializer):
     )
 
 
+class SeatBatchBindSerializer(serializers.Serializer):
+    """
+    工位批量绑定序列化器
+    """
+    items = SeatBindSerializer(
+        many=True,
+        allow_empty=False,
+        max_length=1000,
+        label="绑定列表"
+    )
+    atomic = serializers.BooleanField(
+        default=False,
+        label="是否整批回滚",
+        help_text="为true时任一项失败则整批均不生效"
+    )
+
+
 class SeatUnbindSerializer(serializers.Serializer):
     """
     工位解绑序列化器
@@ -122,6 +223,54 @@ class SeatUnbindSerializer(serializers.Serializer):
     )
 
 
+class SeatBatchUpdateSerializer(serializers.Serializer):
+    """
+    工位批量修改序列化器
+    """
+    area_id = serializers.IntegerField(
+        required=False,
+        label="区域ID"
+    )
+    floor_id = serializers.IntegerField(
+        required=False,
+        label="楼层ID"
+    )
+    seat_ids = serializers.ListField(
+        child=serializers.IntegerField(),
+        required=False,
+        allow_empty=False,
+        max_length=5000,
+        label="工位ID列表"
+    )
+    seat_status = serializers.ChoiceField(
+        choices=[0, 2, 3],
+        required=False,
+        label="目标状态",
+        help_text="0:闲置, 2:维修中, 3:停用（范围内有已绑定人员的工位时需同时解绑）"
+    )
+    unbind = serializers.BooleanField(
+        default=False,
+        label="是否解绑人员"
+    )
+    
+    def validate(self, data):
+        """
+        验证范围和操作
+        """
+        scopes = [key for key in ('area_id', 'floor_id', 'seat_ids') if key in data]
+        if len(scopes) != 1:
+            raise serializers.ValidationError(
+                "区域ID、楼层ID、工位ID列表必须且只能指定一个",
+                code='scope_invalid'
+            )
+        if 'seat_status' not in data and not data['unbind']:
+            raise serializers.ValidationError(
+                "必须指定目标状态或解绑操作",
+                code='operation_invalid'
+            )
+        return data
+
+
 class SeatTransferSerializer(serializers.Serializer):
     """
     工位更换序列化器
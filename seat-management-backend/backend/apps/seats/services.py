@@ -1,8 +1,15 @@
 import math
 from django.db import transaction
-from backend.apps.seats.models import Seat
+from django.utils import timezone
+from backend.apps.seats.models import Seat, SeatStatusCounter
 from backend.apps.users.models import User
 from backend.apps.logs.models import SeatLog
+from backend.apps.logs.writer import write_seat_log, write_seat_logs
+from backend.apps.users.search_index import refresh_search_seats
+from backend.apps.seats.counters import (
+    new_counter_changes, add_seat_count, move_seat_count, apply_seat_counter_changes
+)
+from backend.exports import EXPORT_CHUNK_SIZE, format_export_time
 
 
 def generate_seats(area_id, count):
@@ -42,12 +49,20 @@ def generate_seats(area_id, count):
         )
         seats.append(seat)
     
-    # 批量创建工位
-    Seat.objects.bulk_create(seats)
+    with transaction.atomic():
+        # 批量创建工位
+        Seat.objects.bulk_create(seats)
+        
+        # 更新工位状态计数
+        changes = new_counter_changes()
+        add_seat_count(changes, area_id, 0, None, count)
+        apply_seat_counter_changes(changes)
+        
+        # 更新区域工位数
+        area.seat_count = count
+        area.save()
     
-    # 更新区域工位数
-    area.seat_count = count
-    area.save()
+    refresh_search_seats(area_ids=[area_id])
     
     return count
 
@@ -71,6 +86,8 @@ def bind_user_to_seat(seat_id, user_id, bind_type=1, operator_id="system", opera
         # 记录操作前状态
         old_user_id = seat.current_user_id
         old_user_name = seat.current_user_name
+        changes = new_counter_changes()
+        move_seat_count(changes, seat.area_id, seat.seat_status, seat.current_dept_id, 1, user.dept_id)
         
         # 更新工位信息
         seat.current_user_id = user_id
@@ -79,9 +96,10 @@ def bind_user_to_seat(seat_id, user_id, bind_type=1, operator_id="system", opera
         seat.seat_status = 1  # 状态改为占用
         seat.bind_type = bind_type
         seat.save()
+        apply_seat_counter_changes(changes)
         
         # 记录操作日志
-        SeatLog.objects.create(
+        write_seat_log(
             seat_id=seat_id,
             seat_no=seat.seat_no,
             operation_type=2 if bind_type == 1 else 5,  # 2:绑定人员, 5:额外绑定
@@ -94,9 +112,116 @@ def bind_user_to_seat(seat_id, user_id, bind_type=1, operator_id="system", opera
             operation_remark=f'绑定用户 {user.name} 到工位 {seat.seat_no}'
         )
         
+        refresh_search_seats([seat.id])
+        
         return seat
 
 
+def batch_bind_users_to_seats(items, atomic=False, operator_id="system", operator_name="系统"):
+    """
+    批量绑定人员到工位
+
+    一次有序查询锁定全部目标工位，一次查询加载全部人员，校验后通过
+    bulk_update 更新工位、bulk_create 写入日志，逐项返回处理结果。
+    atomic 为 True 时只要有一项失败，整批均不生效。
+    """
+    seat_ids = {item['seat_id'] for item in items}
+    user_ids = {item['user_id'] for item in items}
+    
+    with transaction.atomic():
+        # 按ID顺序加锁，避免并发批次之间死锁
+        seats = {
+            seat.id: seat
+            for seat in Seat.objects.select_for_update().filter(id__in=seat_ids).order_by('id')
+        }
+        users = User.objects.in_bulk(user_ids)
+        
+        results = []
+        bound_seats = []
+        logs = []
+        claimed_seat_ids = set()
+        changes = new_counter_changes()
+        now = timezone.now()
+        
+        for item in items:
+            seat_id = item['seat_id']
+            user_id = item['user_id']
+            bind_type = item.get('bind_type', 1)
+            seat = seats.get(seat_id)
+            user = users.get(user_id)
+            
+            # 检查工位和人员状态
+            error = None
+            if seat is None:
+                error = "工位不存在"
+            elif seat_id in claimed_seat_ids:
+                error = "工位在本批次中重复"
+            elif seat.seat_status != 0:
+                error = "工位未闲置，无法绑定"
+            elif user is None:
+                error = "人员不存在"
+            elif user.status != 1:
+                error = "人员非在职状态，无法绑定"
+            
+            if error:
+                results.append({'seat_id': seat_id, 'user_id': user_id, 'success': False, 'detail': error})
+                continue
+            
+            claimed_seat_ids.add(seat_id)
+            move_seat_count(changes, seat.area_id, seat.seat_status, seat.current_dept_id, 1, user.dept_id)
+            
+            # 更新工位信息
+            seat.current_user_id = user_id
+            seat.current_user_name = user.name
+            seat.current_dept_id = user.dept_id
+            seat.seat_status = 1  # 状态改为占用
+            seat.bind_type = bind_type
+            seat.updated_at = now
+            bound_seats.append(seat)
+            
+            # 记录操作日志
+            logs.append(SeatLog(
+                seat_id=seat_id,
+                seat_no=seat.seat_no,
+                operation_type=2 if bind_type == 1 else 5,  # 2:绑定人员, 5:额外绑定
+                old_user_id=None,
+                old_user_name=None,
+                new_user_id=user_id,
+                new_user_name=user.name,
+                operator_id=operator_id,
+                operator_name=operator_name,
+                operation_remark=f'批量绑定用户 {user.name} 到工位 {seat.seat_no}'
+            ))
+            results.append({
+                'seat_id': seat_id,
+                'user_id': user_id,
+                'success': True,
+                'detail': f'成功将 {user.name} 绑定到工位 {seat.seat_no}'
+            })
+        
+        failed_count = len(results) - len(bound_seats)
+        
+        # 整批模式下存在失败项时全部不生效
+        if atomic and failed_count:
+            for result in results:
+                if result['success']:
+                    result['success'] = False
+                    result['detail'] = '批次中存在失败项，已整体回滚'
+            return {'success_count': 0, 'failed_count': len(results), 'results': results}
+        
+        if bound_seats:
+            Seat.objects.bulk_update(
+                bound_seats,
+                ['current_user_id', 'current_user_name', 'current_dept_id', 'seat_status', 'bind_type', 'updated_at']
+            )
+            write_seat_logs(logs)
+            apply_seat_counter_changes(changes)
+            
+            refresh_search_seats(seat.id for seat in bound_seats)
+        
+        return {'success_count': len(bound_seats), 'failed_count': failed_count, 'results': results}
+
+
 def unbind_user_from_seat(seat_id, operator_id="system", operator_name="系统"):
     """
     解绑人员与工位
@@ -111,6 +236,8 @@ def unbind_user_from_seat(seat_id, operator_id="system", operator_name="系统")
         # 记录操作前状态
         user_id = seat.current_user_id
         user_name = seat.current_user_name
+        changes = new_counter_changes()
+        move_seat_count(changes, seat.area_id, seat.seat_status, seat.current_dept_id, 0, None)
         
         # 更新工位信息
         seat.current_user_id = None
@@ -119,10 +246,11 @@ def unbind_user_from_seat(seat_id, operator_id="system", operator_name="系统")
         seat.seat_status = 0  # 状态改为闲置
         seat.bind_type = 0  # 改为未绑定
         seat.save()
+        apply_seat_counter_changes(changes)
         
         # 记录操作日志
         if user_id:
-            SeatLog.objects.create(
+            write_seat_log(
                 seat_id=seat_id,
                 seat_no=seat.seat_no,
                 operation_type=3,  # 3:解绑人员
@@ -135,9 +263,109 @@ def unbind_user_from_seat(seat_id, operator_id="system", operator_name="系统")
                 operation_remark=f'解绑用户 {user_name} 从工位 {seat.seat_no}'
             )
         
+        refresh_search_seats([seat.id])
+        
         return seat
 
 
+def batch_update_seats(area_id=None, floor_id=None, seat_ids=None, seat_status=None, unbind=False,
+                       operator_id="system", operator_name="系统"):
+    """
+    批量修改工位状态或解绑人员
+
+    按区域、楼层或工位ID列表确定范围：一次查询锁定并读取范围内工位，
+    一次 UPDATE 修改状态和绑定信息，一次批量插入写入日志
+    （3:解绑人员, 7:修改工位信息）。
+    修改状态和解绑相互独立：不解绑时范围内有已绑定人员的工位则报错，不修改任何工位；
+    解绑并修改状态时工位改为目标状态；仅解绑时工位改为闲置。
+    """
+    from backend.apps.areas.models import Area
+    
+    # 构建范围（楼层范围使用子查询，避免加锁时连带锁定区域表）
+    if area_id is not None:
+        scope = Seat.objects.filter(area_id=area_id)
+    elif floor_id is not None:
+        scope = Seat.objects.filter(area_id__in=Area.objects.filter(floor_id=floor_id).values('id'))
+    elif seat_ids is not None:
+        scope = Seat.objects.filter(id__in=seat_ids)
+    else:
+        raise ValueError("必须指定区域、楼层或工位ID列表")
+    
+    if seat_status is None and not unbind:
+        raise ValueError("必须指定目标状态或解绑操作")
+    
+    # 仅解绑时只处理已绑定人员的工位
+    if seat_status is None:
+        scope = scope.filter(current_user_id__isnull=False)
+    
+    with transaction.atomic():
+        seats = list(scope.select_for_update().order_by('id').values(
+            'id', 'area_id', 'seat_no', 'seat_status', 'current_user_id', 'current_user_name',
+            'current_dept_id'
+        ))
+        if not seats:
+            return {'matched_count': 0, 'unbound_count': 0, 'status_changed_count': 0}
+        
+        occupied_count = sum(1 for seat in seats if seat['current_user_id'])
+        if occupied_count and not unbind:
+            raise ValueError(f"范围内有 {occupied_count} 个工位已绑定人员，修改状态需同时解绑")
+        
+        new_status = 0 if seat_status is None else seat_status
+        
+        # 只更新已锁定的工位（范围内之后新增或新绑定的工位不受影响），不解绑时工位均未绑定人员
+        Seat.objects.filter(id__in=[seat['id'] for seat in seats]).update(
+            seat_status=new_status,
+            current_user_id=None,
+            current_user_name=None,
+            current_dept_id=None,
+            bind_type=0,
+            updated_at=timezone.now()
+        )
+        
+        # 记录操作日志
+        logs = []
+        unbound_count = 0
+        status_changed_count = 0
+        changes = new_counter_changes()
+        for seat in seats:
+            move_seat_count(changes, seat['area_id'], seat['seat_status'], seat['current_dept_id'], new_status, None)
+            if seat['current_user_id']:
+                unbound_count += 1
+                logs.append(SeatLog(
+                    seat_id=seat['id'],
+                    seat_no=seat['seat_no'],
+                    operation_type=3,  # 3:解绑人员
+                    old_user_id=seat['current_user_id'],
+                    old_user_name=seat['current_user_name'],
+                    new_user_id=None,
+                    new_user_name=None,
+                    operator_id=operator_id,
+                    operator_name=operator_name,
+                    operation_remark=f'批量解绑用户 {seat["current_user_name"]} 从工位 {seat["seat_no"]}'
+                ))
+            if seat['seat_status'] != new_status and seat_status is not None:
+                status_changed_count += 1
+                logs.append(SeatLog(
+                    seat_id=seat['id'],
+                    seat_no=seat['seat_no'],
+                    operation_type=7,  # 7:修改工位信息
+                    operator_id=operator_id,
+                    operator_name=operator_name,
+                    operation_remark=f'批量修改工位 {seat["seat_no"]} 状态',
+                    extra_info={'old_seat_status': seat['seat_status'], 'new_seat_status': new_status}
+                ))
+        write_seat_logs(logs)
+        apply_seat_counter_changes(changes)
+        
+        refresh_search_seats(seat['id'] for seat in seats)
+        
+        return {
+            'matched_count': len(seats),
+            'unbound_count': unbound_count,
+            'status_changed_count': status_changed_count
+        }
+
+
 def transfer_user_seat(old_seat_id, new_seat_id, user_id, operator_id="system", operator_name="系统"):
     """
     更换人员工位
@@ -155,6 +383,10 @@ def transfer_user_seat(old_seat_id, new_seat_id, user_id, operator_id="system",
         if new_seat.seat_status != 0:
             raise ValueError("新工位未闲置，无法更换")
         
+        changes = new_counter_changes()
+        move_seat_count(changes, old_seat.area_id, old_seat.seat_status, old_seat.current_dept_id, 0, None)
+        move_seat_count(changes, new_seat.area_id, new_seat.seat_status, new_seat.current_dept_id, 1, user.dept_id)
+        
         # 解绑原工位
         old_seat.current_user_id = None
         old_seat.current_user_name = None
@@ -170,9 +402,10 @@ def transfer_user_seat(old_seat_id, new_seat_id, user_id, operator_id="system",
         new_seat.seat_status = 1  # 状态改为占用
         new_seat.bind_type = 1  # 主工位
         new_seat.save()
+        apply_seat_counter_changes(changes)
         
         # 记录操作日志
-        SeatLog.objects.create(
+        write_seat_log(
             seat_id=new_seat_id,
             seat_no=new_seat.seat_no,
             operation_type=4,  # 4:更换工位
@@ -186,6 +419,8 @@ def transfer_user_seat(old_seat_id, new_seat_id, user_id, operator_id="system",
             extra_info={'old_seat_id': old_seat_id, 'old_seat_no': old_seat.seat_no}
         )
         
+        refresh_search_seats([old_seat_id, new_seat_id])
+        
         return new_seat
 
 
@@ -205,6 +440,9 @@ def extra_bind_user_to_seat(seat_id, user_id, operator_id="system", operator_nam
         if user.status != 1:
             raise ValueError("人员非在职状态，无法绑定")
         
+        changes = new_counter_changes()
+        move_seat_count(changes, seat.area_id, seat.seat_status, seat.current_dept_id, 1, user.dept_id)
+        
         # 更新工位信息
         seat.current_user_id = user_id
         seat.current_user_name = user.name
@@ -212,9 +450,10 @@ def extra_bind_user_to_seat(seat_id, user_id, operator_id="system", operator_nam
         seat.seat_status = 1  # 状态改为占用
         seat.bind_type = 2  # 额外绑定
         seat.save()
+        apply_seat_counter_changes(changes)
         
         # 记录操作日志
-        SeatLog.objects.create(
+        write_seat_log(
             seat_id=seat_id,
             seat_no=seat.seat_no,
             operation_type=5,  # 5:额外绑定
@@ -227,6 +466,8 @@ def extra_bind_user_to_seat(seat_id, user_id, operator_id="system", operator_nam
             operation_remark=f'额外绑定用户 {user.name} 到工位 {seat.seat_no}'
         )
         
+        refresh_search_seats([seat.id])
+        
         return seat
 
 
@@ -244,4 +485,137 @@ def get_available_seats(area_id=None):
     queryset = Seat.objects.filter(seat_status=0)
     if area_id:
         queryset = queryset.filter(area_id=area_id)
-    return queryset
\ No newline at end of file
+    return queryset
+
+
+def filter_seats_by_location(queryset, query_params):
+    """
+    按区域、楼层、场地过滤工位（优先级依次降低）
+    """
+    area_id = query_params.get('area_id')
+    floor_id = query_params.get('floor_id')
+    venue_id = query_params.get('venue_id')
+    
+    if area_id:
+        queryset = queryset.filter(area_id=area_id)
+    elif floor_id:
+        queryset = queryset.filter(area__floor_id=floor_id)
+    elif venue_id:
+        queryset = queryset.filter(area__floor__venue_id=venue_id)
+    
+    return queryset
+
+
+# 工位导出列
+SEAT_EXPORT_HEADER = [
+    '工位ID', '场地', '楼层编号', '楼层名称', '区域编号', '区域名称', '工位编号',
+    '工位状态', '当前人员ID', '当前人员姓名', '部门ID', '绑定类型', '更新时间'
+]
+
+SEAT_STATUS_DISPLAY = {0: '闲置', 1: '占用', 2: '维修中', 3: '停用'}
+BIND_TYPE_DISPLAY = {0: '未绑定', 1: '主工位', 2: '额外绑定'}
+
+
+def iter_seat_export_rows(query_params):
+    """
+    按查询条件逐行生成工位导出数据（过滤条件与工位列表一致）
+
+    关联的区域、楼层、场地在同一查询中取出，数据分块读取。
+    """
+    seats = filter_seats_by_location(Seat.objects.all(), query_params).order_by(
+        'area_id', 'seat_no'
+    ).values_list(
+        'id', 'area__floor__venue__name', 'area__floor__floor_no', 'area__floor__floor_name',
+        'area__area_no', 'area__area_name', 'seat_no', 'seat_status', 'current_user_id',
+        'current_user_name', 'current_dept_id', 'bind_type', 'updated_at'
+    )
+    
+    for row in seats.iterator(chunk_size=EXPORT_CHUNK_SIZE):
+        row = list(row)
+        row[7] = SEAT_STATUS_DISPLAY.get(row[7], row[7])
+        row[11] = BIND_TYPE_DISPLAY.get(row[11], row[11])
+        row[12] = format_export_time(row[12])
+        yield row
+
+
+# 统计中工位状态对应的字段名
+SEAT_STATUS_KEYS = {0: 'idle', 1: 'occupied', 2: 'maintenance', 3: 'disabled'}
+
+
+def new_status_counts(**fields):
+    """
+    创建空的状态统计
+    """
+    counts = dict(fields)
+    counts.update({key: 0 for key in SEAT_STATUS_KEYS.values()})
+    counts['total'] = 0
+    return counts
+
+
+def get_seat_statistics(venue_id=None, floor_id=None, area_id=None):
+    """
+    工位占用统计
+
+    按场地、楼层、区域、部门汇总闲置/占用/维修中/停用工位数，可按场地、楼层或
+    区域限定范围。数据来自工位状态计数表（一次查询），耗时与工位数量无关。
+    """
+    counters = SeatStatusCounter.objects.filter(count__gt=0)
+    if area_id:
+        counters = counters.filter(area_id=area_id)
+    elif floor_id:
+        counters = counters.filter(area__floor_id=floor_id)
+    elif venue_id:
+        counters = counters.filter(area__floor__venue_id=venue_id)
+    
+    total = new_status_counts()
+    venues = {}
+    floors = {}
+    areas = {}
+    departments = {}
+    for row in counters.order_by('area_id').values(
+        'area_id', 'area__area_no', 'area__area_name',
+        'area__floor_id', 'area__floor__floor_no', 'area__floor__floor_name',
+        'area__floor__venue_id', 'area__floor__venue__name',
+        'seat_status', 'dept_id', 'count'
+    ):
+        key = SEAT_STATUS_KEYS.get(row['seat_status'])
+        if key is None:
+            continue
+        
+        buckets = [
+            total,
+            venues.setdefault(row['area__floor__venue_id'], new_status_counts(
+                venue_id=row['area__floor__venue_id'],
+                venue_name=row['area__floor__venue__name']
+            )),
+            floors.setdefault(row['area__floor_id'], new_status_counts(
+                floor_id=row['area__floor_id'],
+                floor_no=row['area__floor__floor_no'],
+                floor_name=row['area__floor__floor_name'],
+                venue_id=row['area__floor__venue_id']
+            )),
+            areas.setdefault(row['area_id'], new_status_counts(
+                area_id=row['area_id'],
+                area_no=row['area__area_no'],
+                area_name=row['area__area_name'],
+                floor_id=row['area__floor_id']
+            )),
+        ]
+        if row['dept_id']:
+            buckets.append(departments.setdefault(row['dept_id'], new_status_counts(dept_id=row['dept_id'])))
+        
+        for bucket in buckets:
+            bucket[key] += row['count']
+            bucket['total'] += row['count']
+    
+    result = {
+        'total': total,
+        'venues': list(venues.values()),
+        'floors': list(floors.values()),
+        'areas': list(areas.values()),
+        'departments': sorted(departments.values(), key=lambda dept: dept['dept_id']),
+    }
+    for bucket in [total, *venues.values(), *floors.values(), *areas.values(), *departments.values()]:
+        bucket['occupancy_rate'] = round(bucket['occupied'] / bucket['total'], 4) if bucket['total'] else 0
+    
+    return result
\ No newline at end of file
@@ -1,3 +1,653 @@
+import json
+import os
+import tempfile
+import unittest
+from io import StringIO
+from unittest.mock import patch
+from django.core.management import call_command
+from django.core.management.base import CommandError
+from django.db import connection
+from django.db.models import QuerySet
 from django.test import TestCase
+from django.utils import timezone
+from django.urls import reverse
+from rest_framework.test import APIClient
+from rest_framework import status
+from backend.apps.venues.models import Venue
+from backend.apps.floors.models import Floor
+from backend.apps.areas.models import Area
+from backend.apps.seats.models import Seat, SeatStatusCounter
+from backend.apps.users.models import User
+from backend.apps.logs.models import SeatLog
+from backend.apps.authentication.models import User as AuthUser
+from backend.apps.seats.serializers import SeatSerializer
+from backend.apps.users.search_index import reset_search_index
+from backend.apps.seats.services import (
+    batch_bind_users_to_seats, batch_update_seats, get_user_seats, get_available_seats,
+    bind_user_to_seat, unbind_user_from_seat, transfer_user_seat, generate_seats
+)
+from backend.apps.seats.counters import rebuild_seat_counters
+from backend.apps.users import services as user_services
+from backend.benchmarks import percentile, compare_results
 
-# Create your tests here.
+
+class SeatTestMixin:
+    """
+    工位测试数据
+    """
+    
+    def create_hierarchy(self, seat_count):
+        """
+        创建场地、楼层、区域和工位
+        """
+        self.venue = Venue.objects.create(name='测试场地', code='V001', city='上海', address='测试地址')
+        self.floor = Floor.objects.create(venue=self.venue, floor_no='1F', floor_name='测试楼层')
+        self.area = Area.objects.create(floor=self.floor, area_no='1', area_name='区域1')
+        Seat.objects.bulk_create([
+            Seat(area=self.area, seat_no=f'1-{i + 1}') for i in range(seat_count)
+        ])
+        self.seats = list(Seat.objects.order_by('id'))
+    
+    def create_users(self, count, status=1):
+        """
+        创建人员
+        """
+        users = [
+            User(
+                id=f'user{i:03d}', name=f'用户{i}', dept_id='dept001',
+                dept_name='测试部门', position='测试职位', status=status
+            )
+            for i in range(count)
+        ]
+        User.objects.bulk_create(users)
+        return users
+
+
+class QueryPlanMixin:
+    """
+    查询计划检查
+    """
+    
+    def get_full_scans(self, queryset):
+        """
+        返回查询计划中的全表扫描步骤
+        """
+        sql, params = queryset.query.sql_with_params()
+        with connection.cursor() as cursor:
+            cursor.execute('EXPLAIN QUERY PLAN ' + sql, params)
+            details = [row[-1] for row in cursor.fetchall()]
+        return [detail for detail in details if detail.startswith('SCAN') and 'INDEX' not in detail]
+    
+    def assertNoFullScan(self, queryset):
+        full_scans = self.get_full_scans(queryset)
+        self.assertEqual(full_scans, [], f'查询出现全表扫描: {queryset.query}')
+
+
+class SeatBatchBindTest(SeatTestMixin, TestCase):
+    """
+    批量绑定测试
+    """
+    
+    def setUp(self):
+        """
+        测试初始化
+        """
+        self.create_hierarchy(60)
+        self.users = self.create_users(60)
+        self.client = APIClient()
+        self.client.force_authenticate(
+            AuthUser.objects.create_user(username='admin', password='admin123', name='管理员')
+        )
+    
+    def items(self, start, end):
+        return [
+            {'seat_id': self.seats[i].id, 'user_id': self.users[i].id, 'bind_type': 1}
+            for i in range(start, end)
+        ]
+    
+    def test_batch_bind(self):
+        """
+        批量绑定成功并逐项返回结果
+        """
+        self.seats[2].seat_status = 2
+        self.seats[2].save()
+        items = self.items(0, 3) + [{'seat_id': 99999, 'user_id': 'user010', 'bind_type': 2}]
+        
+        with self.captureOnCommitCallbacks(execute=True):
+            response = self.client.post(reverse('seat_bind_batch'), {'items': items}, format='json')
+        
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data['success_count'], 2)
+        self.assertEqual(response.data['failed_count'], 2)
+        self.assertEqual(
+            [result['success'] for result in response.data['results']],
+            [True, True, False, False]
+        )
+        seat = Seat.objects.get(id=self.seats[0].id)
+        self.assertEqual(seat.current_user_id, 'user000')
+        self.assertEqual(seat.seat_status, 1)
+        self.assertEqual(SeatLog.objects.filter(operation_type=2).count(), 2)
+    
+    def test_atomic_batch_rolls_back(self):
+        """
+        整批模式下存在失败项时不绑定任何工位
+        """
+        items = self.items(0, 3)
+        items[1]['user_id'] = 'missing'
+        
+        result = batch_bind_users_to_seats(items, atomic=True)
+        
+        self.assertEqual(result['success_count'], 0)
+        self.assertEqual(Seat.objects.filter(seat_status=1).count(), 0)
+        self.assertEqual(SeatLog.objects.count(), 0)
+    
+    def test_duplicate_seat_in_batch(self):
+        """
+        同一批次重复工位只绑定一次
+        """
+        items = self.items(0, 1) + [{'seat_id': self.seats[0].id, 'user_id': 'user001', 'bind_type': 1}]
+        
+        result = batch_bind_users_to_seats(items)
+        
+        self.assertEqual(result['success_count'], 1)
+        self.assertEqual(result['results'][1]['detail'], '工位在本批次中重复')
+    
+    def test_query_count_is_constant(self):
+        """
+        查询次数不随批次大小增长
+        """
+        # 包含提交后写入日志的查询，以及批量更新状态计数的查询
+        with self.assertNumQueries(8), self.captureOnCommitCallbacks(execute=True):
+            batch_bind_users_to_seats(self.items(0, 5))
+        with self.assertNumQueries(8), self.captureOnCommitCallbacks(execute=True):
+            batch_bind_users_to_seats(self.items(5, 60))
+        self.assertEqual(Seat.objects.filter(seat_status=1).count(), 60)
+
+
+
+class SeatBatchUpdateTest(SeatTestMixin, TestCase):
+    """
+    批量修改工位状态/解绑测试
+    """
+    
+    def setUp(self):
+        """
+        测试初始化
+        """
+        self.create_hierarchy(10)
+        self.users = self.create_users(4)
+        batch_bind_users_to_seats([
+            {'seat_id': self.seats[i].id, 'user_id': self.users[i].id, 'bind_type': 1}
+            for i in range(4)
+        ])
+        SeatLog.objects.all().delete()
+        self.client = APIClient()
+        self.client.force_authenticate(
+            AuthUser.objects.create_user(username='admin', password='admin123', name='管理员')
+        )
+    
+    def test_area_maintenance(self):
+        """
+        整个区域改为维修中并解绑占用人员
+        """
+        with self.captureOnCommitCallbacks(execute=True):
+            response = self.client.post(
+                reverse('seat_batch_update'),
+                {'area_id': self.area.id, 'seat_status': 2, 'unbind': True},
+                format='json'
+            )
+        
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data, {'matched_count': 10, 'unbound_count': 4, 'status_changed_count': 10})
+        self.assertEqual(Seat.objects.filter(seat_status=2, current_user_id__isnull=True).count(), 10)
+        self.assertEqual(SeatLog.objects.filter(operation_type=3).count(), 4)
+        self.assertEqual(SeatLog.objects.filter(operation_type=7).count(), 10)
+    
+    def test_status_only_rejects_occupied_seats(self):
+        """
+        只修改状态不解绑时，范围内有已绑定人员的工位则报错且不修改任何工位
+        """
+        response = self.client.post(
+            reverse('seat_batch_update'),
+            {'area_id': self.area.id, 'seat_status': 2},
+            format='json'
+        )
+        
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(Seat.objects.filter(seat_status=1, current_user_id__isnull=False).count(), 4)
+        self.assertFalse(Seat.objects.filter(seat_status=2).exists())
+        self.assertFalse(SeatLog.objects.exists())
+        
+        result = batch_update_seats(seat_ids=[self.seats[8].id, self.seats[9].id], seat_status=2)
+        self.assertEqual(result, {'matched_count': 2, 'unbound_count': 0, 'status_changed_count': 2})
+    
+    def test_unbind_skips_seats_bound_after_lock(self):
+        """
+        只更新加锁读取到的工位，读取后才绑定的工位不被解绑
+        """
+        late_seat = self.seats[9]
+        original_values = QuerySet.values
+        
+        def values(queryset, *fields):
+            rows = original_values(queryset, *fields)
+            if 'current_dept_id' in fields and not Seat.objects.filter(id=late_seat.id, seat_status=1).exists():
+                list(rows)
+                # 其他事务在读取之后绑定了工位
+                Seat.objects.filter(id=late_seat.id).update(
+                    seat_status=1, current_user_id='user009', current_user_name='用户9', current_dept_id='dept001'
+                )
+            return rows
+        
+        with patch.object(QuerySet, 'values', values):
+            result = batch_update_seats(area_id=self.area.id, unbind=True)
+        
+        self.assertEqual(result['unbound_count'], 4)
+        self.assertEqual(Seat.objects.get(id=late_seat.id).current_user_id, 'user009')
+    
+    def test_floor_unbind_keeps_other_status(self):
+        """
+        按楼层解绑只处理占用工位
+        """
+        Seat.objects.filter(id=self.seats[9].id).update(seat_status=2)
+        
+        result = batch_update_seats(floor_id=self.floor.id, unbind=True)
+        
+        self.assertEqual(result['unbound_count'], 4)
+        self.assertEqual(Seat.objects.filter(seat_status=0).count(), 9)
+        self.assertEqual(Seat.objects.get(id=self.seats[9].id).seat_status, 2)
+        self.assertFalse(SeatLog.objects.filter(operation_type=7).exists())
+    
+    def test_seat_ids_scope(self):
+        """
+        按工位ID列表修改状态
+        """
+        seat_ids = [self.seats[0].id, self.seats[8].id]
+        result = batch_update_seats(seat_ids=seat_ids, seat_status=3, unbind=True)
+        
+        self.assertEqual(result['matched_count'], 2)
+        self.assertEqual(Seat.objects.filter(seat_status=3).count(), 2)
+    
+    def test_scope_required(self):
+        """
+        必须且只能指定一个范围
+        """
+        response = self.client.post(
+            reverse('seat_batch_update'),
+            {'area_id': self.area.id, 'floor_id': self.floor.id, 'unbind': True},
+            format='json'
+        )
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+    
+    def test_query_count_is_bounded(self):
+        """
+        查询次数固定
+        """
+        # 包含提交后写入日志的查询，以及批量更新状态计数的查询
+        with self.assertNumQueries(7), self.captureOnCommitCallbacks(execute=True):
+            batch_update_seats(floor_id=self.floor.id, seat_status=2, unbind=True)
+
+
+class SeatListTest(SeatTestMixin, TestCase):
+    """
+    工位列表只读路径测试
+    """
+    
+    def setUp(self):
+        self.create_hierarchy(30)
+        self.create_users(2)
+        batch_bind_users_to_seats([
+            {'seat_id': self.seats[0].id, 'user_id': 'user000', 'bind_type': 1},
+            {'seat_id': self.seats[1].id, 'user_id': 'user001', 'bind_type': 2},
+        ])
+        Seat.objects.filter(id=self.seats[2].id).update(grid_row=1, grid_col=2, position_x=0.25, position_y=0.5)
+        self.client = APIClient()
+        self.client.force_authenticate(
+            AuthUser.objects.create_user(username='admin', password='admin123', name='管理员')
+        )
+    
+    def test_matches_serializer_output(self):
+        """
+        输出与 SeatSerializer 完全一致，且只执行一次查询
+        """
+        queryset = Seat.objects.filter(area__floor_id=self.floor.id).order_by('area_id', 'seat_no')
+        with self.assertNumQueries(1):
+            response = self.client.get(reverse('seat_list_create'), {'floor_id': self.floor.id})
+        
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        expected = SeatSerializer(queryset, many=True).data
+        self.assertEqual(response.json(), [dict(row) for row in expected])
+    
+    def test_pagination(self):
+        """
+        传入页码时分页返回
+        """
+        response = self.client.get(reverse('seat_list_create'), {'area_id': self.area.id, 'page': 2, 'page_size': 20})
+        
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data['total'], 30)
+        self.assertEqual(len(response.data['seats']), 10)
+        
+        response = self.client.get(reverse('seat_list_create'), {'page': 0})
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+
+class SeatExportTest(SeatTestMixin, TestCase):
+    """
+    工位导出测试
+    """
+    
+    def setUp(self):
+        self.create_hierarchy(120)
+        self.create_users(1)
+        batch_bind_users_to_seats([{'seat_id': self.seats[0].id, 'user_id': 'user000', 'bind_type': 1}])
+        self.client = APIClient()
+        self.client.force_authenticate(
+            AuthUser.objects.create_user(username='admin', password='admin123', name='管理员')
+        )
+    
+    def test_export_seats(self):
+        """
+        流式导出工位CSV，关联信息在一次查询中取出
+        """
+        response = self.client.get(reverse('seat_export'), {'floor_id': self.floor.id})
+        
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertTrue(response.streaming)
+        with self.assertNumQueries(1):
+            content = b''.join(response.streaming_content).decode('utf-8')
+        self.assertTrue(content.startswith('\ufeff工位ID,'))
+        lines = content.strip().splitlines()
+        self.assertEqual(len(lines), 121)
+        self.assertIn('测试场地,1F,测试楼层,1,区域1,1-1,占用,user000,用户0,dept001,主工位', lines[1])
+    
+    def test_export_filter(self):
+        """
+        导出与列表使用相同的过滤条件
+        """
+        response = self.client.get(reverse('seat_export'), {'area_id': 99999})
+        
+        content = b''.join(response.streaming_content).decode('utf-8')
+        self.assertEqual(len(content.strip().splitlines()), 1)
+
+
+class SeatStatisticsTest(SeatTestMixin, TestCase):
+    """
+    工位占用统计测试
+    """
+    
+    def setUp(self):
+        self.create_hierarchy(10)
+        self.create_users(5)
+        # 测试数据通过 bulk_create 创建，需先生成计数
+        rebuild_seat_counters()
+        self.client = APIClient()
+        self.client.force_authenticate(
+            AuthUser.objects.create_user(username='admin', password='admin123', name='管理员')
+        )
+    
+    def get_statistics(self, **params):
+        response = self.client.get(reverse('seat_statistics'), params)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        return response.data
+    
+    def test_counters_follow_seat_changes(self):
+        """
+        各类工位变更后计数与工位表一致
+        """
+        bind_user_to_seat(self.seats[0].id, 'user000')
+        batch_bind_users_to_seats([
+            {'seat_id': self.seats[i].id, 'user_id': f'user{i:03d}', 'bind_type': 1} for i in range(1, 4)
+        ])
+        unbind_user_from_seat(self.seats[1].id)
+        transfer_user_seat(self.seats[2].id, self.seats[5].id, 'user002')
+        batch_update_seats(seat_ids=[self.seats[8].id, self.seats[9].id], seat_status=2)
+        generate_seats(Area.objects.create(floor=self.floor, area_no='2', area_name='区域2').id, 2)
+        user_services.release_user_seats(['user003'])
+        
+        self.assertEqual(rebuild_seat_counters(), 0)
+        total = self.get_statistics()['total']
+        self.assertEqual(
+            (total['idle'], total['occupied'], total['maintenance'], total['disabled'], total['total']),
+            (8, 2, 2, 0, 12)
+        )
+    
+    def test_api_changes_update_counters(self):
+        """
+        通过接口新增、修改、删除工位时同步更新计数
+        """
+        response = self.client.post(
+            reverse('seat_list_create'), {'area_id': self.area.id, 'seat_no': '1-99'}, format='json'
+        )
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        seat_id = response.data['id']
+        self.client.patch(
+            reverse('seat_retrieve_update_destroy', kwargs={'id': seat_id}), {'seat_status': 3}, format='json'
+        )
+        self.assertEqual(self.get_statistics()['total']['disabled'], 1)
+        
+        self.client.delete(reverse('seat_retrieve_update_destroy', kwargs={'id': seat_id}))
+        
+        self.assertEqual(rebuild_seat_counters(), 0)
+        self.assertEqual(self.get_statistics()['total']['total'], 10)
+    
+    def test_statistics_by_level(self):
+        """
+        按场地、楼层、区域、部门汇总
+        """
+        batch_bind_users_to_seats([
+            {'seat_id': self.seats[i].id, 'user_id': f'user{i:03d}', 'bind_type': 1} for i in range(4)
+        ])
+        
+        result = self.get_statistics(floor_id=self.floor.id)
+        
+        self.assertEqual(result['total']['occupancy_rate'], 0.4)
+        self.assertEqual(result['venues'][0]['venue_name'], '测试场地')
+        self.assertEqual(result['floors'][0]['occupied'], 4)
+        self.assertEqual(result['areas'][0]['idle'], 6)
+        self.assertEqual(result['departments'], [{
+            'dept_id': 'dept001', 'idle': 0, 'occupied': 4, 'maintenance': 0, 'disabled': 0,
+            'total': 4, 'occupancy_rate': 1.0
+        }])
+        self.assertEqual(self.get_statistics(area_id=99999)['total']['total'], 0)
+    
+    def test_query_count_is_constant(self):
+        """
+        统计查询次数与工位数量无关
+        """
+        with self.assertNumQueries(1):
+            self.get_statistics()
+        Seat.objects.bulk_create([Seat(area=self.area, seat_no=f'2-{i}') for i in range(200)])
+        rebuild_seat_counters()
+        with self.assertNumQueries(1):
+            result = self.get_statistics()
+        self.assertEqual(result['total']['total'], 210)
+    
+    def test_rebuild_corrects_drift(self):
+        """
+        校正计数与工位表的偏差
+        """
+        SeatStatusCounter.objects.update(count=0)
+        Seat.objects.filter(id=self.seats[0].id).update(seat_status=3)
+        
+        self.assertEqual(rebuild_seat_counters(), 2)
+        total = self.get_statistics()['total']
+        self.assertEqual((total['idle'], total['disabled']), (9, 1))
+
+
+class SeedScaleCommandTest(TestCase):
+    """
+    压测数据生成命令测试
+    """
+    
+    def seed(self, **options):
+        options = {
+            'venues': 2, 'floors': 2, 'areas': 3, 'seats': 5, 'users': 40, 'depts': 12,
+            'logs': 50, 'end_date': '2026-01-31', 'stdout': StringIO(), **options
+        }
+        call_command('seed_scale', **options)
+    
+    def snapshot(self):
+        return (
+            list(Seat.objects.order_by('id').values_list('id', 'area_id', 'seat_no', 'seat_status', 'current_user_id')),
+            list(User.objects.order_by('id').values_list('id', 'name', 'dept_id', 'status')),
+            list(SeatLog.objects.order_by('id').values_list('id', 'seat_id', 'operation_type', 'operation_time')),
+        )
+    
+    def test_generates_requested_volume(self):
+        """
+        按参数生成各层级数据，主键固定且工位计数一致
+        """
+        self.seed()
+        
+        self.assertEqual(Venue.objects.count(), 2)
+        self.assertEqual(Floor.objects.count(), 4)
+        self.assertEqual(Area.objects.count(), 12)
+        self.assertEqual(Seat.objects.count(), 60)
+        self.assertEqual(User.objects.count(), 40)
+        self.assertEqual(SeatLog.objects.count(), 50)
+        self.assertEqual(set(Seat.objects.values_list('id', flat=True)), set(range(1, 61)))
+        self.assertEqual(Seat.objects.get(id=60).seat_no, '3-5')
+        self.assertEqual(User.objects.values('dept_id').distinct().count(), 12)
+        self.assertEqual(rebuild_seat_counters(), 0)
+        # 日志中的人员姓名与人员表一致
+        names = dict(User.objects.values_list('id', 'name'))
+        log_names = SeatLog.objects.filter(new_user_id__isnull=False).values_list(
+            'new_user_id', 'new_user_name'
+        ).union(
+            SeatLog.objects.filter(old_user_id__isnull=False).values_list('old_user_id', 'old_user_name')
+        )
+        self.assertTrue(log_names)
+        self.assertEqual({user_id: names[user_id] for user_id, _ in log_names}, dict(log_names))
+        # 日志按ID递增均匀分布在截止日期前365天内
+        times = list(SeatLog.objects.order_by('id').values_list('operation_time', flat=True))
+        self.assertEqual(times, sorted(times))
+        self.assertEqual(timezone.localtime(times[0]).date().isoformat(), '2025-02-01')
+        self.assertLess(timezone.localtime(times[-1]).date().isoformat(), '2026-02-01')
+    
+    def test_deterministic(self):
+        """
+        相同参数生成相同数据，已有数据时需指定 --clear
+        """
+        self.seed()
+        first = self.snapshot()
+        with self.assertRaises(CommandError):
+            self.seed()
+        
+        self.seed(clear=True)
+        
+        self.assertEqual(self.snapshot(), first)
+
+
+class BenchmarkEndpointsTest(TestCase):
+    """
+    接口基准测试命令测试
+    """
+    
+    def setUp(self):
+        call_command(
+            'seed_scale', venues=1, floors=1, areas=2, seats=5, users=10, depts=2, logs=20,
+            end_date='2026-01-31', stdout=StringIO()
+        )
+        self.tmpdir = tempfile.TemporaryDirectory()
+        self.output = os.path.join(self.tmpdir.name, 'results.json')
+        self.baseline = os.path.join(self.tmpdir.name, 'baseline.json')
+    
+    def tearDown(self):
+        self.tmpdir.cleanup()
+        reset_search_index()
+    
+    def benchmark(self, **options):
+        call_command(
+            'benchmark_endpoints', iterations=3, warmup=1, output=self.output,
+            stdout=StringIO(), stderr=StringIO(), **options
+        )
+        with open(self.output, encoding='utf-8') as f:
+            return json.load(f)
+    
+    def test_writes_results(self):
+        """
+        记录每个接口的延迟分位数、查询数和峰值内存
+        """
+        report = self.benchmark()
+        
+        self.assertEqual(report['dataset']['seats'], 10)
+        self.assertEqual(set(report['results']), {'user_floor_detail', 'user_search', 'admin_seats', 'admin_logs'})
+        for result in report['results'].values():
+            self.assertEqual(result['status_code'], 200)
+            self.assertLessEqual(result['p50_ms'], result['p99_ms'])
+            self.assertGreater(result['queries'], 0)
+            self.assertGreater(result['peak_memory_kb'], 0)
+    
+    def test_fails_on_regression(self):
+        """
+        指标超出基线阈值时命令失败
+        """
+        self.benchmark(only=['admin_logs'], baseline=self.baseline, update_baseline=True)
+        with open(self.baseline, encoding='utf-8') as f:
+            report = json.load(f)
+        report['results']['admin_logs']['queries'] -= 1
+        with open(self.baseline, 'w', encoding='utf-8') as f:
+            json.dump(report, f)
+        
+        # 放宽延迟和内存阈值，只检查查询数
+        thresholds = {'latency_threshold': 100, 'memory_threshold': 100}
+        with self.assertRaisesMessage(CommandError, '1 项指标超出基线阈值'):
+            self.benchmark(only=['admin_logs'], baseline=self.baseline, **thresholds)
+        self.benchmark(only=['admin_logs'], baseline=self.baseline, query_threshold=1, **thresholds)
+    
+    def test_percentile_and_compare(self):
+        """
+        百分位数和基线对比
+        """
+        self.assertEqual(percentile(list(range(1, 101)), 95), 95)
+        self.assertEqual(percentile([5], 99), 5)
+        
+        baseline = {'a': {'p50_ms': 10, 'p95_ms': 20, 'p99_ms': 30, 'queries': 3, 'peak_memory_kb': 100}}
+        current = {'a': {'p50_ms': 10.5, 'p95_ms': 30, 'p99_ms': 30, 'queries': 3, 'peak_memory_kb': 130}}
+        self.assertEqual(
+            compare_results(current, baseline),
+            ['a p95_ms: 20 -> 30', 'a peak_memory_kb: 100 -> 130']
+        )
+        self.assertEqual(compare_results(current, baseline, {'latency': 0.6, 'memory': 0.5}), [])
+        self.assertEqual(compare_results({'b': current['a']}, baseline), [])
+
+
+@unittest.skipUnless(connection.vendor == 'sqlite', '查询计划检查仅支持SQLite')
+class SeatQueryPlanTest(QueryPlanMixin, SeatTestMixin, TestCase):
+    """
+    工位查询索引测试
+    """
+    
+    def setUp(self):
+        self.create_hierarchy(20)
+    
+    def test_user_seat_queries(self):
+        """
+        按人员查询工位使用索引
+        """
+        self.assertNoFullScan(get_user_seats('user001'))
+        self.assertNoFullScan(Seat.objects.filter(current_user_id='user001', seat_status=1).values('id'))
+        self.assertNoFullScan(
+            Seat.objects.filter(current_user_id__in=['user001', 'user002']).values('id', 'area_id')
+        )
+    
+    def test_available_seat_queries(self):
+        """
+        查询可用工位使用索引
+        """
+        self.assertNoFullScan(get_available_seats())
+        self.assertNoFullScan(get_available_seats(area_id=self.area.id))
+    
+    def test_floor_snapshot_query(self):
+        """
+        楼层工位查询使用索引
+        """
+        self.assertNoFullScan(
+            Seat.objects.filter(area__floor_id=self.floor.id, area__status=1).order_by('id').values('id')
+        )
+    
+    def test_full_scan_detected(self):
+        """
+        无索引的查询会被检测为全表扫描
+        """
+        self.assertTrue(self.get_full_scans(Seat.objects.filter(current_user_name='用户1')))
@@ -1,22 +1,30 @@
 from django.urls import path
 from .views import (
-    SeatListCreateView, SeatRetrieveUpdateDestroyView,
-    SeatGenerateView, SeatBindView, SeatUnbindView,
-    SeatTransferView, SeatExtraBindView
+    SeatListCreateView, SeatExportView, SeatStatisticsView, SeatRetrieveUpdateDestroyView,
+    SeatGenerateView, SeatBindView, SeatBatchBindView, SeatUnbindView,
+    SeatBatchUpdateView, SeatTransferView, SeatExtraBindView
 )
 
 
 urlpatterns = [
     # 工位列表和创建
     path('seats', SeatListCreateView.as_view(), name='seat_list_create'),
+    # 工位导出
+    path('seats/export', SeatExportView.as_view(), name='seat_export'),
+    # 工位占用统计
+    path('seats/statistics', SeatStatisticsView.as_view(), name='seat_statistics'),
     # 工位详情、更新和删除
     path('seats/<int:id>', SeatRetrieveUpdateDestroyView.as_view(), name='seat_retrieve_update_destroy'),
     # 批量生成工位
     path('seats/generate', SeatGenerateView.as_view(), name='seat_generate'),
     # 绑定人员
     path('seat/bind', SeatBindView.as_view(), name='seat_bind'),
+    # 批量绑定人员
+    path('seat/bind/batch', SeatBatchBindView.as_view(), name='seat_bind_batch'),
     # 解绑人员
     path('seat/unbind', SeatUnbindView.as_view(), name='seat_unbind'),
+    # 批量修改状态/解绑人员
+    path('seat/batch-update', SeatBatchUpdateView.as_view(), name='seat_batch_update'),
     # 更换工位
     path('seat/transfer', SeatTransferView.as_view(), name='seat_transfer'),
     # 额外绑定
@@ -3,15 +3,23 @@ from rest_framework.response import Response
 from rest_framework.views import APIView
 from rest_framework.permissions import IsAuthenticated
 from rest_framework.generics import ListCreateAPIView, RetrieveUpdateDestroyAPIView
+from django.db import transaction
 from .models import Seat
 from .serializers import (
-    SeatSerializer, SeatGenerateSerializer, SeatBindSerializer,
-    SeatUnbindSerializer, SeatTransferSerializer, SeatExtraBindSerializer
+    SeatSerializer, SeatListQuerySerializer, serialize_seat_rows, SeatStatisticsQuerySerializer,
+    SeatGenerateSerializer, SeatBindSerializer, SeatBatchBindSerializer,
+    SeatUnbindSerializer, SeatBatchUpdateSerializer, SeatTransferSerializer,
+    SeatExtraBindSerializer
 )
+from backend.apps.users.search_index import refresh_search_seats
+from .counters import new_counter_changes, add_seat_count, move_seat_count, apply_seat_counter_changes
 from .services import (
-    generate_seats, bind_user_to_seat, unbind_user_from_seat,
-    transfer_user_seat, extra_bind_user_to_seat
+    generate_seats, bind_user_to_seat, batch_bind_users_to_seats,
+    unbind_user_from_seat, batch_update_seats, transfer_user_seat,
+    extra_bind_user_to_seat, filter_seats_by_location, iter_seat_export_rows,
+    get_seat_statistics, SEAT_EXPORT_HEADER
 )
+from backend.exports import stream_csv_response
 
 
 class SeatListCreateView(ListCreateAPIView):
@@ -26,19 +34,89 @@ class SeatListCreateView(ListCreateAPIView):
         """
         支持按区域、楼层、场地过滤
         """
-        queryset = super().get_queryset()
-        area_id = self.request.query_params.get('area_id')
-        floor_id = self.request.query_params.get('floor_id')
-        venue_id = self.request.query_params.get('venue_id')
+        queryset = filter_seats_by_location(super().get_queryset(), self.request.query_params)
+        return queryset.order_by('area_id', 'seat_no')
+    
+    def list(self, request, *args, **kwargs):
+        """
+        工位列表（只读快速路径，输出与 SeatSerializer 一致）
+
+        不传 page 时返回全部工位；传入 page 时分页返回。
+        """
+        serializer = SeatListQuerySerializer(data=request.query_params)
+        if not serializer.is_valid():
+            return Response(
+                serializer.errors,
+                status=status.HTTP_400_BAD_REQUEST
+            )
         
-        if area_id:
-            queryset = queryset.filter(area_id=area_id)
-        elif floor_id:
-            queryset = queryset.filter(area__floor_id=floor_id)
-        elif venue_id:
-            queryset = queryset.filter(area__floor__venue_id=venue_id)
+        queryset = self.get_queryset()
+        page = serializer.validated_data.get('page')
+        if page is None:
+            return Response(serialize_seat_rows(queryset), status=status.HTTP_200_OK)
         
-        return queryset.order_by('area_id', 'seat_no')
+        page_size = serializer.validated_data['page_size']
+        offset = (page - 1) * page_size
+        return Response(
+            {
+                'total': queryset.count(),
+                'page': page,
+                'page_size': page_size,
+                'seats': serialize_seat_rows(queryset[offset:offset + page_size])
+            },
+            status=status.HTTP_200_OK
+        )
+    
+    def perform_create(self, serializer):
+        """
+        创建工位，更新工位状态计数并使楼层平面图缓存失效
+        """
+        with transaction.atomic():
+            seat = serializer.save()
+            changes = new_counter_changes()
+            add_seat_count(changes, seat.area_id, seat.seat_status, seat.current_dept_id)
+            apply_seat_counter_changes(changes)
+        refresh_search_seats([seat.id])
+
+
+class SeatExportView(APIView):
+    """
+    工位导出视图
+    """
+    permission_classes = [IsAuthenticated]
+    
+    def get(self, request):
+        """
+        按区域、楼层、场地流式导出工位CSV
+        """
+        return stream_csv_response(
+            'seats.csv',
+            SEAT_EXPORT_HEADER,
+            iter_seat_export_rows(request.query_params)
+        )
+
+
+class SeatStatisticsView(APIView):
+    """
+    工位占用统计视图
+    """
+    permission_classes = [IsAuthenticated]
+    
+    def get(self, request):
+        """
+        按场地、楼层、区域、部门统计工位状态
+        """
+        serializer = SeatStatisticsQuerySerializer(data=request.query_params)
+        if serializer.is_valid():
+            result = get_seat_statistics(**serializer.validated_data)
+            return Response(
+                result,
+                status=status.HTTP_200_OK
+            )
+        return Response(
+            serializer.errors,
+            status=status.HTTP_400_BAD_REQUEST
+        )
 
 
 class SeatRetrieveUpdateDestroyView(RetrieveUpdateDestroyAPIView):
@@ -46,9 +124,40 @@ class SeatRetrieveUpdateDestroyView(RetrieveUpdateDestroyAPIView):
     工位详情、更新和删除视图
     """
     permission_classes = [IsAuthenticated]
-    queryset = Seat.objects.all()
+    queryset = Seat.objects.select_related('area__floor__venue')
     serializer_class = SeatSerializer
     lookup_field = 'id'
+    
+    def perform_update(self, serializer):
+        """
+        更新工位，更新工位状态计数并使新旧区域所在楼层的平面图缓存失效
+        """
+        instance = serializer.instance
+        old_area_id = instance.area_id
+        old_status = instance.seat_status
+        old_dept_id = instance.current_dept_id
+        with transaction.atomic():
+            seat = serializer.save()
+            changes = new_counter_changes()
+            move_seat_count(
+                changes, old_area_id, old_status, old_dept_id,
+                seat.seat_status, seat.current_dept_id, new_area_id=seat.area_id
+            )
+            apply_seat_counter_changes(changes)
+        refresh_search_seats([seat.id])
+    
+    def perform_destroy(self, instance):
+        """
+        删除工位，更新工位状态计数并使楼层平面图缓存失效
+        """
+        area_id = instance.area_id
+        seat_id = instance.id
+        with transaction.atomic():
+            changes = new_counter_changes()
+            add_seat_count(changes, area_id, instance.seat_status, instance.current_dept_id, -1)
+            instance.delete()
+            apply_seat_counter_changes(changes)
+        refresh_search_seats([seat_id])
 
 
 class SeatGenerateView(APIView):
@@ -122,6 +231,44 @@ class SeatBindView(APIView):
         )
 
 
+class SeatBatchBindView(APIView):
+    """
+    批量绑定人员到工位视图
+    """
+    permission_classes = [IsAuthenticated]
+    
+    def post(self, request):
+        """
+        批量绑定人员到工位
+        """
+        serializer = SeatBatchBindSerializer(data=request.data)
+        if serializer.is_valid():
+            items = serializer.validated_data['items']
+            atomic = serializer.validated_data['atomic']
+            
+            try:
+                # 获取操作人信息
+                operator_id = request.user.username
+                operator_name = request.user.name
+                
+                result = batch_bind_users_to_seats(
+                    items, atomic, operator_id, operator_name
+                )
+                return Response(
+                    result,
+                    status=status.HTTP_200_OK
+                )
+            except Exception as e:
+                return Response(
+                    {'detail': str(e)},
+                    status=status.HTTP_400_BAD_REQUEST
+                )
+        return Response(
+            serializer.errors,
+            status=status.HTTP_400_BAD_REQUEST
+        )
+
+
 class SeatUnbindView(APIView):
     """
     解绑人员与工位视图
@@ -159,6 +306,49 @@ class SeatUnbindView(APIView):
         )
 
 
+class SeatBatchUpdateView(APIView):
+    """
+    批量修改工位状态或解绑人员视图
+    """
+    permission_classes = [IsAuthenticated]
+    
+    def post(self, request):
+        """
+        按区域、楼层或工位ID列表批量修改工位状态或解绑人员
+        """
+        serializer = SeatBatchUpdateSerializer(data=request.data)
+        if serializer.is_valid():
+            data = serializer.validated_data
+            
+            try:
+                # 获取操作人信息
+                operator_id = request.user.username
+                operator_name = request.user.name
+                
+                result = batch_update_seats(
+                    area_id=data.get('area_id'),
+                    floor_id=data.get('floor_id'),
+                    seat_ids=data.get('seat_ids'),
+                    seat_status=data.get('seat_status'),
+                    unbind=data['unbind'],
+                    operator_id=operator_id,
+                    operator_name=operator_name
+                )
+                return Response(
+                    result,
+                    status=status.HTTP_200_OK
+                )
+            except Exception as e:
+                return Response(
+                    {'detail': str(e)},
+                    status=status.HTTP_400_BAD_REQUEST
+                )
+        return Response(
+            serializer.errors,
+            status=status.HTTP_400_BAD_REQUEST
+        )
+
+
 class SeatTransferView(APIView):
     """
     更换人员工位视图
@@ -0,0 +1,17 @@
+from django.core.management.base import BaseCommand
+from backend.apps.users.models import User
+from backend.apps.users.pinyin import rebuild_user_pinyin
+
+
+class Command(BaseCommand):
+    """
+    重新生成人员姓名拼音检索键
+    """
+    help = '按姓名重新生成全部人员的拼音全拼和首字母（调整姓氏读音后执行）'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--chunk-size', type=int, default=1000, help='每批处理的人员数')
+
+    def handle(self, *args, **options):
+        updated_count = rebuild_user_pinyin(User, options['chunk_size'])
+        self.stdout.write(self.style.SUCCESS(f'共更新 {updated_count} 名人员的拼音检索键'))
@@ -0,0 +1,62 @@
+# Generated by Django 5.0 on 2026-10-18 17:33
+
+from django.db import migrations, models
+from pypinyin import lazy_pinyin
+
+
+# 迁移时的多音字姓氏读音（与迁移时的 backend.apps.users.pinyin 一致，之后的调整由 rebuild_name_pinyin 命令处理）
+SURNAME_PINYIN = {
+    '单': 'shan', '曾': 'zeng', '解': 'xie', '仇': 'qiu', '朴': 'piao', '查': 'zha', '区': 'ou',
+    '盖': 'ge', '乐': 'yue', '缪': 'miao', '翟': 'zhai', '覃': 'qin', '员': 'yun', '召': 'shao',
+}
+
+
+def get_pinyin_keys(name):
+    """
+    姓名的拼音检索键：(全拼, 首字母)
+    """
+    if not name:
+        return '', ''
+    syllables = lazy_pinyin(name)
+    if name[0] in SURNAME_PINYIN:
+        syllables[0] = SURNAME_PINYIN[name[0]]
+    syllables = [''.join(ch for ch in syllable if ch.isalnum()).lower() for syllable in syllables]
+    syllables = [syllable for syllable in syllables if syllable]
+    return ''.join(syllables)[:255], ''.join(syllable[0] for syllable in syllables)
+
+
+def populate_pinyin(apps, schema_editor):
+    """
+    为现有人员生成拼音检索键
+    """
+    User = apps.get_model('users', 'User')
+    users = []
+    for user in User.objects.only('id', 'name').iterator(chunk_size=1000):
+        user.name_pinyin, user.name_initials = get_pinyin_keys(user.name)
+        users.append(user)
+        if len(users) >= 1000:
+            User.objects.bulk_update(users, ['name_pinyin', 'name_initials'])
+            users = []
+    if users:
+        User.objects.bulk_update(users, ['name_pinyin', 'name_initials'])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('users', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='user',
+            name='name_initials',
+            field=models.CharField(blank=True, db_index=True, default='', help_text='由姓名生成，用于拼音检索，如 zs', max_length=50, verbose_name='姓名拼音首字母'),
+        ),
+        migrations.AddField(
+            model_name='user',
+            name='name_pinyin',
+            field=models.CharField(blank=True, db_index=True, default='', help_text='由姓名生成，用于拼音检索，如 zhangsan', max_length=255, verbose_name='姓名全拼'),
+        ),
+        migrations.RunPython(populate_pinyin, migrations.RunPython.noop),
+    ]
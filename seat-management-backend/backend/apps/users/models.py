@@ -14,6 +14,22 @@ class User(models.Model):
         max_length=50,
         verbose_name="姓名"
     )
+    name_pinyin = models.CharField(
+        max_length=255,
+        blank=True,
+        default='',
+        db_index=True,
+        verbose_name="姓名全拼",
+        help_text="由姓名生成，用于拼音检索，如 zhangsan"
+    )
+    name_initials = models.CharField(
+        max_length=50,
+        blank=True,
+        default='',
+        db_index=True,
+        verbose_name="姓名拼音首字母",
+        help_text="由姓名生成，用于拼音检索，如 zs"
+    )
     dept_id = models.CharField(
         max_length=50,
         verbose_name="部门ID"
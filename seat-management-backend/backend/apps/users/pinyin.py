@@ -0,0 +1,71 @@
+from functools import lru_cache
+from pypinyin import lazy_pinyin
+
+
+# 拼音全拼的最大长度（与人员表字段长度一致）
+PINYIN_MAX_LENGTH = 255
+
+# 多音字姓氏的读音（pypinyin 按常用读音转换，如 单 为 dan）
+SURNAME_PINYIN = {
+    '单': 'shan',
+    '曾': 'zeng',
+    '解': 'xie',
+    '仇': 'qiu',
+    '朴': 'piao',
+    '查': 'zha',
+    '区': 'ou',
+    '盖': 'ge',
+    '乐': 'yue',
+    '缪': 'miao',
+    '翟': 'zhai',
+    '覃': 'qin',
+    '员': 'yun',
+    '召': 'shao',
+}
+
+
+@lru_cache(maxsize=65536)
+def get_pinyin_keys(name):
+    """
+    姓名的拼音检索键：(全拼, 首字母)，如 张三 -> ('zhangsan', 'zs')
+
+    多音字按常用读音，首字按姓氏读音；非汉字保留字母和数字（转为小写），其余字符忽略。
+    姓名为空时返回空字符串。
+    """
+    if not name:
+        return '', ''
+
+    syllables = lazy_pinyin(name)
+    if name[0] in SURNAME_PINYIN:
+        syllables[0] = SURNAME_PINYIN[name[0]]
+    syllables = [''.join(ch for ch in syllable if ch.isalnum()).lower() for syllable in syllables]
+    syllables = [syllable for syllable in syllables if syllable]
+    return ''.join(syllables)[:PINYIN_MAX_LENGTH], ''.join(syllable[0] for syllable in syllables)
+
+
+def rebuild_user_pinyin(user_model, chunk_size=1000):
+    """
+    重新计算全部人员的拼音检索键（调整姓氏读音后使用），返回更新的人员数
+    """
+    updated_count = 0
+    last_id = None
+    while True:
+        users = user_model.objects.order_by('id')
+        if last_id is not None:
+            users = users.filter(id__gt=last_id)
+        users = list(users.only('id', 'name', 'name_pinyin', 'name_initials')[:chunk_size])
+        if not users:
+            break
+
+        changed = []
+        for user in users:
+            name_pinyin, name_initials = get_pinyin_keys(user.name)
+            if (user.name_pinyin, user.name_initials) != (name_pinyin, name_initials):
+                user.name_pinyin = name_pinyin
+                user.name_initials = name_initials
+                changed.append(user)
+        if changed:
+            user_model.objects.bulk_update(changed, ['name_pinyin', 'name_initials'])
+        updated_count += len(changed)
+        last_id = users[-1].id
+    return updated_count
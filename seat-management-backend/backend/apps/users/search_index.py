@@ -0,0 +1,522 @@
+import logging
+import threading
+import time
+from bisect import bisect_left, insort
+from datetime import timedelta
+from itertools import chain
+from django.conf import settings
+from django.db import connection, transaction
+from django.utils import timezone
+from .models import User
+from .pinyin import get_pinyin_keys
+from backend.apps.areas.models import Area
+from backend.apps.seats.models import Seat
+
+
+logger = logging.getLogger(__name__)
+
+# 检索结果的人员字段（第一个为主键），索引额外保存姓名拼音检索键
+USER_FIELDS = ('id', 'name', 'dept_id', 'dept_name', 'position', 'phone', 'email', 'status')
+USER_INDEX_FIELDS = USER_FIELDS + ('name_pinyin', 'name_initials')
+# 参与检索的字段（按排序优先级），拼音检索键只做精确和前缀匹配
+USER_SEARCH_FIELDS = ('name', 'id', 'dept_name')
+USER_PREFIX_FIELDS = ('name_pinyin', 'name_initials')
+
+# 检索结果的工位字段（第一个为主键）及区域ID，索引额外保存绑定人员姓名的拼音检索键
+SEAT_FIELDS = ('id', 'seat_no', 'seat_status', 'current_user_id', 'current_user_name', 'current_dept_id')
+SEAT_INDEX_FIELDS = SEAT_FIELDS + ('area_id', 'user_name_pinyin', 'user_name_initials')
+SEAT_SEARCH_FIELDS = ('seat_no', 'current_user_name')
+SEAT_PREFIX_FIELDS = ('user_name_pinyin', 'user_name_initials')
+
+# 按ID重新读取时每批的ID数
+RELOAD_CHUNK_SIZE = 500
+
+# 已删除的文档数超过该值且多于存活文档数时，压缩索引（回收倒排表中的无效槽位）
+COMPACT_MIN_DEAD = 10000
+
+
+def normalize(value):
+    """
+    检索用的字段值（忽略大小写）
+    """
+    return str(value).lower() if value else ''
+
+
+def normalize_pinyin(query):
+    """
+    拼音检索用的关键词（忽略大小写和空格、撇号等分隔符）
+    """
+    return ''.join(ch for ch in query if ch.isalnum()).lower()
+
+
+def get_grams(value):
+    """
+    字段值的一元和二元语法集合
+    """
+    return set(value) | {value[i:i + 2] for i in range(len(value) - 1)}
+
+
+class FieldIndex:
+    """
+    单个字段的索引
+
+    按值排序的 (值, 槽位) 列表用于精确和前缀匹配，一元、二元语法倒排表用于包含匹配
+    （substring 为 False 时不建立倒排表）。
+    """
+
+    def __init__(self, substring=True):
+        self.substring = substring
+        self.keys = []
+        self.grams = {}
+
+    def add(self, slot, value, keep_sorted=True):
+        if keep_sorted:
+            insort(self.keys, (value, slot))
+        else:
+            self.keys.append((value, slot))
+        if not self.substring:
+            return
+        for gram in get_grams(value):
+            postings = self.grams.get(gram)
+            if postings is None:
+                self.grams[gram] = [slot]
+            else:
+                postings.append(slot)
+
+    def remove(self, slot, value):
+        """
+        从有序列表中移除（倒排表中的槽位保留，检索时跳过已删除的文档）
+        """
+        key = (value, slot)
+        i = bisect_left(self.keys, key)
+        if i < len(self.keys) and self.keys[i] == key:
+            del self.keys[i]
+
+    def prefix_matches(self, query, limit):
+        """
+        返回 (值等于关键词的槽位, 值以关键词开头的槽位)，各最多 limit 个
+        """
+        exact = []
+        prefix = []
+        for i in range(bisect_left(self.keys, (query,)), len(self.keys)):
+            value, slot = self.keys[i]
+            if not value.startswith(query):
+                break
+            if value == query:
+                if len(exact) >= limit:
+                    break
+                exact.append(slot)
+            elif len(prefix) < limit:
+                prefix.append(slot)
+            else:
+                break
+        return exact, prefix
+
+    def candidates(self, query):
+        """
+        可能包含关键词的槽位（取关键词中文档最少的语法对应的倒排表，需再校验）
+        """
+        if len(query) == 1:
+            return self.grams.get(query, ())
+        postings = [self.grams.get(query[i:i + 2]) for i in range(len(query) - 1)]
+        if not all(postings):
+            return ()
+        return min(postings, key=len)
+
+
+class DocumentIndex:
+    """
+    一类文档（人员或工位）的检索索引
+
+    文档按写入顺序分配槽位，更新时旧槽位作废、写入新槽位。
+    search_fields 支持精确、前缀和包含匹配，prefix_fields 只支持精确和前缀匹配。
+    """
+
+    def __init__(self, fields, search_fields, prefix_fields=()):
+        self.fields = fields
+        self.search_fields = search_fields
+        self.prefix_fields = prefix_fields
+        self.positions = [fields.index(field) for field in search_fields + prefix_fields]
+        self.field_indexes = (
+            [FieldIndex() for _ in search_fields] + [FieldIndex(substring=False) for _ in prefix_fields]
+        )
+        self.docs = []
+        self.slots = {}
+        self.dead = 0
+
+    def __len__(self):
+        return len(self.slots)
+
+    def add(self, row, keep_sorted=True):
+        """
+        写入文档（row 为按 fields 顺序的值元组），已存在时替换
+        """
+        self.remove(row[0])
+        slot = len(self.docs)
+        self.docs.append(row)
+        self.slots[row[0]] = slot
+        for position, field_index in zip(self.positions, self.field_indexes):
+            value = normalize(row[position])
+            if value:
+                field_index.add(slot, value, keep_sorted)
+
+    def remove(self, key):
+        slot = self.slots.pop(key, None)
+        if slot is None:
+            return
+        row = self.docs[slot]
+        self.docs[slot] = None
+        self.dead += 1
+        for position, field_index in zip(self.positions, self.field_indexes):
+            value = normalize(row[position])
+            if value:
+                field_index.remove(slot, value)
+
+    def sort(self):
+        """
+        批量写入（keep_sorted=False）后排序
+        """
+        for field_index in self.field_indexes:
+            field_index.keys.sort()
+
+    def needs_compact(self):
+        return self.dead > max(COMPACT_MIN_DEAD, len(self.slots))
+
+    def compacted(self):
+        """
+        仅含存活文档的新索引
+        """
+        index = DocumentIndex(self.fields, self.search_fields, self.prefix_fields)
+        for row in self.docs:
+            if row is not None:
+                index.add(row, keep_sorted=False)
+        index.sort()
+        return index
+
+    def search(self, query, limit, prefix_query=None):
+        """
+        检索文档，按值等于关键词、以关键词开头、包含关键词排序，同一层级内按字段优先级
+
+        prefix_query 为 prefix_fields 使用的关键词（默认同 query，为空时不匹配这些字段）。
+        """
+        if prefix_query is None:
+            prefix_query = query
+        exact = []
+        prefix = []
+        for i, field_index in enumerate(self.field_indexes):
+            field_query = query if i < len(self.search_fields) else prefix_query
+            if not field_query:
+                continue
+            field_exact, field_prefix = field_index.prefix_matches(field_query, limit)
+            exact.extend(field_exact)
+            prefix.extend(field_prefix)
+
+        rows = []
+        seen = set()
+        for slot in chain(exact, prefix, self.iter_contains(query)):
+            if slot in seen:
+                continue
+            seen.add(slot)
+            rows.append(self.docs[slot])
+            if len(rows) >= limit:
+                break
+        return rows
+
+    def iter_contains(self, query):
+        """
+        包含关键词但不以其开头的文档槽位
+        """
+        for position, field_index in zip(self.positions, self.field_indexes):
+            if not field_index.substring:
+                continue
+            for slot in field_index.candidates(query):
+                row = self.docs[slot]
+                if row is None:
+                    continue
+                value = normalize(row[position])
+                if query in value and not value.startswith(query):
+                    yield slot
+
+
+def load_user_rows(queryset):
+    """
+    读取人员索引行
+    """
+    return queryset.values_list(*USER_INDEX_FIELDS)
+
+
+def load_seat_rows(queryset):
+    """
+    读取工位索引行（附加绑定人员姓名的拼音检索键，同名人员只计算一次）
+    """
+    name_position = SEAT_FIELDS.index('current_user_name')
+    for row in queryset.values_list(*SEAT_INDEX_FIELDS[:-2]).iterator():
+        yield row + get_pinyin_keys(row[name_position])
+
+
+def load_locations(area_ids=None):
+    """
+    区域ID到 (区域名称, 楼层名称, 场地名称) 的映射，指定 area_ids 时只读取这些区域
+    """
+    areas = Area.objects.all() if area_ids is None else Area.objects.filter(id__in=area_ids)
+    return {
+        area_id: location
+        for area_id, *location in areas.values_list(
+            'id', 'area_name', 'floor__floor_name', 'floor__venue__name'
+        )
+    }
+
+
+def new_user_index():
+    return DocumentIndex(USER_INDEX_FIELDS, USER_SEARCH_FIELDS, USER_PREFIX_FIELDS)
+
+
+def new_seat_index():
+    return DocumentIndex(SEAT_INDEX_FIELDS, SEAT_SEARCH_FIELDS, SEAT_PREFIX_FIELDS)
+
+
+class SearchIndex:
+    """
+    进程内全局搜索索引（在职人员和全部工位）
+
+    首次检索时从数据库建立，建立完成前检索返回None（调用方查询数据库）。
+    background 为真时建立和定时刷新在后台线程中执行，请求不等待；同一时间只有一个线程建立或刷新，
+    新索引在锁外读取完成后再替换。本进程的人员同步和工位绑定等写操作在事务提交后
+    按ID重新读取对应行更新索引；其他进程的写入由定时增量刷新读取
+    （按更新时间，人员或工位数量与数据库不一致时整体重建）。
+    工位的区域、楼层、场地名称单独保存，检索结果不再额外查询。
+    人员和工位绑定人员的姓名另按拼音全拼、首字母前缀匹配。
+    """
+
+    def __init__(self, refresh_seconds, background=True):
+        self.refresh_seconds = refresh_seconds
+        self.background = background
+        self.users = new_user_index()
+        self.seats = new_seat_index()
+        self.locations = {}
+        self.built = False
+        self.synced_at = None
+        self.checked_at = 0.0
+        self._lock = threading.RLock()
+        # 建立或刷新索引的线程持有（不阻塞检索）
+        self._update_lock = threading.Lock()
+
+    def search(self, query, limit=10):
+        """
+        检索人员和工位，返回格式与数据库检索一致；索引尚未建立完成时返回None
+        """
+        self.ensure_current()
+        if not self.built:
+            return None
+
+        pinyin_query = normalize_pinyin(query)
+        query = normalize(query)
+        area_position = SEAT_INDEX_FIELDS.index('area_id')
+        with self._lock:
+            user_rows = self.users.search(query, limit, pinyin_query)
+            seat_rows = self.seats.search(query, limit, pinyin_query)
+            locations = [self.locations.get(row[area_position], (None, None, None)) for row in seat_rows]
+
+        seats = []
+        for row, (area_name, floor_name, venue_name) in zip(seat_rows, locations):
+            seat = dict(zip(SEAT_FIELDS, row))
+            seat.update({'area_name': area_name, 'floor_name': floor_name, 'venue_name': venue_name})
+            seats.append(seat)
+        return {
+            'users': [dict(zip(USER_FIELDS, row)) for row in user_rows],
+            'seats': seats
+        }
+
+    def ensure_current(self):
+        """
+        尚未建立时建立索引，超过刷新间隔时增量刷新；其他线程正在建立或刷新时直接返回
+        """
+        if self.built and time.monotonic() - self.checked_at < self.refresh_seconds:
+            return
+        if not self._update_lock.acquire(blocking=False):
+            return
+        if self.background:
+            threading.Thread(target=self._update_in_background, name='search-index', daemon=True).start()
+        else:
+            self._update()
+
+    def _update(self):
+        try:
+            if self.built:
+                self.refresh()
+            else:
+                self.build()
+        finally:
+            self._update_lock.release()
+
+    def _update_in_background(self):
+        try:
+            self._update()
+        except Exception:
+            logger.exception('更新搜索索引失败')
+        finally:
+            connection.close()
+
+    def build(self):
+        """
+        从数据库建立索引（在锁外读取，完成后替换当前索引）
+        """
+        started = timezone.now()
+        users = new_user_index()
+        for row in load_user_rows(User.objects.filter(status=1).order_by('id')).iterator():
+            users.add(row, keep_sorted=False)
+        users.sort()
+
+        seats = new_seat_index()
+        for row in load_seat_rows(Seat.objects.order_by('id')):
+            seats.add(row, keep_sorted=False)
+        seats.sort()
+        locations = load_locations()
+
+        with self._lock:
+            self.users = users
+            self.seats = seats
+            self.locations = locations
+            self.built = True
+            self.synced_at = started
+            self.checked_at = time.monotonic()
+
+    def refresh(self):
+        """
+        增量刷新：重新读取上次刷新以来更新过的人员和工位
+
+        读取范围向前多留一个刷新间隔，覆盖刷新时尚未提交的事务。
+        """
+        started = timezone.now()
+        since = self.synced_at - timedelta(seconds=self.refresh_seconds)
+        user_rows = list(load_user_rows(User.objects.filter(updated_at__gte=since)))
+        seat_rows = list(load_seat_rows(Seat.objects.filter(updated_at__gte=since)))
+        locations = load_locations()
+        user_count = User.objects.filter(status=1).count()
+        seat_count = Seat.objects.count()
+
+        with self._lock:
+            self.apply_users(user_rows)
+            self.apply_seats(seat_rows)
+            self.locations = locations
+            # 有删除的人员或工位时增量无法发现，需要整体重建
+            rebuild = len(self.users) != user_count or len(self.seats) != seat_count
+            if not rebuild:
+                self.synced_at = started
+                self.checked_at = time.monotonic()
+        if rebuild:
+            self.build()
+
+    def apply_users(self, rows, user_ids=()):
+        """
+        写入人员行（离职人员移除），user_ids 中未读取到的人员视为已删除
+        """
+        with self._lock:
+            for row in rows:
+                if row[USER_FIELDS.index('status')] == 1:
+                    self.users.add(row)
+                else:
+                    self.users.remove(row[0])
+            for user_id in set(user_ids) - {row[0] for row in rows}:
+                self.users.remove(user_id)
+            if self.users.needs_compact():
+                self.users = self.users.compacted()
+
+    def apply_seats(self, rows, locations=None, seat_ids=()):
+        """
+        写入工位行及其区域位置，seat_ids 中未读取到的工位视为已删除
+        """
+        with self._lock:
+            for row in rows:
+                self.seats.add(row)
+            for seat_id in set(seat_ids) - {row[0] for row in rows}:
+                self.seats.remove(seat_id)
+            if locations:
+                self.locations.update(locations)
+            if self.seats.needs_compact():
+                self.seats = self.seats.compacted()
+
+    def reload_users(self, user_ids):
+        """
+        按ID重新读取人员
+        """
+        if not self.built:
+            return
+        user_ids = list(user_ids)
+        for i in range(0, len(user_ids), RELOAD_CHUNK_SIZE):
+            chunk = user_ids[i:i + RELOAD_CHUNK_SIZE]
+            self.apply_users(list(load_user_rows(User.objects.filter(id__in=chunk))), chunk)
+
+    def reload_seats(self, seat_ids=(), area_ids=()):
+        """
+        按工位ID或区域ID重新读取工位，只重新读取涉及区域的位置
+        """
+        if not self.built:
+            return
+        area_position = SEAT_INDEX_FIELDS.index('area_id')
+        seat_ids = list(seat_ids)
+        for i in range(0, len(seat_ids), RELOAD_CHUNK_SIZE):
+            chunk = seat_ids[i:i + RELOAD_CHUNK_SIZE]
+            rows = list(load_seat_rows(Seat.objects.filter(id__in=chunk)))
+            self.apply_seats(rows, load_locations({row[area_position] for row in rows}), chunk)
+        if area_ids:
+            rows = list(load_seat_rows(Seat.objects.filter(area_id__in=area_ids)))
+            self.apply_seats(rows, load_locations(area_ids))
+
+
+_index = None
+_index_lock = threading.Lock()
+
+
+def get_search_index():
+    """
+    获取当前进程的搜索索引
+    """
+    global _index
+    if _index is None:
+        with _index_lock:
+            if _index is None:
+                _index = SearchIndex(
+                    settings.SEARCH_INDEX_REFRESH_SECONDS, settings.SEARCH_INDEX_BACKGROUND_BUILD
+                )
+    return _index
+
+
+def reset_search_index():
+    """
+    丢弃当前进程的搜索索引（下次检索时重新建立，主要用于测试）
+    """
+    global _index
+    with _index_lock:
+        _index = None
+
+
+def refresh_search_users(user_ids):
+    """
+    事务提交后重新索引指定人员（当前进程尚未建立索引时不做任何事）
+    """
+    user_ids = {user_id for user_id in user_ids if user_id}
+    if not user_ids:
+        return
+
+    def reload():
+        if _index is not None:
+            _index.reload_users(user_ids)
+
+    transaction.on_commit(reload)
+
+
+def refresh_search_seats(seat_ids=(), area_ids=()):
+    """
+    事务提交后重新索引指定工位或区域内的全部工位（当前进程尚未建立索引时不做任何事）
+    """
+    seat_ids = {seat_id for seat_id in seat_ids if seat_id is not None}
+    area_ids = {area_id for area_id in area_ids if area_id is not None}
+    if not seat_ids and not area_ids:
+        return
+
+    def reload():
+        if _index is not None:
+            _index.reload_seats(seat_ids, area_ids)
+
+    transaction.on_commit(reload)
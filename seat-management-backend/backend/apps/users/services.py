@@ -1,59 +1,261 @@
+import hashlib
+import time
+from itertools import islice
+from django.conf import settings
 from django.db import transaction
-from django.db.models import Q
+from django.utils import timezone
+from django.db.models import Q, Max, Count, OuterRef, Subquery
 from .models import User
+from backend.apps.floors.models import Floor
+from backend.apps.areas.models import Area
 from backend.apps.seats.models import Seat
+from backend.apps.floors.cache import get_cached_floor_map, set_cached_floor_map
+from .search_index import get_search_index, refresh_search_users, refresh_search_seats
+from .pinyin import get_pinyin_keys
+
+
+# 释放离职人员工位时每批处理的人员数
+RELEASE_CHUNK_SIZE = 500
+
+
+# 同步时比较的人员字段（拼音检索键由姓名生成，一并比较和写入）
+USER_SYNC_FIELDS = (
+    'name', 'name_pinyin', 'name_initials', 'dept_id', 'dept_name', 'position', 'phone', 'email', 'status'
+)
+
+
+def build_user_defaults(user_data):
+    """
+    将OA人员数据转换为人员字段
+    """
+    # 转换状态
+    status = 1 if user_data.get('status') == '在职' else 0
+    name = user_data.get('name', '')
+    name_pinyin, name_initials = get_pinyin_keys(name)
+    
+    return {
+        'name': name,
+        'name_pinyin': name_pinyin,
+        'name_initials': name_initials,
+        'dept_id': user_data.get('dept_id', ''),
+        'dept_name': user_data.get('dept_name', ''),
+        'position': user_data.get('position', ''),
+        'phone': user_data.get('phone', ''),
+        'email': user_data.get('email', ''),
+        'status': status
+    }
+
+
+def get_user_fields_hash(values):
+    """
+    计算人员同步字段的哈希值，用于判断数据是否变化
+    """
+    return hashlib.md5(
+        repr(tuple(values[field] for field in USER_SYNC_FIELDS)).encode('utf-8')
+    ).hexdigest()
+
+
+def new_sync_report():
+    """
+    创建人员同步统计
+    """
+    return {
+        'synced_count': 0,
+        'created_count': 0,
+        'updated_count': 0,
+        'unchanged_count': 0,
+        'departed_count': 0,
+        'chunks': []
+    }
 
 
 def sync_users(users_data):
     """
     同步人员信息
     """
+    return bulk_sync_users(users_data)['synced_count']
+
+
+def bulk_sync_users(users_data, chunk_size=None, report=None):
+    """
+    差异化批量同步人员信息
+
+    按批次处理：每批一次查询加载已有人员，按字段哈希区分新增、变更和无变化，
+    再通过 bulk_create / bulk_update 写入，每批使用独立事务。
+    传入 report 时在其基础上累加统计（用于分页拉取时多次调用）。
+    """
+    chunk_size = chunk_size or settings.USER_SYNC_CHUNK_SIZE
+    if report is None:
+        report = new_sync_report()
+    
+    users_iter = iter(users_data)
+    while True:
+        chunk = list(islice(users_iter, chunk_size))
+        if not chunk:
+            break
+        sync_user_chunk(chunk, report, chunk_size)
+    
+    return report
+
+
+def sync_user_chunk(chunk, report, batch_size):
+    """
+    同步一批人员信息
+
+    离职人员只统计和释放本次变为离职的人员，以及此前已离职但仍占用工位的人员。
+    """
+    started = time.perf_counter()
+    
+    # 同一批次内重复的人员以最后一条为准
+    records = {}
     synced_count = 0
+    for user_data in chunk:
+        user_id = user_data.get('user_id')
+        if not user_id:
+            continue
+        records[user_id] = build_user_defaults(user_data)
+        synced_count += 1
+    
+    to_create = []
+    to_update = []
+    departed_ids = []
+    already_departed_ids = []
+    unchanged_count = 0
     
     with transaction.atomic():
-        for user_data in users_data:
-            user_id = user_data.get('user_id')
-            if not user_id:
-                continue
-            
-            # 转换状态
-            status = 1 if user_data.get('status') == '在职' else 0
-            
-            # 更新或创建用户
-            user, created = User.objects.update_or_create(
-                id=user_id,
-                defaults={
-                    'name': user_data.get('name', ''),
-                    'dept_id': user_data.get('dept_id', ''),
-                    'dept_name': user_data.get('dept_name', ''),
-                    'position': user_data.get('position', ''),
-                    'phone': user_data.get('phone', ''),
-                    'email': user_data.get('email', ''),
-                    'status': status
-                }
-            )
-            
-            # 如果用户离职，解绑所有工位
-            if status == 0:
-                unbind_user_seats(user_id)
+        existing = User.objects.in_bulk(list(records))
+        now = timezone.now()
+        
+        for user_id, defaults in records.items():
+            user = existing.get(user_id)
+            was_departed = user is not None and user.status == 0
+            if user is None:
+                to_create.append(User(id=user_id, **defaults))
+            elif get_user_fields_hash(user.__dict__) != get_user_fields_hash(defaults):
+                for field, value in defaults.items():
+                    setattr(user, field, value)
+                user.updated_at = now
+                to_update.append(user)
+            else:
+                unchanged_count += 1
             
-            synced_count += 1
+            # 本次变为离职的人员需要解绑工位
+            if defaults['status'] == 0:
+                if was_departed:
+                    already_departed_ids.append(user_id)
+                else:
+                    departed_ids.append(user_id)
+        
+        # 此前已离职的人员只处理仍占用工位的
+        if already_departed_ids:
+            departed_ids += set(Seat.objects.filter(
+                current_user_id__in=already_departed_ids
+            ).values_list('current_user_id', flat=True))
+        
+        if to_create:
+            User.objects.bulk_create(to_create, batch_size=batch_size)
+        if to_update:
+            User.objects.bulk_update(to_update, USER_SYNC_FIELDS + ('updated_at',), batch_size=batch_size)
+        
+        # 离职人员的工位按集合一次性释放
+        release_user_seats(departed_ids)
+        
+        # 更新搜索索引
+        refresh_search_users([user.id for user in to_create + to_update])
     
-    return synced_count
+    report['synced_count'] += synced_count
+    report['created_count'] += len(to_create)
+    report['updated_count'] += len(to_update)
+    report['unchanged_count'] += unchanged_count
+    report['departed_count'] += len(departed_ids)
+    report['chunks'].append({
+        'chunk': len(report['chunks']) + 1,
+        'rows': len(chunk),
+        'created': len(to_create),
+        'updated': len(to_update),
+        'unchanged': unchanged_count,
+        'departed': len(departed_ids),
+        'elapsed_ms': round((time.perf_counter() - started) * 1000, 1)
+    })
 
 
 def unbind_user_seats(user_id):
     """
     解绑用户的所有工位
     """
-    seats = Seat.objects.filter(current_user_id=user_id)
-    for seat in seats:
-        seat.current_user_id = None
-        seat.current_user_name = None
-        seat.current_dept_id = None
-        seat.seat_status = 0
-        seat.bind_type = 0
-        seat.save()
+    return release_user_seats([user_id])
+
+
+def release_user_seats(user_ids, operator_id="system", operator_name="系统"):
+    """
+    批量释放人员占用的工位（人员离职）
+
+    按批次执行：一次查询锁定并读取工位，一次 UPDATE 解绑，一次批量插入
+    OA同步日志（操作类型9），查询次数与工位数量无关。返回释放的工位数。
+    """
+    from backend.apps.logs.models import SeatLog
+    from backend.apps.logs.writer import write_seat_logs
+    from backend.apps.seats.counters import new_counter_changes, move_seat_count, apply_seat_counter_changes
+    
+    user_ids = list(dict.fromkeys(user_ids))
+    released_count = 0
+    released_seat_ids = []
+    
+    for i in range(0, len(user_ids), RELEASE_CHUNK_SIZE):
+        chunk = user_ids[i:i + RELEASE_CHUNK_SIZE]
+        
+        with transaction.atomic():
+            seats = list(
+                Seat.objects.select_for_update()
+                .filter(current_user_id__in=chunk)
+                .order_by('id')
+                .values(
+                    'id', 'area_id', 'seat_no', 'seat_status', 'current_user_id',
+                    'current_user_name', 'current_dept_id'
+                )
+            )
+            if not seats:
+                continue
+            
+            # 解绑工位
+            Seat.objects.filter(current_user_id__in=chunk).update(
+                current_user_id=None,
+                current_user_name=None,
+                current_dept_id=None,
+                seat_status=0,
+                bind_type=0,
+                updated_at=timezone.now()
+            )
+            
+            # 记录操作日志
+            write_seat_logs([
+                SeatLog(
+                    seat_id=seat['id'],
+                    seat_no=seat['seat_no'],
+                    operation_type=9,  # 9:OA系统同步
+                    old_user_id=seat['current_user_id'],
+                    old_user_name=seat['current_user_name'],
+                    new_user_id=None,
+                    new_user_name=None,
+                    operator_id=operator_id,
+                    operator_name=operator_name,
+                    operation_remark=f'人员 {seat["current_user_name"]} 离职，解绑工位 {seat["seat_no"]}'
+                )
+                for seat in seats
+            ])
+            
+            # 更新工位状态计数
+            changes = new_counter_changes()
+            for seat in seats:
+                move_seat_count(changes, seat['area_id'], seat['seat_status'], seat['current_dept_id'], 0, None)
+            apply_seat_counter_changes(changes)
+        
+        released_count += len(seats)
+        released_seat_ids.extend(seat['id'] for seat in seats)
+    
+    refresh_search_seats(released_seat_ids)
+    
+    return released_count
 
 
 def process_user_change(user_change_data):
@@ -64,25 +266,17 @@ def process_user_change(user_change_data):
     if not user_id:
         return False
     
-    # 转换状态
-    status = 1 if user_change_data.get('status') == '在职' else 0
+    defaults = build_user_defaults(user_change_data)
     
     # 更新用户信息
     user, created = User.objects.update_or_create(
         id=user_id,
-        defaults={
-            'name': user_change_data.get('name', ''),
-            'dept_id': user_change_data.get('dept_id', ''),
-            'dept_name': user_change_data.get('dept_name', ''),
-            'position': user_change_data.get('position', ''),
-            'phone': user_change_data.get('phone', ''),
-            'email': user_change_data.get('email', ''),
-            'status': status
-        }
+        defaults=defaults
     )
+    refresh_search_users([user_id])
     
     # 如果用户离职，解绑所有工位
-    if status == 0:
+    if defaults['status'] == 0:
         unbind_user_seats(user_id)
     
     return True
@@ -91,16 +285,31 @@ def process_user_change(user_change_data):
 def search(query):
     """
     全局搜索人员和工位
+
+    启用搜索索引时在进程内索引中检索（按精确、前缀、包含匹配排序，见 search_index），
+    未启用或索引尚未建立完成时直接查询数据库。
     """
+    if settings.SEARCH_INDEX_ENABLED:
+        results = get_search_index().search(query)
+        if results is not None:
+            return results
+    
+    # 拼音检索：全拼或首字母前缀匹配（检索键为小写，忽略空格等分隔符）
+    pinyin_query = ''.join(ch for ch in query if ch.isalnum()).lower()
+    pinyin_match = Q(name_pinyin__startswith=pinyin_query) | Q(name_initials__startswith=pinyin_query)
+    if not pinyin_query:
+        pinyin_match = Q(pk__in=[])
+    
     # 搜索人员
     users = User.objects.filter(
-        Q(name__icontains=query) | Q(id__icontains=query) | Q(dept_name__icontains=query)
+        Q(name__icontains=query) | Q(id__icontains=query) | Q(dept_name__icontains=query) | pinyin_match
     ).filter(status=1)[:10]
     
-    # 搜索工位
+    # 搜索工位（拼音按绑定人员匹配）
     seats = Seat.objects.filter(
-        Q(seat_no__icontains=query) | Q(current_user_name__icontains=query)
-    )[:10]
+        Q(seat_no__icontains=query) | Q(current_user_name__icontains=query) |
+        Q(current_user_id__in=User.objects.filter(pinyin_match).values('id'))
+    ).select_related('area__floor__venue')[:10]
     
     # 格式化结果
     user_results = []
@@ -140,7 +349,7 @@ def get_user_seats(user_id):
     """
     获取用户的所有工位
     """
-    seats = Seat.objects.filter(current_user_id=user_id, seat_status=1)
+    seats = Seat.objects.filter(current_user_id=user_id, seat_status=1).select_related('area__floor__venue')
     
     # 格式化结果
     seat_results = []
@@ -161,7 +370,7 @@ def get_seat_with_user(seat_id):
     """
     获取带人员信息的工位详情
     """
-    seat = Seat.objects.get(id=seat_id)
+    seat = Seat.objects.select_related('area__floor__venue').get(id=seat_id)
     
     # 构建结果
     result = {
@@ -197,4 +406,141 @@ def get_seat_with_user(seat_id):
         except User.DoesNotExist:
             pass
     
-    return result
\ No newline at end of file
+    return result
+
+
+def get_floor_snapshot(floor_id):
+    """
+    获取楼层快照（含区域、工位）
+
+    固定3次查询：楼层（含场地）、启用区域、区域下所有工位，在内存中按区域分组，
+    查询次数不随区域数量增长。楼层不存在或已停用时抛出 Floor.DoesNotExist。
+    """
+    floor = Floor.objects.filter(id=floor_id, status=1).values(
+        'id', 'venue_id', 'venue__name', 'floor_no', 'floor_name', 'image_url'
+    ).first()
+    if floor is None:
+        raise Floor.DoesNotExist('楼层不存在或已停用')
+    
+    areas = Area.objects.filter(floor_id=floor_id, status=1).order_by('id').values(
+        'id', 'area_no', 'area_name', 'area_type', 'seat_count', 'position_css'
+    )
+    seats = Seat.objects.filter(area__floor_id=floor_id, area__status=1).order_by('id').values(
+        'id', 'area_id', 'seat_no', 'seat_status', 'current_user_id', 'current_user_name',
+        'grid_row', 'grid_col', 'position_x', 'position_y'
+    )
+    
+    # 按区域分组工位
+    seats_by_area = {}
+    for seat in seats:
+        area_id = seat.pop('area_id')
+        seats_by_area.setdefault(area_id, []).append(seat)
+    
+    # 构建结果
+    result = {
+        "id": floor['id'],
+        "venue_id": floor['venue_id'],
+        "venue_name": floor['venue__name'],
+        "floor_no": floor['floor_no'],
+        "floor_name": floor['floor_name'],
+        "image_url": floor['image_url'],
+        "areas": []
+    }
+    
+    for area in areas:
+        area["seats"] = seats_by_area.get(area['id'], [])
+        result["areas"].append(area)
+    
+    return result
+
+
+def get_floor_map(floor_id, etag=None):
+    """
+    获取楼层平面图（优先读取缓存）
+
+    缓存按（楼层ID, 楼层详情ETag）存储，ETag由数据库计算，任何写入都会产生新的缓存键，
+    无需在写入处失效缓存。已计算ETag时可直接传入。
+    """
+    etag = etag or get_floor_detail_etag(floor_id)
+    result = get_cached_floor_map(floor_id, etag)
+    if result is None:
+        result = get_floor_snapshot(floor_id)
+        set_cached_floor_map(floor_id, etag, result)
+    return result
+
+
+def make_etag(*parts):
+    """
+    根据数据版本信息生成强ETag
+    """
+    return hashlib.md5(repr(parts).encode('utf-8')).hexdigest()
+
+
+def get_floor_list_etag():
+    """
+    楼层列表ETag：启用楼层及其场地的最大更新时间和楼层数
+    """
+    stats = Floor.objects.filter(status=1).aggregate(
+        floor_updated=Max('updated_at'),
+        venue_updated=Max('venue__updated_at'),
+        floor_count=Count('id')
+    )
+    return make_etag('floor_list', stats['floor_updated'], stats['venue_updated'], stats['floor_count'])
+
+
+def get_floor_detail_etag(floor_id):
+    """
+    楼层详情ETag：楼层、场地、启用区域及其工位的最大更新时间和数量
+
+    楼层不存在或已停用时返回None。
+    """
+    active_area = Q(area_set__status=1)
+    stats = Floor.objects.filter(id=floor_id, status=1).aggregate(
+        floor_updated=Max('updated_at'),
+        venue_updated=Max('venue__updated_at'),
+        area_updated=Max('area_set__updated_at', filter=active_area),
+        area_count=Count('area_set', filter=active_area, distinct=True),
+        seat_updated=Max('area_set__seat_set__updated_at', filter=active_area),
+        seat_count=Count('area_set__seat_set', filter=active_area, distinct=True)
+    )
+    if stats['floor_updated'] is None:
+        return None
+    return make_etag(
+        'floor_detail', floor_id,
+        stats['floor_updated'], stats['venue_updated'],
+        stats['area_updated'], stats['area_count'],
+        stats['seat_updated'], stats['seat_count']
+    )
+
+
+def get_seat_detail_etag(seat_id):
+    """
+    工位详情ETag：工位、区域、楼层、场地及绑定人员的更新时间
+
+    工位不存在时返回None。
+    """
+    stats = Seat.objects.filter(id=seat_id).values(
+        'updated_at', 'area__updated_at', 'area__floor__updated_at',
+        'area__floor__venue__updated_at', 'current_user_id'
+    ).annotate(
+        user_updated=Subquery(
+            User.objects.filter(id=OuterRef('current_user_id')).values('updated_at')[:1]
+        )
+    ).first()
+    if stats is None:
+        return None
+    return make_etag('seat_detail', seat_id, *stats.values())
+
+
+def get_user_seats_etag(user_id):
+    """
+    我的工位ETag：用户占用工位及其区域、楼层、场地的最大更新时间和工位数
+    """
+    stats = Seat.objects.filter(current_user_id=user_id, seat_status=1).aggregate(
+        seat_updated=Max('updated_at'),
+        area_updated=Max('area__updated_at'),
+        floor_updated=Max('area__floor__updated_at'),
+        venue_updated=Max('area__floor__venue__updated_at'),
+        seat_count=Count('id')
+    )
+    return make_etag('user_seats', user_id, *stats.values())
\ No newline at end of file
@@ -1,3 +1,739 @@
-from django.test import TestCase
+import threading
+from datetime import timedelta
+from io import StringIO
+from unittest.mock import patch
+from django.core.management import call_command
+from django.test import TestCase, override_settings
+from django.urls import reverse
+from django.utils import timezone
+from rest_framework.test import APIClient
+from rest_framework import status
+from backend.apps.venues.models import Venue
+from backend.apps.floors.models import Floor
+from backend.apps.areas.models import Area
+from backend.apps.seats.models import Seat
+from backend.apps.users.models import User
+from backend.apps.authentication.models import User as AuthUser
+from backend.apps.floors import cache as floor_cache
+from backend.apps.floors.cache import reset_floor_map_store, get_floor_map_store, RedisFloorMapStore
+from backend.apps.seats.services import bind_user_to_seat
+from backend.apps.logs.models import SeatLog
+from backend.apps.users.services import (
+    get_floor_snapshot, get_floor_map, bulk_sync_users, sync_users, release_user_seats, search,
+    process_user_change
+)
+from backend.apps.users import search_index
+from backend.apps.users.search_index import get_search_index, reset_search_index
+from backend.apps.users.pinyin import get_pinyin_keys
 
-# Create your tests here.
+
+class FloorSnapshotTest(TestCase):
+    """
+    楼层快照测试
+    """
+    
+    def setUp(self):
+        """
+        测试初始化
+        """
+        self.venue = Venue.objects.create(name='测试场地', code='V001', city='上海', address='测试地址')
+        self.floor = Floor.objects.create(venue=self.venue, floor_no='1F', floor_name='测试楼层')
+    
+    def create_areas(self, count, seats_per_area=3):
+        """
+        创建区域和工位
+        """
+        for i in range(count):
+            area = Area.objects.create(
+                floor=self.floor,
+                area_no=str(i + 1),
+                area_name=f'区域{i + 1}'
+            )
+            Seat.objects.bulk_create([
+                Seat(area=area, seat_no=f'{i + 1}-{j + 1}', grid_row=1, grid_col=j + 1)
+                for j in range(seats_per_area)
+            ])
+    
+    def test_query_count_is_constant(self):
+        """
+        查询次数不随区域数量增长
+        """
+        self.create_areas(1)
+        with self.assertNumQueries(3):
+            get_floor_snapshot(self.floor.id)
+        
+        Area.objects.filter(floor=self.floor).delete()
+        self.create_areas(40)
+        with self.assertNumQueries(3):
+            snapshot = get_floor_snapshot(self.floor.id)
+        self.assertEqual(len(snapshot['areas']), 40)
+        self.assertEqual(sum(len(area['seats']) for area in snapshot['areas']), 120)
+    
+    def test_snapshot_shape(self):
+        """
+        快照结构与原接口一致，仅包含启用区域
+        """
+        self.create_areas(2)
+        Area.objects.filter(floor=self.floor, area_no='2').update(status=0)
+        seat = Seat.objects.get(seat_no='1-1')
+        
+        snapshot = get_floor_snapshot(self.floor.id)
+        
+        self.assertEqual(
+            list(snapshot.keys()),
+            ['id', 'venue_id', 'venue_name', 'floor_no', 'floor_name', 'image_url', 'areas']
+        )
+        self.assertEqual(snapshot['venue_name'], '测试场地')
+        self.assertEqual(len(snapshot['areas']), 1)
+        area = snapshot['areas'][0]
+        self.assertEqual(
+            list(area.keys()),
+            ['id', 'area_no', 'area_name', 'area_type', 'seat_count', 'position_css', 'seats']
+        )
+        self.assertEqual(area['seats'][0], {
+            "id": seat.id,
+            "seat_no": '1-1',
+            "seat_status": 0,
+            "current_user_id": None,
+            "current_user_name": None,
+            "grid_row": 1,
+            "grid_col": 1,
+            "position_x": 0.0,
+            "position_y": 0.0
+        })
+    
+    def test_inactive_floor(self):
+        """
+        停用楼层返回404
+        """
+        self.floor.status = 0
+        self.floor.save()
+        
+        client = APIClient()
+        client.force_authenticate(AuthUser.objects.create_user(username='admin', password='admin123'))
+        response = client.get(reverse('user_floor_detail', args=[self.floor.id]))
+        self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
+
+
+
+@override_settings(FLOOR_MAP_CACHE_STORE='local')
+class FloorMapCacheTest(TestCase):
+    """
+    楼层平面图缓存测试
+    """
+    
+    def setUp(self):
+        """
+        测试初始化
+        """
+        reset_floor_map_store()
+        venue = Venue.objects.create(name='测试场地', code='V001', city='上海', address='测试地址')
+        self.floor = Floor.objects.create(venue=venue, floor_no='1F', floor_name='测试楼层')
+        area = Area.objects.create(floor=self.floor, area_no='1', area_name='区域1')
+        self.seat = Seat.objects.create(area=area, seat_no='1-1')
+        self.user = User.objects.create(
+            id='user001', name='测试用户', dept_id='dept001', dept_name='测试部门', position='测试职位'
+        )
+    
+    def tearDown(self):
+        reset_floor_map_store()
+    
+    def test_cache_hit_skips_snapshot(self):
+        """
+        缓存命中时只查询ETag，不再查询楼层快照
+        """
+        with self.assertNumQueries(4):
+            first = get_floor_map(self.floor.id)
+        with self.assertNumQueries(1):
+            second = get_floor_map(self.floor.id)
+        self.assertEqual(first, second)
+    
+    def test_write_from_other_process_invalidates_cache(self):
+        """
+        其他进程写入（当前进程未收到失效通知）后不会读到旧缓存
+        """
+        get_floor_map(self.floor.id)
+        
+        Seat.objects.filter(id=self.seat.id).update(
+            seat_status=2, updated_at=timezone.now() + timedelta(seconds=1)
+        )
+        
+        result = get_floor_map(self.floor.id)
+        self.assertEqual(result['areas'][0]['seats'][0]['seat_status'], 2)
+    
+    def test_shared_store_keys_payload_by_etag(self):
+        """
+        共享存储（Redis）按ETag取数：其他进程写入后返回的数据与新ETag一致
+        """
+        data = {}
+        
+        class FakeRedis:
+            def get(self, key):
+                return data.get(key)
+            
+            def set(self, key, value, ex=None):
+                data[key] = value.encode('utf-8')
+        
+        with patch.object(floor_cache, '_store', RedisFloorMapStore(FakeRedis(), 60)):
+            get_floor_map(self.floor.id)
+            Seat.objects.filter(id=self.seat.id).update(
+                seat_status=2, updated_at=timezone.now() + timedelta(seconds=1)
+            )
+            result = get_floor_map(self.floor.id)
+        
+        self.assertEqual(result['areas'][0]['seats'][0]['seat_status'], 2)
+        self.assertEqual(len(data), 2)
+    
+    @override_settings(FLOOR_MAP_CACHE_STORE='redis', REDIS_URL='')
+    def test_redis_store_unavailable_logs_error(self):
+        """
+        显式配置Redis存储但不可用时记录错误日志并退回进程内存储
+        """
+        with self.assertLogs('backend.apps.floors.cache', level='ERROR'):
+            store = get_floor_map_store()
+        self.assertNotIsInstance(store, RedisFloorMapStore)
+    
+    def test_seat_binding_invalidates_cache(self):
+        """
+        绑定工位后楼层缓存失效
+        """
+        get_floor_map(self.floor.id)
+        
+        with self.captureOnCommitCallbacks(execute=True):
+            bind_user_to_seat(self.seat.id, self.user.id)
+        
+        with self.assertNumQueries(4):
+            result = get_floor_map(self.floor.id)
+        seat_info = result['areas'][0]['seats'][0]
+        self.assertEqual(seat_info['current_user_id'], 'user001')
+        self.assertEqual(seat_info['seat_status'], 1)
+    
+    def test_seat_update_view_invalidates_cache(self):
+        """
+        通过接口修改工位后楼层缓存失效
+        """
+        client = APIClient()
+        client.force_authenticate(AuthUser.objects.create_user(username='admin', password='admin123'))
+        client.get(reverse('user_floor_detail', args=[self.floor.id]))
+        
+        with self.captureOnCommitCallbacks(execute=True):
+            response = client.patch(
+                reverse('seat_retrieve_update_destroy', args=[self.seat.id]),
+                {'seat_status': 2},
+                format='json'
+            )
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        
+        response = client.get(reverse('user_floor_detail', args=[self.floor.id]))
+        self.assertEqual(response.data['areas'][0]['seats'][0]['seat_status'], 2)
+
+@override_settings(FLOOR_MAP_CACHE_STORE='local')
+class ConditionalGetTest(TestCase):
+    """
+    员工端接口条件请求（ETag/304）测试
+    """
+    
+    def setUp(self):
+        """
+        测试初始化
+        """
+        reset_floor_map_store()
+        venue = Venue.objects.create(name='测试场地', code='V001', city='上海', address='测试地址')
+        self.floor = Floor.objects.create(venue=venue, floor_no='1F', floor_name='测试楼层')
+        area = Area.objects.create(floor=self.floor, area_no='1', area_name='区域1')
+        self.seat = Seat.objects.create(area=area, seat_no='1-1')
+        User.objects.create(
+            id='admin', name='管理员', dept_id='dept001', dept_name='测试部门', position='测试职位'
+        )
+        self.client = APIClient()
+        self.client.force_authenticate(AuthUser.objects.create_user(username='admin', password='admin123'))
+    
+    def tearDown(self):
+        reset_floor_map_store()
+    
+    def assert_not_modified(self, url):
+        """
+        携带ETag再次请求时返回304且只执行一次查询
+        """
+        response = self.client.get(url)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        etag = response['ETag']
+        
+        with self.assertNumQueries(1):
+            response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, status.HTTP_304_NOT_MODIFIED)
+        self.assertEqual(response.content, b'')
+        return etag
+    
+    def test_floor_list(self):
+        self.assert_not_modified(reverse('user_floor_list'))
+    
+    def test_seat_detail(self):
+        self.assert_not_modified(reverse('user_seat_detail', args=[self.seat.id]))
+    
+    def test_my_seat(self):
+        url = reverse('user_my_seat')
+        etag = self.assert_not_modified(url)
+        
+        bind_user_to_seat(self.seat.id, 'admin')
+        response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(len(response.data['seats']), 1)
+    
+    def test_floor_detail_changes_after_seat_update(self):
+        url = reverse('user_floor_detail', args=[self.floor.id])
+        etag = self.assert_not_modified(url)
+        
+        self.seat.seat_status = 2
+        self.seat.save()
+        response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertNotEqual(response['ETag'], etag)
+    
+    def test_floor_detail_changes_after_seat_delete(self):
+        url = reverse('user_floor_detail', args=[self.floor.id])
+        etag = self.assert_not_modified(url)
+        
+        self.seat.delete()
+        response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+    
+    def test_missing_floor(self):
+        response = self.client.get(reverse('user_floor_detail', args=[self.floor.id + 100]))
+        self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
+        self.assertFalse(response.has_header('ETag'))
+
+
+
+class UserSyncTest(TestCase):
+    """
+    人员批量同步测试
+    """
+    
+    def user_data(self, index, status='在职', **kwargs):
+        data = {
+            'user_id': f'user{index:03d}',
+            'name': f'用户{index}',
+            'dept_id': 'dept001',
+            'dept_name': '测试部门',
+            'position': '工程师',
+            'phone': '13800000000',
+            'email': f'user{index}@example.com',
+            'status': status
+        }
+        data.update(kwargs)
+        return data
+    
+    def test_created_updated_unchanged(self):
+        """
+        区分新增、变更和无变化
+        """
+        bulk_sync_users([self.user_data(i) for i in range(5)])
+        before = User.objects.get(id='user000').updated_at
+        
+        users_data = [self.user_data(i) for i in range(7)]
+        users_data[1]['position'] = '经理'
+        report = bulk_sync_users(users_data, chunk_size=3)
+        
+        self.assertEqual(report['synced_count'], 7)
+        self.assertEqual(report['created_count'], 2)
+        self.assertEqual(report['updated_count'], 1)
+        self.assertEqual(report['unchanged_count'], 4)
+        self.assertEqual([chunk['rows'] for chunk in report['chunks']], [3, 3, 1])
+        self.assertEqual(User.objects.get(id='user001').position, '经理')
+        self.assertEqual(User.objects.get(id='user000').updated_at, before)
+    
+    def test_skips_records_without_id_and_dedupes(self):
+        """
+        跳过无ID记录，同批次重复记录以最后一条为准
+        """
+        synced_count = sync_users([
+            {'name': '无ID'},
+            self.user_data(1),
+            self.user_data(1, name='新名字')
+        ])
+        
+        self.assertEqual(synced_count, 2)
+        self.assertEqual(User.objects.count(), 1)
+        self.assertEqual(User.objects.get(id='user001').name, '新名字')
+    
+    def test_departed_user_seats_released(self):
+        """
+        离职人员同步后工位被解绑
+        """
+        bulk_sync_users([self.user_data(1)])
+        venue = Venue.objects.create(name='测试场地', code='V001', city='上海', address='测试地址')
+        floor = Floor.objects.create(venue=venue, floor_no='1F', floor_name='测试楼层')
+        area = Area.objects.create(floor=floor, area_no='1', area_name='区域1')
+        seat = Seat.objects.create(area=area, seat_no='1-1')
+        bind_user_to_seat(seat.id, 'user001')
+        
+        report = bulk_sync_users([self.user_data(1, status='离职')])
+        
+        self.assertEqual(report['departed_count'], 1)
+        self.assertEqual(User.objects.get(id='user001').status, 0)
+        seat.refresh_from_db()
+        self.assertIsNone(seat.current_user_id)
+        self.assertEqual(seat.seat_status, 0)
+    
+    def test_already_departed_users_not_released_again(self):
+        """
+        已离职且无变化的人员不再计入离职数，仍占用工位时才释放
+        """
+        venue = Venue.objects.create(name='测试场地', code='V001', city='上海', address='测试地址')
+        floor = Floor.objects.create(venue=venue, floor_no='1F', floor_name='测试楼层')
+        area = Area.objects.create(floor=floor, area_no='1', area_name='区域1')
+        seat = Seat.objects.create(area=area, seat_no='1-1')
+        users_data = [self.user_data(i, status='离职') for i in range(3)]
+        self.assertEqual(bulk_sync_users(users_data)['departed_count'], 3)
+        
+        with patch('backend.apps.users.services.release_user_seats') as release:
+            report = bulk_sync_users(users_data)
+        self.assertEqual(report['departed_count'], 0)
+        release.assert_called_once_with([])
+        
+        # 离职后仍被绑定工位的人员再次同步时释放
+        Seat.objects.filter(id=seat.id).update(
+            current_user_id='user001', current_user_name='用户1', seat_status=1
+        )
+        report = bulk_sync_users(users_data)
+        
+        self.assertEqual(report['departed_count'], 1)
+        seat.refresh_from_db()
+        self.assertIsNone(seat.current_user_id)
+    
+    def test_query_count_per_chunk(self):
+        """
+        每批查询次数固定，不随人员数增长
+        """
+        bulk_sync_users([self.user_data(i) for i in range(50)])
+        users_data = [self.user_data(i, position='经理') for i in range(100)]
+        
+        # 事务(2) + 加载已有人员 + 批量新增 + 批量更新
+        with self.assertNumQueries(5):
+            bulk_sync_users(users_data, chunk_size=100)
+
+
+class ReleaseUserSeatsTest(TestCase):
+    """
+    离职人员工位批量释放测试
+    """
+    
+    def setUp(self):
+        """
+        测试初始化
+        """
+        venue = Venue.objects.create(name='测试场地', code='V001', city='上海', address='测试地址')
+        floor = Floor.objects.create(venue=venue, floor_no='1F', floor_name='测试楼层')
+        area = Area.objects.create(floor=floor, area_no='1', area_name='区域1')
+        seats = []
+        for i in range(30):
+            user_id = f'user{i % 10:03d}' if i < 20 else None
+            seats.append(Seat(
+                area=area,
+                seat_no=f'1-{i + 1}',
+                seat_status=1 if user_id else 0,
+                current_user_id=user_id,
+                current_user_name=f'用户{i % 10}' if user_id else None,
+                current_dept_id='dept001' if user_id else None,
+                bind_type=1 if user_id else 0
+            ))
+        Seat.objects.bulk_create(seats)
+    
+    def test_release_writes_sync_logs(self):
+        """
+        释放工位并写入OA同步日志
+        """
+        with self.captureOnCommitCallbacks(execute=True):
+            released_count = release_user_seats(['user001', 'user002', 'user099'])
+        
+        self.assertEqual(released_count, 4)
+        self.assertFalse(Seat.objects.filter(current_user_id__in=['user001', 'user002']).exists())
+        self.assertEqual(Seat.objects.filter(seat_status=1).count(), 16)
+        logs = SeatLog.objects.filter(operation_type=9)
+        self.assertEqual(logs.count(), 4)
+        self.assertEqual(set(logs.values_list('old_user_id', flat=True)), {'user001', 'user002'})
+    
+    def test_query_count_is_constant(self):
+        """
+        查询次数与工位数量无关
+        """
+        # 包含提交后写入日志的查询，以及批量更新状态计数的查询
+        with self.assertNumQueries(7), self.captureOnCommitCallbacks(execute=True):
+            release_user_seats([f'user{i:03d}' for i in range(10)])
+        self.assertEqual(Seat.objects.filter(seat_status=1).count(), 0)
+
+@override_settings(SEARCH_INDEX_BACKGROUND_BUILD=False)
+class SearchIndexTest(TestCase):
+    """
+    全局搜索索引测试
+    """
+    
+    def setUp(self):
+        """
+        测试初始化
+        """
+        reset_search_index()
+        venue = Venue.objects.create(name='测试场地', code='V001', city='上海', address='测试地址')
+        floor = Floor.objects.create(venue=venue, floor_no='1F', floor_name='测试楼层')
+        self.area = Area.objects.create(floor=floor, area_no='A', area_name='区域A')
+        User.objects.bulk_create([
+            User(id='U001', name='张三', dept_id='D01', dept_name='研发部', position='工程师'),
+            User(id='U002', name='张三丰', dept_id='D01', dept_name='研发部', position='工程师'),
+            User(id='U003', name='李张', dept_id='D02', dept_name='张江研发中心', position='工程师'),
+            User(id='U004', name='张三', dept_id='D02', dept_name='市场部', position='经理', status=0),
+            User(id='Abc9', name='王五', dept_id='D03', dept_name='市场部', position='经理'),
+        ])
+        self.seats = Seat.objects.bulk_create([
+            Seat(area=self.area, seat_no=f'A-{i}') for i in range(1, 13)
+        ])
+    
+    def tearDown(self):
+        reset_search_index()
+    
+    def names(self, query):
+        return [user['name'] for user in search(query)['users']]
+    
+    def test_ranks_exact_then_prefix_then_contains(self):
+        """
+        按值等于、以关键词开头、包含关键词排序，不含离职人员
+        """
+        self.assertEqual(self.names('张三'), ['张三', '张三丰'])
+        self.assertEqual(self.names('张'), ['张三', '张三丰', '李张'])
+        self.assertEqual(self.names('研发'), ['张三', '张三丰', '李张'])
+    
+    def test_case_insensitive(self):
+        """
+        忽略大小写匹配人员ID
+        """
+        self.assertEqual(self.names('abc'), ['王五'])
+        self.assertEqual(self.names('ABC9'), ['王五'])
+    
+    def test_seat_results_include_location(self):
+        """
+        工位结果包含区域、楼层、场地名称，索引建立后检索不查询数据库
+        """
+        search('A-1')
+        with self.assertNumQueries(0):
+            seats = search('A-1')['seats']
+        
+        self.assertEqual([seat['seat_no'] for seat in seats], ['A-1', 'A-10', 'A-11', 'A-12'])
+        self.assertEqual(seats[0]['area_name'], '区域A')
+        self.assertEqual(seats[0]['floor_name'], '测试楼层')
+        self.assertEqual(seats[0]['venue_name'], '测试场地')
+        self.assertEqual(len(search('a-')['seats']), 10)
+    
+    def test_matches_database_search(self):
+        """
+        结果集合与数据库检索一致
+        """
+        bind_user_to_seat(self.seats[0].id, 'U003')
+        for query in ['张', '张三', '研发', 'u00', 'A-1', 'A-2', '李', '不存在']:
+            with self.settings(SEARCH_INDEX_ENABLED=False):
+                expected = search(query)
+            result = search(query)
+            for key in ('users', 'seats'):
+                self.assertCountEqual(result[key], expected[key], (query, key))
+    
+    def test_write_paths_update_index(self):
+        """
+        绑定、解绑工位和人员同步在事务提交后更新索引
+        """
+        search('张')
+        with self.captureOnCommitCallbacks(execute=True):
+            bind_user_to_seat(self.seats[1].id, 'U002')
+        self.assertEqual([seat['seat_no'] for seat in search('张三丰')['seats']], ['A-2'])
+        
+        with self.captureOnCommitCallbacks(execute=True):
+            sync_users([
+                {'user_id': 'U002', 'name': '赵六', 'dept_id': 'D01', 'dept_name': '研发部',
+                 'position': '工程师', 'status': '离职'},
+                {'user_id': 'U005', 'name': '张飞', 'dept_id': 'D01', 'dept_name': '研发部',
+                 'position': '工程师', 'status': '在职'},
+            ])
+        self.assertEqual(self.names('张'), ['张三', '张飞', '李张'])
+        self.assertEqual(search('张三丰')['seats'], [])
+    
+    def test_background_build_falls_back_to_database(self):
+        """
+        后台建立索引完成前检索直接查询数据库，且只启动一个建立线程
+        """
+        with self.settings(SEARCH_INDEX_BACKGROUND_BUILD=True), \
+                patch.object(search_index.threading, 'Thread') as thread:
+            reset_search_index()
+            index = get_search_index()
+            self.assertEqual(self.names('张三'), ['张三', '张三丰'])
+            self.assertEqual(self.names('张三'), ['张三', '张三丰'])
+        
+        self.assertFalse(index.built)
+        thread.assert_called_once()
+        with patch.object(search_index.connection, 'close'):
+            thread.call_args.kwargs['target']()
+        self.assertTrue(index.built)
+        with self.assertNumQueries(0):
+            self.assertEqual(self.names('张三'), ['张三', '张三丰'])
+    
+    def test_build_does_not_block_search(self):
+        """
+        重建索引时在锁外读取数据库，其他线程仍可检索当前索引
+        """
+        index = get_search_index()
+        search('张')
+        results = []
+        
+        def load_locations(*args):
+            searcher = threading.Thread(target=lambda: results.append(index.search('张三')))
+            searcher.start()
+            searcher.join(timeout=2)
+            return {}
+        
+        with patch.object(search_index, 'load_locations', side_effect=load_locations):
+            index.build()
+        self.assertEqual([user['name'] for user in results[0]['users']], ['张三', '张三丰'])
+    
+    def test_reload_seats_reads_affected_areas_only(self):
+        """
+        按工位重新读取时只读取这些工位所在区域的位置
+        """
+        other_area = Area.objects.create(floor=self.area.floor, area_no='B', area_name='区域B')
+        search('A-1')
+        
+        with patch.object(search_index, 'load_locations', wraps=search_index.load_locations) as load:
+            get_search_index().reload_seats([self.seats[0].id])
+        
+        load.assert_called_once_with({self.area.id})
+        self.assertIn(other_area.id, get_search_index().locations)
+        self.assertEqual(search('A-1')['seats'][0]['area_name'], '区域A')
+    
+    def test_refresh_reads_other_process_writes(self):
+        """
+        定时刷新读取未经本进程写入的变更，有删除时整体重建
+        """
+        index = get_search_index()
+        search('张')
+        User.objects.filter(id='U001').update(name='周七', updated_at=timezone.now())
+        Seat.objects.filter(id=self.seats[0].id).delete()
+        self.assertEqual(self.names('周'), [])
+        
+        index.checked_at = 0
+        self.assertEqual(self.names('周'), ['周七'])
+        self.assertNotIn('A-1', [seat['seat_no'] for seat in search('A-1')['seats']])
+    
+    def test_compacts_removed_documents(self):
+        """
+        已删除的文档过多时压缩索引
+        """
+        index = get_search_index()
+        search('张')
+        for _ in range(3):
+            index.reload_seats(seat.id for seat in self.seats)
+        self.assertEqual(index.seats.dead, 36)
+        
+        with patch('backend.apps.users.search_index.COMPACT_MIN_DEAD', 10):
+            index.reload_seats([self.seats[0].id])
+        self.assertEqual(index.seats.dead, 0)
+        self.assertEqual(len(index.seats.docs), 12)
+        self.assertEqual(len(search('A-')['seats']), 10)
+
+
+@override_settings(SEARCH_INDEX_BACKGROUND_BUILD=False)
+class PinyinSearchTest(TestCase):
+    """
+    姓名拼音检索测试
+    """
+    
+    def setUp(self):
+        """
+        测试初始化
+        """
+        reset_search_index()
+        venue = Venue.objects.create(name='测试场地', code='V001', city='上海', address='测试地址')
+        floor = Floor.objects.create(venue=venue, floor_no='1F', floor_name='测试楼层')
+        area = Area.objects.create(floor=floor, area_no='A', area_name='区域A')
+        self.seat = Seat.objects.create(area=area, seat_no='A-1')
+        sync_users([
+            {'user_id': 'U001', 'name': '张三', 'dept_id': 'D01', 'dept_name': '研发部',
+             'position': '工程师', 'status': '在职'},
+            {'user_id': 'U002', 'name': '张三丰', 'dept_id': 'D01', 'dept_name': '研发部',
+             'position': '工程师', 'status': '在职'},
+            {'user_id': 'U003', 'name': '单田芳', 'dept_id': 'D02', 'dept_name': '市场部',
+             'position': '经理', 'status': '在职'},
+        ])
+        bind_user_to_seat(self.seat.id, 'U001')
+    
+    def tearDown(self):
+        reset_search_index()
+    
+    def test_pinyin_keys(self):
+        """
+        生成全拼和首字母，姓氏按姓氏读音，非汉字保留字母和数字
+        """
+        self.assertEqual(get_pinyin_keys('张三'), ('zhangsan', 'zs'))
+        self.assertEqual(get_pinyin_keys('单田芳'), ('shantianfang', 'stf'))
+        self.assertEqual(get_pinyin_keys('Tom张'), ('tomzhang', 'tz'))
+        self.assertEqual(get_pinyin_keys('买买提·艾力'), ('maimaitiaili', 'mmtal'))
+        self.assertEqual(get_pinyin_keys(''), ('', ''))
+    
+    def test_sync_stores_pinyin_keys(self):
+        """
+        人员同步和人员变更时更新拼音检索键
+        """
+        user = User.objects.get(id='U002')
+        self.assertEqual((user.name_pinyin, user.name_initials), ('zhangsanfeng', 'zsf'))
+        
+        process_user_change({
+            'user_id': 'U002', 'name': '李四', 'dept_id': 'D01', 'dept_name': '研发部',
+            'position': '工程师', 'status': '在职'
+        })
+        user.refresh_from_db()
+        self.assertEqual((user.name_pinyin, user.name_initials), ('lisi', 'ls'))
+    
+    def test_search_by_pinyin_prefix(self):
+        """
+        按全拼或首字母前缀检索人员和工位，忽略大小写和空格
+        """
+        for query in ['zs', 'ZS', 'zhangs', 'zhang san']:
+            result = search(query)
+            self.assertEqual([user['name'] for user in result['users']], ['张三', '张三丰'], query)
+            self.assertEqual([seat['seat_no'] for seat in result['seats']], ['A-1'], query)
+        self.assertEqual([user['name'] for user in search('shan')['users']], ['单田芳'])
+        # 拼音只做前缀匹配
+        self.assertEqual(search('san')['users'], [])
+    
+    def test_matches_database_search(self):
+        """
+        结果集合与数据库检索一致
+        """
+        for query in ['zs', 'zhang', 'stf', 'san', '张']:
+            with self.settings(SEARCH_INDEX_ENABLED=False):
+                expected = search(query)
+            result = search(query)
+            for key in ('users', 'seats'):
+                self.assertCountEqual(result[key], expected[key], (query, key))
+    
+    def test_index_follows_user_changes(self):
+        """
+        人员变更在事务提交后更新索引中的拼音
+        """
+        search('zs')
+        with self.captureOnCommitCallbacks(execute=True):
+            process_user_change({
+                'user_id': 'U002', 'name': '李四', 'dept_id': 'D01', 'dept_name': '研发部',
+                'position': '工程师', 'status': '在职'
+            })
+        self.assertEqual([user['name'] for user in search('zs')['users']], ['张三'])
+        self.assertEqual([user['name'] for user in search('ls')['users']], ['李四'])
+    
+    def test_rebuild_command(self):
+        """
+        重新生成缺失或过期的拼音检索键
+        """
+        User.objects.filter(id__in=['U001', 'U003']).update(name_pinyin='', name_initials='')
+        out = StringIO()
+        call_command('rebuild_name_pinyin', chunk_size=2, stdout=out)
+        
+        self.assertIn('共更新 2 名人员', out.getvalue())
+        self.assertEqual(
+            dict(User.objects.values_list('id', 'name_initials')),
+            {'U001': 'zs', 'U002': 'zsf', 'U003': 'stf'}
+        )
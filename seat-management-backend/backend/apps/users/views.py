@@ -1,10 +1,11 @@
+from django.utils.decorators import method_decorator
+from django.views.decorators.http import condition
 from rest_framework import status
 from rest_framework.response import Response
 from rest_framework.views import APIView
 from rest_framework.permissions import IsAuthenticated
 from rest_framework.generics import ListAPIView
 from backend.apps.floors.models import Floor
-from backend.apps.areas.models import Area
 from backend.apps.seats.models import Seat
 from backend.apps.users.models import User
 from backend.apps.users.serializers import (
@@ -12,7 +13,9 @@ from backend.apps.users.serializers import (
     UserChangeSerializer, MySeatSerializer, SearchSerializer
 )
 from backend.apps.users.services import (
-    sync_users, process_user_change, search, get_user_seats, get_seat_with_user
+    sync_users, process_user_change, search, get_user_seats, get_seat_with_user,
+    get_floor_map, get_floor_list_etag, get_floor_detail_etag, get_seat_detail_etag,
+    get_user_seats_etag
 )
 
 
@@ -22,11 +25,12 @@ class UserFloorListView(APIView):
     """
     permission_classes = [IsAuthenticated]
     
+    @method_decorator(condition(etag_func=lambda request: get_floor_list_etag()))
     def get(self, request):
         """
         获取楼层列表
         """
-        floors = Floor.objects.filter(status=1).order_by('venue_id', 'sort_order')
+        floors = Floor.objects.filter(status=1).select_related('venue').order_by('venue_id', 'sort_order')
         
         # 格式化结果
         result = []
@@ -48,69 +52,33 @@ class UserFloorListView(APIView):
         )
 
 
+def floor_detail_etag(request, floor_id):
+    """
+    楼层详情ETag（保存在请求上，读取楼层缓存时作为版本号，避免重复查询）
+    """
+    request.floor_detail_etag = get_floor_detail_etag(floor_id)
+    return request.floor_detail_etag
+
+
 class UserFloorDetailView(APIView):
     """
     获取楼层详情（含区域、工位）
     """
     permission_classes = [IsAuthenticated]
     
+    @method_decorator(condition(etag_func=floor_detail_etag))
     def get(self, request, floor_id):
         """
         获取楼层详情
         """
         try:
-            floor = Floor.objects.get(id=floor_id, status=1)
+            result = get_floor_map(floor_id, getattr(request, 'floor_detail_etag', None))
         except Floor.DoesNotExist:
             return Response(
                 {'detail': '楼层不存在或已停用'},
                 status=status.HTTP_404_NOT_FOUND
             )
         
-        # 获取楼层下的所有区域
-        areas = Area.objects.filter(floor_id=floor_id, status=1)
-        
-        # 构建结果
-        result = {
-            "id": floor.id,
-            "venue_id": floor.venue.id,
-            "venue_name": floor.venue.name,
-            "floor_no": floor.floor_no,
-            "floor_name": floor.floor_name,
-            "image_url": floor.image_url,
-            "areas": []
-        }
-        
-        # 添加区域和工位信息
-        for area in areas:
-            seats = Seat.objects.filter(area_id=area.id)
-            
-            area_info = {
-                "id": area.id,
-                "area_no": area.area_no,
-                "area_name": area.area_name,
-                "area_type": area.area_type,
-                "seat_count": area.seat_count,
-                "position_css": area.position_css,
-                "seats": []
-            }
-            
-            # 添加工位信息
-            for seat in seats:
-                seat_info = {
-                    "id": seat.id,
-                    "seat_no": seat.seat_no,
-                    "seat_status": seat.seat_status,
-                    "current_user_id": seat.current_user_id,
-                    "current_user_name": seat.current_user_name,
-                    "grid_row": seat.grid_row,
-                    "grid_col": seat.grid_col,
-                    "position_x": seat.position_x,
-                    "position_y": seat.position_y
-                }
-                area_info["seats"].append(seat_info)
-            
-            result["areas"].append(area_info)
-        
         return Response(
             result,
             status=status.HTTP_200_OK
@@ -149,6 +117,7 @@ class UserSeatDetailView(APIView):
     """
     permission_classes = [IsAuthenticated]
     
+    @method_decorator(condition(etag_func=lambda request, seat_id: get_seat_detail_etag(seat_id)))
     def get(self, request, seat_id):
         """
         获取工位详情
@@ -173,6 +142,7 @@ class UserMySeatView(APIView):
     """
     permission_classes = [IsAuthenticated]
     
+    @method_decorator(condition(etag_func=lambda request: get_user_seats_etag(request.user.username)))
     def get(self, request):
         """
         获取我的工位信息
@@ -0,0 +1,39 @@
+from django.db.models import Case, F, FloatField, Func, IntegerField, OuterRef, Subquery, Value, When
+from django.db.models.functions import Cast, Coalesce
+from backend.apps.floors.models import Floor
+from backend.apps.areas.models import Area
+from backend.apps.seats.models import Seat
+
+
+def count_subquery(queryset):
+    """
+    将按场地过滤的查询集转换为计数子查询（无数据时为0）
+    """
+    counts = queryset.order_by().annotate(count=Func(F('id'), function='COUNT')).values('count')
+    return Coalesce(Subquery(counts, output_field=IntegerField()), Value(0))
+
+
+def annotate_venue_statistics(queryset):
+    """
+    为场地查询集添加统计字段
+
+    楼层数、区域数、工位数、占用工位数分别通过相关子查询计算，
+    避免多表连接导致的重复计数；占用率为占用工位数/工位数（无工位时为0）。
+    整个列表只需一次查询。
+    """
+    floors = Floor.objects.filter(venue_id=OuterRef('pk'))
+    areas = Area.objects.filter(floor__venue_id=OuterRef('pk'))
+    seats = Seat.objects.filter(area__floor__venue_id=OuterRef('pk'))
+    
+    return queryset.annotate(
+        floor_count=count_subquery(floors),
+        area_count=count_subquery(areas),
+        seat_count=count_subquery(seats),
+        occupied_seat_count=count_subquery(seats.filter(seat_status=1)),
+    ).annotate(
+        occupancy_rate=Case(
+            When(seat_count=0, then=Value(0.0)),
+            default=Cast('occupied_seat_count', FloatField()) / Cast('seat_count', FloatField()),
+            output_field=FloatField()
+        )
+    )
@@ -1,3 +1,68 @@
 from django.test import TestCase
+from django.urls import reverse
+from rest_framework.test import APIClient
+from rest_framework import status
+from backend.apps.venues.models import Venue
+from backend.apps.floors.models import Floor
+from backend.apps.areas.models import Area
+from backend.apps.seats.models import Seat
+from backend.apps.authentication.models import User as AuthUser
 
-# Create your tests here.
+
+class VenueListTest(TestCase):
+    """
+    场地列表测试
+    """
+
+    def setUp(self):
+        """
+        测试初始化：场地A有2个楼层、3个区域、6个工位（2个占用），场地B没有楼层
+        """
+        self.venue_a = Venue.objects.create(name='场地A', code='VA', city='上海', address='地址A')
+        self.venue_b = Venue.objects.create(name='场地B', code='VB', city='上海', address='地址B')
+        floors = [
+            Floor.objects.create(venue=self.venue_a, floor_no=f'{i}F', floor_name=f'楼层{i}')
+            for i in (1, 2)
+        ]
+        areas = [
+            Area.objects.create(floor=floors[i % 2], area_no=str(i), area_name=f'区域{i}')
+            for i in range(3)
+        ]
+        Seat.objects.bulk_create([
+            Seat(area=areas[i % 3], seat_no=f'{i}', seat_status=1 if i < 2 else 0)
+            for i in range(6)
+        ])
+        self.client = APIClient()
+        self.client.force_authenticate(
+            AuthUser.objects.create_user(username='admin', password='admin123', is_admin=True)
+        )
+
+    def test_statistics_in_single_query(self):
+        """
+        场地列表的统计数据通过一次查询获得
+        """
+        with self.assertNumQueries(1):
+            response = self.client.get(reverse('venue_list_create'), {'order_by': '-floor_count'})
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        venue_a, venue_b = response.data
+        self.assertEqual(venue_a['id'], self.venue_a.id)
+        self.assertEqual(
+            (venue_a['floorCount'], venue_a['area_count'], venue_a['seat_count'], venue_a['occupied_seat_count']),
+            (2, 3, 6, 2)
+        )
+        self.assertEqual(venue_a['occupancy_rate'], 0.3333)
+        self.assertEqual(
+            (venue_b['floorCount'], venue_b['seat_count'], venue_b['occupancy_rate']),
+            (0, 0, 0)
+        )
+
+    def test_status_filter(self):
+        """
+        按状态筛选场地
+        """
+        Venue.objects.filter(id=self.venue_b.id).update(status=0)
+
+        response = self.client.get(reverse('venue_list_create'), {'status': 1})
+
+        self.assertEqual([venue['id'] for venue in response.data], [self.venue_a.id])
@@ -5,6 +5,7 @@ from rest_framework.permissions import IsAuthenticated
 from rest_framework.generics import ListCreateAPIView, RetrieveUpdateDestroyAPIView
 from .models import Venue
 from .serializers import VenueSerializer
+from .services import annotate_venue_statistics
 
 
 class VenueListCreateView(ListCreateAPIView):
@@ -44,25 +45,25 @@ class VenueListCreateView(ListCreateAPIView):
             except ValueError:
                 pass
         
+        # 统计楼层数、区域数、工位数和占用率（单次查询）
+        queryset = annotate_venue_statistics(queryset)
+        
         # 处理排序
-        if order_by == 'floor_count':
-            # 按楼层数排序（使用annotate计算每个场地的楼层数）
-            from django.db.models import Count
-            queryset = queryset.annotate(floor_count=Count('floor_set')).order_by('floor_count')
-        elif order_by == '-floor_count':
-            # 按楼层数降序排序
-            from django.db.models import Count
-            queryset = queryset.annotate(floor_count=Count('floor_set')).order_by('-floor_count')
+        if order_by in ('floor_count', '-floor_count'):
+            queryset = queryset.order_by(order_by)
         
         # 序列化数据
-        serializer = self.get_serializer(queryset, many=True)
+        venues = list(queryset)
+        serializer = self.get_serializer(venues, many=True)
         
-        # 为每个场地添加楼层数
+        # 为每个场地添加统计数据
         venues_data = serializer.data
-        for venue in venues_data:
-            venue_id = venue['id']
-            floor_count = queryset.get(id=venue_id).floor_set.count() if queryset.filter(id=venue_id).exists() else 0
-            venue['floorCount'] = floor_count
+        for venue, data in zip(venues, venues_data):
+            data['floorCount'] = venue.floor_count
+            data['area_count'] = venue.area_count
+            data['seat_count'] = venue.seat_count
+            data['occupied_seat_count'] = venue.occupied_seat_count
+            data['occupancy_rate'] = round(venue.occupancy_rate, 4)
         
         return Response(venues_data)
     
@@ -0,0 +1,132 @@
+import json
+import math
+import time
+import tracemalloc
+from django.db import connection
+
+
+# 默认回归阈值：延迟和内存为相对基线的增幅，查询数为允许增加的条数
+DEFAULT_THRESHOLDS = {
+    'latency': 0.2,
+    'memory': 0.2,
+    'queries': 0,
+}
+
+# 延迟增幅小于该值（毫秒）时视为波动，不判定为回归
+LATENCY_NOISE_MS = 1.0
+
+LATENCY_METRICS = ('p50_ms', 'p95_ms', 'p99_ms')
+
+
+class QueryCounter:
+    """
+    统计执行的SQL数量（不受 connection.queries 长度上限影响）
+    """
+
+    def __init__(self):
+        self.count = 0
+
+    def __call__(self, execute, sql, params, many, context):
+        self.count += 1
+        return execute(sql, params, many, context)
+
+
+def percentile(values, percent):
+    """
+    最近秩法计算百分位数
+    """
+    if not values:
+        return 0
+    ordered = sorted(values)
+    rank = max(math.ceil(percent / 100 * len(ordered)), 1)
+    return ordered[rank - 1]
+
+
+def benchmark_request(client, path, params=None, iterations=30, warmup=3, headers=None):
+    """
+    重复请求接口，返回延迟分位数、单次请求查询数和峰值内存
+
+    延迟和查询数在未开启内存追踪时测量，峰值内存单独用一次请求测量，
+    避免 tracemalloc 的开销影响延迟。
+    """
+    headers = headers or {}
+
+    def request():
+        response = client.get(path, params or {}, **headers)
+        if getattr(response, 'streaming', False):
+            for _ in response.streaming_content:
+                pass
+        return response
+
+    for _ in range(warmup):
+        request()
+
+    latencies = []
+    query_counts = []
+    for _ in range(iterations):
+        counter = QueryCounter()
+        with connection.execute_wrapper(counter):
+            start = time.perf_counter()
+            response = request()
+            latencies.append((time.perf_counter() - start) * 1000)
+        query_counts.append(counter.count)
+
+    tracemalloc.start()
+    try:
+        request()
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+
+    return {
+        'path': path,
+        'params': params or {},
+        'status_code': response.status_code,
+        'iterations': iterations,
+        'p50_ms': round(percentile(latencies, 50), 3),
+        'p95_ms': round(percentile(latencies, 95), 3),
+        'p99_ms': round(percentile(latencies, 99), 3),
+        'mean_ms': round(sum(latencies) / len(latencies), 3),
+        'queries': max(query_counts),
+        'peak_memory_kb': round(peak / 1024, 1),
+    }
+
+
+def compare_results(results, baseline, thresholds=None):
+    """
+    与基线对比，返回回归说明列表（基线中不存在的接口不参与对比）
+    """
+    thresholds = {**DEFAULT_THRESHOLDS, **(thresholds or {})}
+    regressions = []
+    for name, current in results.items():
+        previous = baseline.get(name)
+        if not previous:
+            continue
+        for metric in LATENCY_METRICS:
+            limit = max(previous[metric] * (1 + thresholds['latency']), previous[metric] + LATENCY_NOISE_MS)
+            if current[metric] > limit:
+                regressions.append(f'{name} {metric}: {previous[metric]} -> {current[metric]}')
+        if current['queries'] > previous['queries'] + thresholds['queries']:
+            regressions.append(f"{name} queries: {previous['queries']} -> {current['queries']}")
+        if current['peak_memory_kb'] > previous['peak_memory_kb'] * (1 + thresholds['memory']):
+            regressions.append(
+                f"{name} peak_memory_kb: {previous['peak_memory_kb']} -> {current['peak_memory_kb']}"
+            )
+    return regressions
+
+
+def load_results(path):
+    """
+    读取结果文件中的各接口指标
+    """
+    with open(path, encoding='utf-8') as f:
+        return json.load(f)['results']
+
+
+def save_results(path, report):
+    """
+    写入结果文件
+    """
+    with open(path, 'w', encoding='utf-8') as f:
+        json.dump(report, f, ensure_ascii=False, indent=2)
+        f.write('\n')
@@ -0,0 +1,45 @@
+import csv
+from django.http import StreamingHttpResponse
+from django.utils import timezone
+
+
+# 导出时每次从数据库读取的行数
+EXPORT_CHUNK_SIZE = 2000
+
+
+class Echo:
+    """
+    只返回写入内容的伪文件对象，供 csv.writer 逐行生成文本
+    """
+
+    def write(self, value):
+        return value
+
+
+def format_export_time(value):
+    """
+    导出时间统一格式化为本地时间
+    """
+    if value is None:
+        return ''
+    return timezone.localtime(value).strftime('%Y-%m-%d %H:%M:%S')
+
+
+def stream_csv_response(filename, header, rows):
+    """
+    逐行生成CSV的流式响应
+
+    rows 为可迭代的行数据，响应过程中按需读取，内存占用与导出行数无关。
+    内容以 UTF-8 BOM 开头，便于 Excel 正确识别中文。
+    """
+    writer = csv.writer(Echo())
+
+    def generate():
+        yield '\ufeff'
+        yield writer.writerow(header)
+        for row in rows:
+            yield writer.writerow(row)
+
+    response = StreamingHttpResponse(generate(), content_type='text/csv; charset=utf-8')
+    response['Content-Disposition'] = f'attachment; filename="{filename}"'
+    return response
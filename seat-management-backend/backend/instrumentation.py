@@ -0,0 +1,288 @@
+import json
+import logging
+import re
+import threading
+import time
+from collections import Counter, deque
+from contextlib import ExitStack
+from django.conf import settings
+from django.core.exceptions import MiddlewareNotUsed
+from django.db import connections
+from rest_framework import status
+from rest_framework.permissions import IsAuthenticated
+from rest_framework.response import Response
+from rest_framework.serializers import BaseSerializer
+from rest_framework.views import APIView
+from backend.benchmarks import percentile
+
+
+logger = logging.getLogger(__name__)
+
+_local = threading.local()
+
+# SQL指纹：字符串/数字字面量替换为?，IN 列表折叠为 (...)
+_LITERAL_RE = re.compile(r"'(?:[^']|'')*'|\b\d+\b")
+_IN_LIST_RE = re.compile(r'\((?:\s*(?:%s|\?)\s*,)+\s*(?:%s|\?)\s*\)')
+
+
+def fingerprint_sql(sql):
+    """
+    归一化SQL，参数不同的同一语句得到相同指纹
+    """
+    return _IN_LIST_RE.sub('(...)', _LITERAL_RE.sub('?', sql))
+
+
+class RequestMetrics:
+    """
+    单个请求的SQL和耗时统计
+    """
+
+    def __init__(self):
+        self.start = time.perf_counter()
+        self.query_count = 0
+        self.db_time = 0.0
+        self.fingerprints = Counter()
+        self.spans = {}
+
+    def __call__(self, execute, sql, params, many, context):
+        start = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.db_time += time.perf_counter() - start
+            self.query_count += 1
+            self.fingerprints[fingerprint_sql(sql)] += 1
+
+    def add_span(self, name, duration):
+        self.spans[name] = self.spans.get(name, 0.0) + duration
+
+    @property
+    def duplicate_count(self):
+        """
+        重复执行的查询次数（同一指纹除第一次外的执行次数）
+        """
+        return sum(count - 1 for count in self.fingerprints.values() if count > 1)
+
+    def top_duplicate(self):
+        """
+        重复次数最多的查询指纹及次数
+        """
+        if not self.fingerprints:
+            return None, 0
+        sql, count = self.fingerprints.most_common(1)[0]
+        return (sql, count) if count > 1 else (None, 0)
+
+
+class ViewMetricsStore:
+    """
+    按视图保留最近若干次请求的指标（进程内，多进程部署时各进程分别统计）
+    """
+
+    def __init__(self, window):
+        self.window = window
+        self._samples = {}
+        self._lock = threading.Lock()
+
+    def record(self, view, sample):
+        with self._lock:
+            samples = self._samples.get(view)
+            if samples is None:
+                samples = self._samples[view] = deque(maxlen=self.window)
+            samples.append(sample)
+
+    def summary(self):
+        """
+        各视图的延迟分位数、平均查询数和疑似N+1的请求数，按p95延迟倒序
+        """
+        with self._lock:
+            snapshot = {view: list(samples) for view, samples in self._samples.items()}
+
+        threshold = settings.REQUEST_INSTRUMENTATION_DUPLICATE_THRESHOLD
+        views = []
+        for view, samples in snapshot.items():
+            durations = [sample['duration_ms'] for sample in samples]
+            queries = [sample['queries'] for sample in samples]
+            views.append({
+                'view': view,
+                'requests': len(samples),
+                'p50_ms': round(percentile(durations, 50), 3),
+                'p95_ms': round(percentile(durations, 95), 3),
+                'p99_ms': round(percentile(durations, 99), 3),
+                'avg_queries': round(sum(queries) / len(queries), 2),
+                'max_queries': max(queries),
+                'avg_db_ms': round(sum(sample['db_ms'] for sample in samples) / len(samples), 3),
+                'avg_serialize_ms': round(sum(sample['serialize_ms'] for sample in samples) / len(samples), 3),
+                'avg_render_ms': round(sum(sample['render_ms'] for sample in samples) / len(samples), 3),
+                'duplicate_query_requests': sum(
+                    1 for sample in samples if sample['duplicate_queries'] >= threshold
+                ),
+            })
+        return sorted(views, key=lambda item: item['p95_ms'], reverse=True)
+
+    def reset(self):
+        with self._lock:
+            self._samples.clear()
+
+
+_store = None
+_store_lock = threading.Lock()
+
+
+def get_view_metrics_store():
+    """
+    获取视图指标存储
+    """
+    global _store
+    if _store is None:
+        with _store_lock:
+            if _store is None:
+                _store = ViewMetricsStore(settings.REQUEST_INSTRUMENTATION_WINDOW)
+    return _store
+
+
+def reset_view_metrics_store():
+    """
+    重置视图指标存储（主要用于测试）
+    """
+    global _store
+    with _store_lock:
+        _store = None
+
+
+_serializer_data = BaseSerializer.data
+
+
+def timed_serializer_data(serializer):
+    """
+    计算序列化器输出并记录耗时（只统计最外层序列化器，嵌套调用计入外层）
+    """
+    metrics = getattr(_local, 'metrics', None)
+    if metrics is None or getattr(_local, 'serializing', False):
+        return _serializer_data.fget(serializer)
+    _local.serializing = True
+    start = time.perf_counter()
+    try:
+        return _serializer_data.fget(serializer)
+    finally:
+        _local.serializing = False
+        metrics.add_span('serialize', time.perf_counter() - start)
+
+
+def install_serializer_timing():
+    """
+    替换 DRF 序列化器的 data 属性以记录序列化耗时（开启埋点时由中间件安装，
+    只在埋点中的请求内计时）
+    """
+    BaseSerializer.data = property(timed_serializer_data)
+
+
+class RequestInstrumentationMiddleware:
+    """
+    请求性能埋点中间件
+
+    统计每个请求的查询数、SQL耗时、重复查询指纹、序列化耗时（序列化器 data 的计算，
+    含其中执行的查询）和响应渲染耗时（渲染器将数据输出为JSON），
+    通过 Server-Timing 响应头和结构化日志输出，并按视图累计最近的指标。
+    未开启时抛出 MiddlewareNotUsed，中间件不会被加载。
+    """
+
+    def __init__(self, get_response):
+        if not settings.REQUEST_INSTRUMENTATION_ENABLED:
+            raise MiddlewareNotUsed()
+        install_serializer_timing()
+        self.get_response = get_response
+
+    def __call__(self, request):
+        metrics = RequestMetrics()
+        _local.metrics = metrics
+        try:
+            with ExitStack() as stack:
+                for connection in connections.all():
+                    stack.enter_context(connection.execute_wrapper(metrics))
+                response = self.get_response(request)
+        finally:
+            _local.metrics = None
+
+        self.report(request, response, metrics)
+        return response
+
+    def process_template_response(self, request, response):
+        """
+        记录响应渲染（渲染器输出JSON）耗时
+        """
+        metrics = getattr(_local, 'metrics', None)
+        if metrics is not None:
+            start = time.perf_counter()
+            response.add_post_render_callback(
+                lambda rendered: metrics.add_span('render', time.perf_counter() - start)
+            )
+        return response
+
+    def report(self, request, response, metrics):
+        duration_ms = (time.perf_counter() - metrics.start) * 1000
+        db_ms = metrics.db_time * 1000
+        serialize_ms = metrics.spans.get('serialize', 0.0) * 1000
+        render_ms = metrics.spans.get('render', 0.0) * 1000
+        duplicate_sql, duplicate_times = metrics.top_duplicate()
+        resolver_match = getattr(request, 'resolver_match', None)
+        view = resolver_match.route if resolver_match else 'unresolved'
+
+        timings = [
+            f'total;dur={duration_ms:.1f}',
+            f'db;dur={db_ms:.1f};desc="{metrics.query_count} queries"',
+        ]
+        for name, duration in metrics.spans.items():
+            timings.append(f'{name};dur={duration * 1000:.1f}')
+        if metrics.duplicate_count:
+            timings.append(f'dup;desc="{metrics.duplicate_count} duplicate queries"')
+        response['Server-Timing'] = ', '.join(timings)
+
+        sample = {
+            'duration_ms': round(duration_ms, 3),
+            'queries': metrics.query_count,
+            'db_ms': round(db_ms, 3),
+            'serialize_ms': round(serialize_ms, 3),
+            'render_ms': round(render_ms, 3),
+            'duplicate_queries': metrics.duplicate_count,
+        }
+        get_view_metrics_store().record(view, sample)
+
+        record = {
+            'method': request.method,
+            'path': request.path,
+            'view': view,
+            'status': response.status_code,
+            **sample,
+            'spans_ms': {name: round(duration * 1000, 3) for name, duration in metrics.spans.items()},
+        }
+        if duplicate_times >= settings.REQUEST_INSTRUMENTATION_DUPLICATE_THRESHOLD:
+            record['top_duplicate'] = {'sql': duplicate_sql[:500], 'count': duplicate_times}
+            logger.warning(json.dumps(record, ensure_ascii=False))
+        else:
+            logger.info(json.dumps(record, ensure_ascii=False))
+
+
+class RequestMetricsView(APIView):
+    """
+    各视图最近请求的性能指标（管理员）
+    """
+    permission_classes = [IsAuthenticated]
+
+    def get(self, request):
+        """
+        查询按视图汇总的请求指标
+        """
+        if not request.user.is_admin:
+            return Response(
+                {'detail': '权限拒绝，只有系统管理员可以查看请求指标'},
+                status=status.HTTP_403_FORBIDDEN
+            )
+
+        return Response(
+            {
+                'enabled': settings.REQUEST_INSTRUMENTATION_ENABLED,
+                'window': settings.REQUEST_INSTRUMENTATION_WINDOW,
+                'views': get_view_metrics_store().summary(),
+            },
+            status=status.HTTP_200_OK
+        )
@@ -56,6 +56,7 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+    'backend.instrumentation.RequestInstrumentationMiddleware',
     'django.middleware.security.SecurityMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'corsheaders.middleware.CorsMiddleware',
@@ -193,6 +194,49 @@ AUTH_USER_MODEL = 'authentication.User'
 REDIS_URL = os.getenv('REDIS_URL', 'redis://localhost:6379/0')
 
 
+# 楼层平面图缓存配置（Redis不可用时使用进程内LRU）
+# 缓存存储：auto 自动选择，redis 使用Redis（不可用时记录错误日志），local 使用进程内LRU
+FLOOR_MAP_CACHE_STORE = os.getenv('FLOOR_MAP_CACHE_STORE', 'auto')
+FLOOR_MAP_CACHE_SIZE = int(os.getenv('FLOOR_MAP_CACHE_SIZE', '256'))
+FLOOR_MAP_CACHE_TIMEOUT = int(os.getenv('FLOOR_MAP_CACHE_TIMEOUT', '3600'))
+
+
+# 人员同步配置（每批处理的人员数）
+USER_SYNC_CHUNK_SIZE = int(os.getenv('USER_SYNC_CHUNK_SIZE', '1000'))
+
+# 全局搜索索引配置（关闭时直接查询数据库）
+SEARCH_INDEX_ENABLED = os.getenv('SEARCH_INDEX_ENABLED', 'True').lower() == 'true'
+# 每隔 N 秒增量读取其他进程写入的人员和工位变更
+SEARCH_INDEX_REFRESH_SECONDS = int(os.getenv('SEARCH_INDEX_REFRESH_SECONDS', '30'))
+# 在后台线程中建立和刷新索引（建立完成前搜索直接查询数据库），关闭时在请求中同步建立
+SEARCH_INDEX_BACKGROUND_BUILD = os.getenv('SEARCH_INDEX_BACKGROUND_BUILD', 'True').lower() == 'true'
+
+# OA接口配置（分页大小、单次请求超时秒数）
+OA_PAGE_SIZE = int(os.getenv('OA_PAGE_SIZE', '1000'))
+OA_REQUEST_TIMEOUT = int(os.getenv('OA_REQUEST_TIMEOUT', '30'))
+# Webhook事件领取时限（秒）：处理中的事件超过该时间未完成（如进程崩溃）时可被重新领取
+WEBHOOK_CLAIM_TIMEOUT = int(os.getenv('WEBHOOK_CLAIM_TIMEOUT', '300'))
+
+
+# 工位变更日志写入配置
+# db: 事务提交后批量写入数据库，写入失败时转存到本地文件
+# spool: 直接追加到本地文件，由 replay_seat_log_spool 命令回放
+SEAT_LOG_WRITE_MODE = os.getenv('SEAT_LOG_WRITE_MODE', 'db')
+SEAT_LOG_SPOOL_PATH = os.getenv('SEAT_LOG_SPOOL_PATH', os.path.join(BASE_DIR, 'logs', 'seat_log_spool.jsonl'))
+
+# 工位变更日志归档配置（数据库保留最近 N 个自然月，更早的日志按月归档到压缩文件）
+SEAT_LOG_HOT_MONTHS = int(os.getenv('SEAT_LOG_HOT_MONTHS', '6'))
+SEAT_LOG_ARCHIVE_DIR = os.getenv('SEAT_LOG_ARCHIVE_DIR', os.path.join(BASE_DIR, 'archive', 'seat_logs'))
+
+
+# 请求性能埋点配置（关闭时中间件不加载，没有额外开销）
+REQUEST_INSTRUMENTATION_ENABLED = os.getenv('REQUEST_INSTRUMENTATION_ENABLED', 'False').lower() == 'true'
+# 每个视图保留最近 N 次请求的指标
+REQUEST_INSTRUMENTATION_WINDOW = int(os.getenv('REQUEST_INSTRUMENTATION_WINDOW', '500'))
+# 同一查询在一个请求中重复执行达到该次数时记录警告（疑似N+1查询）
+REQUEST_INSTRUMENTATION_DUPLICATE_THRESHOLD = int(os.getenv('REQUEST_INSTRUMENTATION_DUPLICATE_THRESHOLD', '5'))
+
+
 # CORS 配置
 CORS_ALLOW_ALL_ORIGINS = True
 CORS_ALLOW_CREDENTIALS = True
@@ -229,6 +273,11 @@ LOGGING = {
             'level': 'INFO',
             'propagate': True,
         },
+        'backend.instrumentation': {
+            'handlers': ['file'],
+            'level': 'INFO',
+            'propagate': False,
+        },
     },
 }
 
@@ -6,6 +6,7 @@ from rest_framework_simplejwt.views import (
     TokenVerifyView,
 )
 from rest_framework.permissions import AllowAny
+from backend.instrumentation import RequestMetricsView
 
 
 # 创建不需要认证的视图类
@@ -51,4 +52,7 @@ urlpatterns = [
     
     # OA应用
     path('api/', include('backend.apps.oa.urls')),
+    
+    # 请求性能指标
+    path('api/admin/metrics/requests', RequestMetricsView.as_view(), name='admin_request_metrics'),
 ]
\ No newline at end of file
@@ -0,0 +1,192 @@
+from io import StringIO
+from django.core.management import call_command
+from django.db import transaction
+from django.test import TestCase, override_settings
+from django.urls import URLResolver, get_resolver
+from rest_framework.test import APIClient
+from rest_framework_simplejwt.tokens import RefreshToken
+from backend.apps.authentication.models import User as AuthUser
+from backend.apps.areas.models import Area
+from backend.apps.floors.cache import reset_floor_map_store
+from backend.apps.seats.models import Seat
+from backend.apps.users.models import User
+from backend.apps.users.search_index import reset_search_index
+from backend.apps.logs.models import SeatLog
+
+
+def get_api_routes(patterns=None, prefix=''):
+    """
+    列出全部接口路由（不含Django管理后台）
+    """
+    routes = []
+    for pattern in get_resolver().url_patterns if patterns is None else patterns:
+        route = prefix + str(pattern.pattern)
+        if isinstance(pattern, URLResolver):
+            if not route.startswith('admin/'):
+                routes.extend(get_api_routes(pattern.url_patterns, route))
+        else:
+            routes.append(route)
+    return routes
+
+
+# 不在预算范围内的接口及原因
+EXEMPT_ROUTES = {
+    'api/admin/user/sync': '请求体中的人员数决定查询数，按批次计费（见 users.tests）',
+}
+
+
+class QueryBudgetMixin:
+    """
+    接口查询次数预算
+
+    每个接口在 get_routes 中声明固定的查询次数（含JWT认证查询用户的1次），
+    同一预算分别在小规模和约3倍规模（场地、区域、工位、人员、日志同时增长）的数据上断言，
+    查询次数随数据量增长即失败。事务提交后的回调（日志写入、缓存失效）不计入。
+    """
+    SCALE = 1
+
+    @classmethod
+    def setUpTestData(cls):
+        call_command(
+            'seed_scale', venues=cls.SCALE + 1, floors=2, areas=2 * cls.SCALE, seats=3 * cls.SCALE, users=80 * cls.SCALE,
+            depts=6, logs=40 * cls.SCALE, occupancy=0.5, end_date='2026-01-31', stdout=StringIO()
+        )
+        cls.seat = Seat.objects.filter(seat_status=1).order_by('id').first()
+        # 与 seat 不在同一区域，换座时两个区域的计数都要更新
+        cls.idle_seat = Seat.objects.filter(seat_status=0).exclude(area_id=cls.seat.area_id).order_by('id').first()
+        cls.free_user = User.objects.filter(status=1).exclude(
+            id__in=Seat.objects.filter(seat_status=1).values('current_user_id')
+        ).order_by('id').first()
+        cls.log = SeatLog.objects.order_by('id').first()
+        cls.empty_area = Area.objects.create(floor_id=cls.seat.area.floor_id, area_no='new', area_name='新区域')
+        # 员工端以账号用户名作为OA工号
+        cls.auth_user = AuthUser.objects.create_user(
+            username=cls.seat.current_user_id, password='admin123', is_admin=True
+        )
+
+    def setUp(self):
+        reset_floor_map_store()
+        reset_search_index()
+        self.client = APIClient()
+        self.refresh = RefreshToken.for_user(self.auth_user)
+        self.client.credentials(HTTP_AUTHORIZATION=f'Bearer {self.refresh.access_token}')
+
+    def tearDown(self):
+        reset_search_index()
+
+    def request(self, method, path, data=None):
+        response = getattr(self.client, method)(path, data, format='json' if method != 'get' else None)
+        if getattr(response, 'streaming', False):
+            b''.join(response.streaming_content)
+        return response
+
+    def get_routes(self):
+        """
+        {路由: (方法, 路径, 请求数据, 查询次数)}
+        """
+        seat, area, floor = self.seat, self.seat.area, self.seat.area.floor
+        user_id = self.seat.current_user_id
+        return {
+            'api/token': ('post', '/api/token', {'username': user_id, 'password': 'admin123'}, 1),
+            'api/token/refresh': ('post', '/api/token/refresh', {'refresh': str(self.refresh)}, 0),
+            'api/token/verify': ('post', '/api/token/verify', {'token': str(self.refresh.access_token)}, 0),
+            'api/auth/login': ('post', '/api/auth/login', {'username': user_id, 'password': 'admin123'}, 2),
+            'api/auth/register': ('post', '/api/auth/register', {
+                'username': 'newuser', 'name': '新用户', 'password': 'Pass1234!', 'password2': 'Pass1234!'
+            }, 3),
+            'api/auth/logout': ('post', '/api/auth/logout', {}, 1),
+            'api/auth/refresh': ('post', '/api/auth/refresh', {'refresh': str(self.refresh)}, 0),
+            'api/auth/user/info': ('get', '/api/auth/user/info', None, 1),
+            'api/admin/venue/venues': ('get', '/api/admin/venue/venues', None, 2),
+            'api/admin/venue/venues/<int:id>': ('get', f'/api/admin/venue/venues/{floor.venue_id}', None, 2),
+            'api/admin/floor/floors': ('get', '/api/admin/floor/floors', None, 2),
+            'api/admin/floor/floors/<int:id>': ('get', f'/api/admin/floor/floors/{floor.id}', None, 2),
+            'api/admin/area/areas': ('get', '/api/admin/area/areas', None, 2),
+            'api/admin/area/areas/<int:id>': ('get', f'/api/admin/area/areas/{area.id}', None, 2),
+            'api/admin/seats': ('get', '/api/admin/seats', {'floor_id': floor.id}, 2),
+            'api/admin/seats/export': ('get', '/api/admin/seats/export', {'floor_id': floor.id}, 2),
+            'api/admin/seats/statistics': ('get', '/api/admin/seats/statistics', None, 2),
+            'api/admin/seats/<int:id>': ('get', f'/api/admin/seats/{seat.id}', None, 2),
+            'api/admin/seats/generate': ('post', '/api/admin/seats/generate', {
+                'area_id': self.empty_area.id, 'count': 20
+            }, 8),
+            'api/admin/seat/bind': ('post', '/api/admin/seat/bind', {
+                'seat_id': self.idle_seat.id, 'user_id': self.free_user.id, 'bind_type': 1
+            }, 8),
+            'api/admin/seat/bind/batch': ('post', '/api/admin/seat/bind/batch', {'items': [
+                {'seat_id': self.idle_seat.id, 'user_id': self.free_user.id, 'bind_type': 1}
+            ]}, 8),
+            'api/admin/seat/unbind': ('post', '/api/admin/seat/unbind', {'seat_id': seat.id}, 7),
+            'api/admin/seat/batch-update': ('post', '/api/admin/seat/batch-update', {
+                'area_id': area.id, 'seat_status': 2, 'unbind': True
+            }, 7),
+            'api/admin/seat/transfer': ('post', '/api/admin/seat/transfer', {
+                'old_seat_id': seat.id, 'new_seat_id': self.idle_seat.id, 'user_id': user_id
+            }, 10),
+            'api/admin/seat/extra-bind': ('post', '/api/admin/seat/extra-bind', {
+                'seat_id': self.idle_seat.id, 'user_id': user_id
+            }, 8),
+            'api/user/floor': ('get', '/api/user/floor', None, 3),
+            'api/user/floor/<int:floor_id>': ('get', f'/api/user/floor/{floor.id}', None, 5),
+            # 首次检索时建立搜索索引（人员、工位、区域位置各一次查询）
+            'api/user/search': ('get', '/api/user/search', {'q': '1'}, 4),
+            'api/user/seat/<int:seat_id>': ('get', f'/api/user/seat/{seat.id}', None, 4),
+            'api/user/my-seat': ('get', '/api/user/my-seat', None, 3),
+            'api/admin/user/list': ('get', '/api/admin/user/list', None, 2),
+            'api/admin/user/query': ('get', '/api/admin/user/query', {'user_id': user_id}, 2),
+            'api/webhook/user-change': ('post', '/api/webhook/user-change', {
+                'user_id': user_id, 'name': '新名字', 'dept_id': 'D010101', 'dept_name': '部门',
+                'position': '工程师', 'status': '1', 'change_type': 'update'
+            }, 11),
+            'api/admin/department/tree': ('get', '/api/admin/department/tree', None, 2),
+            'api/admin/log/logs': ('get', '/api/admin/log/logs', None, 3),
+            'api/admin/log/logs/export': ('get', '/api/admin/log/logs/export', None, 2),
+            'api/admin/log/logs/<int:log_id>': ('get', f'/api/admin/log/logs/{self.log.id}', None, 2),
+            'api/admin/log/logs/statistics': ('get', '/api/admin/log/logs/statistics', None, 4),
+            'api/webhook/oa/event': ('post', '/api/webhook/oa/event', {
+                'event_type': 1, 'event_data': {'user_id': user_id}
+            }, 2),
+            'api/admin/metrics/requests': ('get', '/api/admin/metrics/requests', None, 1),
+        }
+
+    def test_every_route_has_budget(self):
+        """
+        backend/urls.py 及各应用 urls.py 中的每个接口都声明了查询预算
+        """
+        self.assertEqual(set(get_api_routes()), set(self.get_routes()) | set(EXEMPT_ROUTES))
+    
+    def test_query_budgets(self):
+        """
+        每个接口的查询次数等于预算
+        """
+        for route, (method, path, data, budget) in self.get_routes().items():
+            with self.subTest(route=route):
+                # 每个请求在独立的保存点中执行并回滚，互不影响
+                with transaction.atomic():
+                    reset_floor_map_store()
+                    reset_search_index()
+                    with self.assertNumQueries(budget):
+                        response = self.request(method, path, data)
+                    transaction.set_rollback(True)
+                self.assertLess(response.status_code, 400, getattr(response, 'data', None))
+
+
+@override_settings(
+    PASSWORD_HASHERS=['django.contrib.auth.hashers.MD5PasswordHasher'], FLOOR_MAP_CACHE_STORE='local',
+    SEARCH_INDEX_BACKGROUND_BUILD=False
+)
+class QueryBudgetTest(QueryBudgetMixin, TestCase):
+    """
+    接口查询次数预算（小规模数据）
+    """
+
+
+@override_settings(
+    PASSWORD_HASHERS=['django.contrib.auth.hashers.MD5PasswordHasher'], FLOOR_MAP_CACHE_STORE='local',
+    SEARCH_INDEX_BACKGROUND_BUILD=False
+)
+class ScaledQueryBudgetTest(QueryBudgetMixin, TestCase):
+    """
+    接口查询次数预算（约3倍规模数据）
+    """
+    SCALE = 3
@@ -1,5 +1,7 @@
+import json
 import unittest
-from django.test import TestCase
+from django.db import connection
+from django.test import TestCase, override_settings
 from django.urls import reverse
 from rest_framework.test import APIClient
 from rest_framework import status
@@ -10,6 +12,8 @@ from backend.apps.seats.models import Seat
 from backend.apps.users.models import User
 from backend.apps.authentication.models import User as AuthUser
 from rest_framework_simplejwt.tokens import RefreshToken
+from backend.apps.users.search_index import reset_search_index
+from backend.instrumentation import RequestMetrics, fingerprint_sql, reset_view_metrics_store
 
 
 class SeatManagementTest(TestCase):
@@ -247,10 +251,13 @@ class SeatManagementTest(TestCase):
         self.assertEqual(response.status_code, status.HTTP_200_OK)
         self.assertEqual(response.data['id'], self.floor.id)
     
+    @override_settings(SEARCH_INDEX_BACKGROUND_BUILD=False)
     def test_user_search(self):
         """
         测试员工端全局搜索
         """
+        reset_search_index()
+        self.addCleanup(reset_search_index)
         url = reverse('user_search') + '?q=测试'
         response = self.client.get(url)
         self.assertEqual(response.status_code, status.HTTP_200_OK)
@@ -275,5 +282,104 @@ class SeatManagementTest(TestCase):
         self.assertGreater(len(response.data['seats']), 0)
 
 
+class RequestInstrumentationTest(TestCase):
+    """
+    请求性能埋点测试
+    """
+    
+    def setUp(self):
+        reset_view_metrics_store()
+        self.addCleanup(reset_view_metrics_store)
+        venue = Venue.objects.create(name='测试场地', code='V001', city='上海', address='测试地址')
+        self.floor = Floor.objects.create(venue=venue, floor_no='1F', floor_name='测试楼层')
+        self.admin = AuthUser.objects.create_user(username='admin', password='admin123', is_admin=True)
+    
+    def get_client(self, user=None):
+        client = APIClient()
+        client.force_authenticate(user or self.admin)
+        return client
+    
+    def test_disabled_by_default(self):
+        """
+        未开启时中间件不加载，响应不含 Server-Timing
+        """
+        response = self.get_client().get(reverse('user_floor_detail', args=[self.floor.id]))
+        
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertNotIn('Server-Timing', response)
+    
+    @override_settings(REQUEST_INSTRUMENTATION_ENABLED=True)
+    def test_server_timing_and_log(self):
+        """
+        开启后输出 Server-Timing 响应头和结构化日志，并按视图汇总
+        """
+        client = self.get_client()
+        with self.assertLogs('backend.instrumentation', 'INFO') as logs:
+            response = client.get(reverse('user_floor_detail', args=[self.floor.id]))
+        
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertRegex(response['Server-Timing'], r'^total;dur=[\d.]+, db;dur=[\d.]+;desc="\d+ queries"')
+        self.assertIn('render;dur=', response['Server-Timing'])
+        record = json.loads(logs.records[0].getMessage())
+        self.assertEqual(record['view'], 'api/user/floor/<int:floor_id>')
+        self.assertEqual(record['status'], 200)
+        self.assertGreater(record['queries'], 0)
+        
+        response = client.get(reverse('admin_request_metrics'))
+        
+        self.assertTrue(response.data['enabled'])
+        views = {item['view']: item for item in response.data['views']}
+        self.assertEqual(views['api/user/floor/<int:floor_id>']['requests'], 1)
+    
+    @override_settings(REQUEST_INSTRUMENTATION_ENABLED=True)
+    def test_serializer_span(self):
+        """
+        使用序列化器的视图记录序列化耗时
+        """
+        client = self.get_client()
+        with self.assertLogs('backend.instrumentation', 'INFO') as logs:
+            response = client.get(reverse('floor_list_create'))
+        
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertIn('serialize;dur=', response['Server-Timing'])
+        record = json.loads(logs.records[0].getMessage())
+        self.assertIn('serialize', record['spans_ms'])
+        self.assertEqual(record['serialize_ms'], record['spans_ms']['serialize'])
+        
+        response = client.get(reverse('admin_request_metrics'))
+        
+        views = {item['view']: item for item in response.data['views']}
+        self.assertIn('avg_serialize_ms', views[record['view']])
+    
+    def test_metrics_view_requires_admin(self):
+        """
+        只有管理员可以查看请求指标
+        """
+        user = AuthUser.objects.create_user(username='staff', password='staff123')
+        
+        response = self.get_client(user).get(reverse('admin_request_metrics'))
+        
+        self.assertEqual(response.status_code, status.HTTP_403_FORBIDDEN)
+    
+    def test_duplicate_query_fingerprints(self):
+        """
+        参数不同的同一查询归为同一指纹
+        """
+        self.assertEqual(
+            fingerprint_sql("SELECT * FROM t WHERE id IN (%s, %s) AND name = 'a' LIMIT 21"),
+            fingerprint_sql("SELECT * FROM t WHERE id IN (%s, %s, %s) AND name = 'b' LIMIT 1")
+        )
+        
+        metrics = RequestMetrics()
+        with connection.execute_wrapper(metrics):
+            for floor_id in range(3):
+                list(Floor.objects.filter(id=floor_id))
+            list(Venue.objects.all())
+        
+        self.assertEqual(metrics.query_count, 4)
+        self.assertEqual(metrics.duplicate_count, 2)
+        self.assertEqual(metrics.top_duplicate()[1], 3)
+
+
 if __name__ == '__main__':
     unittest.main()